@@ -0,0 +1,383 @@
+"""
+파비콘 가져오기 벤치마크입니다 (인터넷 없이 로컬 HTTP 서버로 측정).
+
+로컬 서버를 파비콘 세션(main.favicon_http)의 프록시로 지정해 가짜 도메인(*.test)들을 흉내 냅니다.
+도메인이 실제처럼 서로 다르므로 사이트별 동시 실행 제한, 실패 기록, 출처 성적이 그대로 동작합니다.
+  - S2 스타일 엔드포인트: main.FAVICON_S2_URL을 로컬 주소로 바꿈 (모르는 도메인은 404 + 기본 아이콘)
+  - 다양한 <link rel=icon> 마크업: 대문자 shortcut icon, 여러 sizes, apple-touch-icon만, <base href>,
+    data: URI + SVG, 링크 없이 /favicon.ico만
+  - 다른 호스트(www.)로의 리디렉션, 느린 응답, 모든 요청이 404인 사이트,
+    TLS 오류(https 연결이 실패하고 http로 다시 시도하는 사이트)
+  - 모든 아이콘은 ETag를 주고 If-None-Match에 304로 답함 (재검증 단계)
+
+fetch_favicon(바로가기마다 호출, 같은 도메인은 SingleFlight로 합쳐짐)과 전체 새로고침 경로
+(FaviconRefreshEngine, 도메인마다 refresh_favicon)를 여러 동시 실행 수로 실행합니다.
+각 조합은 빈 아이콘 폴더에서 시작하며 "처음"(빈 캐시)과 "재검증"(같은 캐시, 조건부 요청) 두 단계를 측정하고
+호출별 p50/p95 지연, 바로가기당 요청 수(서버 기준, CONNECT 포함), 전송 바이트(서버가 쓴 응답, 헤더 포함),
+전체 시간, 아이콘을 얻은 바로가기 수를 출력합니다.
+--save로 결과를 JSON으로 저장하고, 다른 커밋에서 실행할 때 --compare로 그 결과와 비교합니다.
+
+프록시를 거치므로 연결 재사용(keep-alive)은 실제와 다르며(모든 요청이 프록시 연결 하나의 풀을 공유),
+파비콘 세션의 새 연결 수는 세지 않습니다.
+
+사용법 (저장소 루트에서):
+    python benchmarks/bench_favicon_fetch.py [--sites 40] [--per-site 3] [--concurrency 1,4,8,16]
+        [--latency-ms 20] [--slow 1.0] [--save 결과.json] [--compare 이전.json] [--verbose]
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import main # noqa: E402
+
+S2_HOST = "s2.favicon-cdn.test"
+S2_KNOWN_KINDS = {"link", "shortcut", "sizes", "apple", "base", "ico", "redirect"} # S2가 아이콘을 가진 사이트 종류
+PAGE_FILLER_BYTES = 32 * 1024 # </head> 뒤 본문 크기 (스트리밍 파서가 읽지 않아야 하는 부분)
+
+# 사이트 종류: (<head> 마크업, {아이콘 경로: (형식, 크기)})
+SITE_KINDS = {
+    "link": ('<link rel="stylesheet" href="/site.css">\n<link rel="icon" type="image/png" href="/static/favicon.png">',
+             {"/static/favicon.png": ("png", 32)}),
+    "shortcut": ('<LINK REL="Shortcut Icon" HREF="/favicon.ico">', {"/favicon.ico": ("ico", 32)}),
+    "sizes": ("".join(f'<link rel="icon" sizes="{n}x{n}" href="/icons/icon-{n}.png">\n' for n in (16, 32, 96, 192)),
+              {f"/icons/icon-{n}.png": ("png", n) for n in (16, 32, 96, 192)}),
+    "apple": ('<link rel="apple-touch-icon" sizes="180x180" href="/apple-touch-icon.png">',
+              {"/apple-touch-icon.png": ("png", 180)}),
+    "base": ('<base href="/assets/v2/">\n<link rel=icon href="img/icon.png">', {"/assets/v2/img/icon.png": ("png", 48)}),
+    "svg": ('<link rel="icon" href="data:image/png;base64,iVBORw0KGgo=">\n'
+            '<link rel="icon" type="image/svg+xml" href="/icon.svg">', {"/icon.svg": ("svg", 16)}),
+    "ico": ("", {"/favicon.ico": ("ico", 32)}),
+    "redirect": ('<link rel="icon" href="/favicon-32.png">', {"/favicon-32.png": ("png", 32)}), # www.로 이동한 뒤
+    "slow": ('<link rel="icon" href="/static/favicon.png">', {"/static/favicon.png": ("png", 32), "/favicon.ico": ("ico", 32)}),
+    "missing": ("", {}),
+    "tls": ('<link rel="icon" href="/static/favicon.png">', {"/static/favicon.png": ("png", 32)}), # https는 TLS 오류
+}
+
+_image_cache = {}
+_image_lock = threading.Lock()
+
+
+def make_png(seed, size):
+    """seed마다 색이 다른 size x size 단색 PNG를 만듭니다 (도메인마다 내용 해시가 달라지도록)."""
+    color = hashlib.sha256(seed.encode()).digest()[:3] + b"\xff"
+    raw = b"".join(b"\x00" + color * size for _ in range(size))
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def make_image(seed, fmt, size):
+    key = (seed, fmt, size)
+    with _image_lock:
+        if key not in _image_cache:
+            if fmt == "svg":
+                color = hashlib.sha256(seed.encode()).hexdigest()[:6]
+                data = (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}">'
+                        f'<rect width="{size}" height="{size}" fill="#{color}"/></svg>').encode()
+            else:
+                data = make_png(seed, size)
+                if fmt == "ico": # PNG 프레임 하나를 담은 ICO
+                    data = struct.pack("<HHH", 0, 1, 1) + struct.pack("<BBBBHHII", size % 256, size % 256, 0, 0, 1, 32, len(data), 22) + data
+            _image_cache[key] = data
+        return _image_cache[key]
+
+
+def make_page(head):
+    filler = '<div class="card"><p>' + "본문 내용 " * 40 + '</p></div>\n'
+    body = filler * (PAGE_FILLER_BYTES // len(filler.encode()) + 1)
+    return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>테스트</title>\n{head}\n</head>\n'
+            f'<body>\n{body}</body></html>\n').encode()
+
+
+class _CountingWriter:
+    """응답으로 쓴 바이트 수를 서버 통계에 더합니다."""
+    def __init__(self, raw, server):
+        self._raw = raw
+        self._server = server
+
+    def write(self, data):
+        self._server.count_bytes(len(data))
+        return self._raw.write(data)
+
+    def __getattr__(self, name): # flush, close, closed 등은 원래 파일 객체로
+        return getattr(self._raw, name)
+
+
+class FaviconSiteHandler(BaseHTTPRequestHandler):
+    """프록시 요청(절대 URL)을 가짜 사이트/S2 응답으로 처리합니다."""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.wfile = _CountingWriter(self.wfile, self.server)
+
+    def log_message(self, *args):
+        pass
+
+    def do_CONNECT(self):
+        """https 터널: 평문을 돌려주므로 클라이언트의 TLS 핸드셰이크가 SSLError로 실패합니다."""
+        self.server.count_request()
+        self.send_response(200, "Connection established")
+        self.end_headers()
+        self.wfile.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+        self.close_connection = True
+
+    def do_GET(self):
+        self.server.count_request()
+        parts = urlsplit(self.path)
+        host = (parts.hostname or self.headers.get("Host", "").split(":")[0]).lower()
+        time.sleep(self.server.latency)
+        if host == S2_HOST:
+            domain = parse_qs(parts.query).get("domain_url", [""])[0]
+            if self.server.sites.get(domain) in S2_KNOWN_KINDS:
+                return self.send_body(200, "image/png", make_image(domain, "png", 64))
+            return self.send_body(404, "image/png", make_image("s2-default", "png", 16)) # S2의 기본 지구본 아이콘
+
+        redirected = host.startswith("www.") and self.server.sites.get(host[4:]) == "redirect"
+        domain = host[4:] if redirected else host
+        kind = self.server.sites.get(domain)
+        if kind is None or kind == "missing":
+            return self.send_body(404, "text/html", b"<html><body>Not Found</body></html>")
+        if kind == "slow":
+            time.sleep(self.server.slow)
+        head, icons = SITE_KINDS[kind]
+        if parts.path in icons:
+            fmt, size = icons[parts.path]
+            content_type = {"png": "image/png", "ico": "image/x-icon", "svg": "image/svg+xml"}[fmt]
+            return self.send_body(200, content_type, make_image(domain + parts.path, fmt, size), conditional=True)
+        if parts.path == "/favicon.ico" or parts.path.endswith((".png", ".ico", ".svg")):
+            return self.send_body(404, "text/html", b"<html><body>Not Found</body></html>")
+        if kind == "redirect" and not redirected:
+            self.send_response(301)
+            self.send_header("Location", f"http://www.{domain}/home/")
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        return self.send_body(200, "text/html; charset=utf-8", make_page(head))
+
+    def send_body(self, status, content_type, body, conditional=False):
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if conditional and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if conditional: self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FaviconBenchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, sites, latency, slow):
+        super().__init__(("127.0.0.1", 0), FaviconSiteHandler)
+        self.sites = sites # {도메인: 종류}
+        self.latency = latency
+        self.slow = slow
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError): return # 취소/TLS 실패로 클라이언트가 먼저 끊은 연결
+        super().handle_error(request, client_address)
+
+    def count_request(self):
+        with self._lock: self.requests += 1
+
+    def count_bytes(self, size):
+        with self._lock: self.bytes += size
+
+    def snapshot(self):
+        with self._lock: return self.requests, self.bytes
+
+
+def make_shortcuts(site_count, per_site):
+    """사이트 종류를 돌아가며 배정한 가짜 도메인과 바로가기 목록을 만듭니다."""
+    kinds = list(SITE_KINDS)
+    sites, shortcuts = {}, []
+    for i in range(site_count):
+        kind = kinds[i % len(kinds)]
+        domain = f"{kind}-{i}.test"
+        sites[domain] = kind
+        scheme = "https" if kind == "tls" else "http"
+        for j in range(per_site):
+            shortcuts.append({"id": f"{i}-{j}", "url": f"{scheme}://{domain}/page/{j}"})
+    return sites, shortcuts
+
+
+def reset_state(directory):
+    """아이콘 폴더를 바꾸고 실패 기록과 출처 성적을 비웁니다."""
+    main.FAVICON_DIR = directory
+    main.favicon_failures.clear()
+    main.favicon_source_stats.clear()
+
+
+def percentile(values, fraction):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)] # 최근접 순위
+
+
+def timed(func, latencies):
+    """func 호출마다 걸린 시간(밀리초)을 latencies에 더하는 래퍼입니다."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000.0)
+    return wrapper
+
+
+def run_fetch(shortcuts, concurrency, revalidate):
+    """바로가기마다 fetch_favicon을 호출합니다. 반환 값: (호출별 지연 목록, 아이콘을 얻은 바로가기 수)"""
+    latencies = []
+    fetch = timed(main.fetch_favicon, latencies)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        paths = list(pool.map(lambda sc: fetch(sc["url"], revalidate), shortcuts))
+    return latencies, sum(1 for path in paths if path and path != main.DEFAULT_FAVICON)
+
+
+def run_refresh(shortcuts, concurrency, revalidate):
+    """전체 새로고침 경로(FaviconRefreshEngine)로 도메인마다 refresh_favicon을 호출합니다 (항상 재검증)."""
+    latencies, icons = [], []
+    original = main.refresh_favicon
+    main.refresh_favicon = timed(original, latencies) # 엔진은 모듈의 refresh_favicon을 호출
+    try:
+        engine = main.FaviconRefreshEngine.for_shortcuts(
+            shortcuts, on_result=lambda ids, path: icons.extend(ids) if path and path != main.DEFAULT_FAVICON else None,
+            on_progress=lambda done, total: None, on_finished=lambda cancelled, not_modified: None,
+            concurrency=concurrency)
+        engine.start()
+        engine.wait()
+    finally:
+        main.refresh_favicon = original
+    return latencies, len(icons)
+
+
+PATHS = {"fetch_favicon": run_fetch, "새로고침": run_refresh}
+PHASES = (("처음", False), ("재검증", True))
+
+
+def bench(server, shortcuts, concurrency_levels, verbose):
+    results = []
+    for path_name, func in PATHS.items():
+        for concurrency in concurrency_levels:
+            with tempfile.TemporaryDirectory() as tmp:
+                reset_state(tmp)
+                for phase, revalidate in PHASES:
+                    requests_before, bytes_before = server.snapshot()
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()): # 실패/SSL 경고 숨김
+                        latencies, icons = func(shortcuts, concurrency, revalidate)
+                    wall = time.perf_counter() - start
+                    requests_after, bytes_after = server.snapshot()
+                    results.append({
+                        "path": path_name, "concurrency": concurrency, "phase": phase,
+                        "p50_ms": percentile(latencies, 0.5), "p95_ms": percentile(latencies, 0.95),
+                        "requests_per_shortcut": (requests_after - requests_before) / len(shortcuts),
+                        "kib": (bytes_after - bytes_before) / 1024.0, "wall_s": wall,
+                        "icons": icons, "shortcuts": len(shortcuts),
+                    })
+                    print_row(results[-1])
+                main.favicon_source_stats.flush()
+    return results
+
+
+HEADER = (f"{'경로':<14} | {'동시':>4} | {'단계':<6} | {'p50':>9} | {'p95':>9} | {'요청/바로가기':>13} | "
+          f"{'전송':>10} | {'전체 시간':>9} | 아이콘")
+
+
+def print_row(row, baseline=None):
+    line = (f"{row['path']:<14} | {row['concurrency']:>4} | {row['phase']:<6} | {row['p50_ms']:>7.0f}ms | "
+            f"{row['p95_ms']:>7.0f}ms | {row['requests_per_shortcut']:>13.2f} | {row['kib']:>7.0f}KiB | "
+            f"{row['wall_s']:>8.2f}s | {row['icons']}/{row['shortcuts']}")
+    if baseline:
+        line += (f" | p95 {percent_change(baseline['p95_ms'], row['p95_ms'])}, "
+                 f"요청 {percent_change(baseline['requests_per_shortcut'], row['requests_per_shortcut'])}, "
+                 f"시간 {percent_change(baseline['wall_s'], row['wall_s'])}")
+    print(line)
+
+
+def percent_change(before, after):
+    if not before: return "  n/a"
+    return f"{(after - before) / before * 100.0:+.0f}%"
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, path):
+    with open(path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    baseline = {(row["path"], row["concurrency"], row["phase"]): row for row in previous["results"]}
+    print(f"\n{previous.get('commit') or path} 대비:")
+    print(HEADER + " | 변화")
+    for row in results:
+        print_row(row, baseline.get((row["path"], row["concurrency"], row["phase"])))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="로컬 HTTP 서버로 파비콘 가져오기를 측정합니다.")
+    parser.add_argument("--sites", type=int, default=40, help="가짜 도메인 수 (사이트 종류를 돌아가며 배정)")
+    parser.add_argument("--per-site", type=int, default=3, help="도메인당 바로가기 수")
+    parser.add_argument("--concurrency", default="1,4,8,16", help="쉼표로 구분한 동시 실행 수 목록")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="모든 응답에 더하는 지연 (왕복 시간 흉내)")
+    parser.add_argument("--slow", type=float, default=1.0, help="느린 사이트의 추가 지연 (초)")
+    parser.add_argument("--save", help="결과를 JSON으로 저장할 파일")
+    parser.add_argument("--compare", help="다른 커밋에서 --save로 저장한 결과 파일")
+    parser.add_argument("--verbose", action="store_true", help="main의 경고 출력을 숨기지 않음")
+    args = parser.parse_args()
+
+    sites, shortcuts = make_shortcuts(args.sites, args.per_site)
+    server = FaviconBenchServer(sites, args.latency_ms / 1000.0, args.slow)
+    threading.Thread(target=server.serve_forever, name="FaviconBenchServer", daemon=True).start()
+    proxy = f"http://127.0.0.1:{server.server_port}"
+    main.favicon_http.session.trust_env = False # 환경 변수의 프록시 설정 무시
+    main.favicon_http.session.proxies = {"http": proxy, "https": proxy}
+    main.FAVICON_S2_URL = f"http://{S2_HOST}/s2/favicons?sz={{size}}&domain_url={{domain}}"
+    logging.getLogger("urllib3").setLevel(logging.ERROR) # 프록시 연결 풀이 가득 찼다는 경고 숨김
+
+    commit = current_commit()
+    print(f"커밋 {commit or '?'}: 도메인 {len(sites)}개, 바로가기 {len(shortcuts)}개, "
+          f"지연 {args.latency_ms:.0f}ms, 느린 사이트 +{args.slow:.1f}s")
+    print(HEADER)
+    results = bench(server, shortcuts, [int(n) for n in args.concurrency.split(",")], args.verbose)
+    server.shutdown()
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({"commit": commit, "sites": len(sites), "shortcuts": len(shortcuts),
+                       "latency_ms": args.latency_ms, "slow": args.slow, "results": results}, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main_cli()
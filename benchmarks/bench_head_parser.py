@@ -0,0 +1,123 @@
+"""
+파비콘 <link> 탐색 벤치마크입니다.
+
+큰 HTML 페이지에서 아이콘 후보를 찾는 두 방식을 비교합니다.
+  - 이전 방식: 본문 전체를 읽고 BeautifulSoup(html.parser) 트리를 만든 뒤 <link rel=icon> 검색
+  - 스트리밍: main.find_icon_candidates로 </head> 또는 FAVICON_HEAD_MAX_BYTES까지만 파싱
+
+인자로 저장해 둔 HTML 파일을 주면 그 파일들을, 없으면 합성 픽스처(본문이 큰 페이지,
+<head>에 큰 인라인 스크립트가 있는 페이지 등)를 만들어 측정합니다.
+이전 방식 측정에는 beautifulsoup4가 필요합니다.
+
+사용법 (저장소 루트에서):
+    python benchmarks/bench_head_parser.py [HTML 파일 ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import main # noqa: E402
+from bs4 import BeautifulSoup # type: ignore # noqa: E402
+
+REPEAT = 3 # 각 측정은 REPEAT번 중 최솟값을 사용
+PAGE_URL = "https://www.example.com/page/"
+
+HEAD_LINKS = (
+    '<link rel="stylesheet" href="/static/site.css">\n'
+    '<link rel="icon" type="image/png" sizes="16x16" href="/favicon-16.png">\n'
+    '<link rel="icon" type="image/png" sizes="32x32" href="/favicon-32.png">\n'
+    '<link rel="icon" type="image/png" sizes="96x96" href="/favicon-96.png">\n'
+    '<link rel="apple-touch-icon" sizes="180x180" href="/apple-touch-icon.png">\n'
+)
+
+
+def body_block(i):
+    return (f'<div class="card" id="c{i}"><h2>제목 {i}</h2><p>' + "본문 내용 " * 40 +
+            f'</p><a href="/item/{i}"><img src="/img/{i}.jpg" alt="그림 {i}"></a></div>\n')
+
+
+def make_fixtures(directory):
+    """합성 HTML 픽스처를 만들고 [(이름, 경로)]를 반환합니다."""
+    fixtures = {
+        "본문 1MB": ("", 1),
+        "본문 5MB": ("", 5),
+        "head 인라인 스크립트 400KB + 본문 2MB": ("<script>var data = [" + ",".join(str(i) for i in range(70000)) + "];</script>\n", 2),
+    }
+    paths = []
+    for name, (head_extra, megabytes) in fixtures.items():
+        path = os.path.join(directory, f"fixture_{len(paths)}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<!DOCTYPE html>\n<html lang="ko"><head><meta charset="utf-8"><title>테스트</title>\n')
+            f.write(head_extra)
+            f.write(HEAD_LINKS)
+            f.write('</head>\n<body>\n')
+            i = 0
+            while f.tell() < megabytes * 1024 * 1024:
+                f.write(body_block(i))
+                i += 1
+            f.write('</body></html>\n')
+        paths.append((name, path))
+    return paths
+
+
+def file_chunks(path, chunk_size=main.FAVICON_HEAD_CHUNK_SIZE):
+    """requests의 iter_content처럼 파일을 바이트 조각으로 읽습니다."""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk: return
+            yield chunk
+
+
+def old_discovery(path):
+    """이전 fetch_favicon의 방식: 본문 전체 + BeautifulSoup."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    soup = BeautifulSoup(content, 'html.parser')
+    for rel_value in ['icon', 'shortcut icon', 'apple-touch-icon', 'apple-touch-icon-precomposed']:
+        for tag in soup.find_all('link', rel=rel_value, href=True):
+            href = tag.get('href')
+            if href and not href.startswith('data:'):
+                return urljoin(PAGE_URL, href), len(content)
+    return None, len(content)
+
+
+def streaming_discovery(path):
+    candidates, base_href, bytes_read = main.find_icon_candidates(file_chunks(path))
+    best = main.choose_icon_candidate(candidates)
+    base_url = urljoin(PAGE_URL, base_href) if base_href else PAGE_URL
+    return (urljoin(base_url, best["href"]) if best else None), bytes_read
+
+
+def measure(func, path):
+    """(최소 시간 ms, 최대 메모리 KiB, 결과 URL, 읽은 바이트)를 반환합니다."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    url, bytes_read = func(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000.0, peak / 1024.0, url, bytes_read
+
+
+def run(fixtures):
+    print(f"{'픽스처':<36} | {'방식':<8} | {'시간':>10} | {'최대 메모리':>12} | {'읽은 바이트':>12} | 선택된 아이콘")
+    for name, path in fixtures:
+        for label, func in (("이전", old_discovery), ("스트리밍", streaming_discovery)):
+            ms, peak_kib, url, bytes_read = measure(func, path)
+            print(f"{name:<36} | {label:<8} | {ms:>8.1f}ms | {peak_kib:>9.0f}KiB | {bytes_read:>12,} | {url}")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:]:
+        run([(os.path.basename(path), path) for path in sys.argv[1:]])
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            run(make_fixtures(tmp))
@@ -0,0 +1,118 @@
+"""
+바로가기 데이터 로드 시간 벤치마크입니다.
+
+큰 합성 shortcuts.json 파일을 만들어 다음을 비교합니다.
+  - 이전 방식: 저장소 로드(JSON) + 시작할 때마다 모든 항목을 검사하던 무결성 루프
+  - 최초 마이그레이션: schema_version이 없는 파일에 migrate_document 적용 (한 번만 발생)
+  - 이후 시작 (JSON): 마이그레이션된 파일을 저장소로 로드 (항목별 검사 없음)
+  - 이후 시작 (바이너리): shortcuts.bin 스냅샷으로 로드
+
+사용법 (저장소 루트에서):
+    python benchmarks/bench_load.py [항목 수 ...]
+"""
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import main # noqa: E402
+
+REPEAT = 5 # 각 측정은 REPEAT번 중 최솟값을 사용
+
+
+def make_document(count, legacy):
+    """count개의 바로가기를 가진 합성 문서를 만듭니다. legacy이면 schema_version이 없습니다."""
+    categories = [f"카테고리{i}" for i in range(20)]
+    shortcuts = []
+    ranks = main.sequential_ranks(count)
+    for i in range(count):
+        shortcuts.append({
+            "id": str(uuid.uuid4()),
+            "type": "shortcut",
+            "name": f"사이트 {i}",
+            "url": f"https://www.site{i % 3000}.com/page/{i}",
+            "hotkey": "",
+            "icon_path": f"C:\\Users\\user\\favicons\\www.site{i % 3000}.com.png",
+            "priority": float(i + 1) if legacy else ranks[i],
+            "category": categories[i % len(categories)],
+        })
+    document = {"categories_order": categories, "shortcuts": shortcuts, "global_show_window_hotkey": "ctrl+shift+x"}
+    if not legacy:
+        document["schema_version"] = main.SCHEMA_VERSION
+    return document
+
+
+def legacy_integrity_pass(data):
+    """이전 버전의 load_data_and_register_hotkeys가 시작할 때마다 실행하던 무결성 루프입니다."""
+    categories_order = data.get("categories_order", [])
+    needs_save = False
+    max_prio_val = 0.0
+    for idx, sc in enumerate(data.get("shortcuts", [])):
+        if "id" not in sc or not sc["id"]:
+            sc["id"] = str(uuid.uuid4()); needs_save = True
+        if "category" not in sc:
+            sc["category"] = categories_order[0] if categories_order else "일반"; needs_save = True
+        if "priority" not in sc:
+            sc["priority"] = float(idx + 1.0); needs_save = True
+        current_prio = sc.get("priority", 0.0)
+        if not isinstance(current_prio, float):
+            try: sc['priority'] = float(current_prio); needs_save = True
+            except ValueError: sc['priority'] = float(idx + 1.0); needs_save = True
+        max_prio_val = max(max_prio_val, sc.get("priority", 0.0))
+    return needs_save
+
+
+def best_of(func, setup=None):
+    """func를 REPEAT번 실행한 최소 시간(밀리초)을 반환합니다. setup의 반환 값은 측정 없이 func에 전달됩니다."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def bench(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "shortcuts.json")
+        journal_path = os.path.join(tmp, "shortcuts.journal")
+        bin_path = os.path.join(tmp, "shortcuts.bin")
+
+        legacy_document = make_document(count, legacy=True)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(legacy_document, f, ensure_ascii=False, indent=4)
+
+        def before():
+            legacy_integrity_pass(main.ShortcutJournalStore(json_path, journal_path).load())
+
+        before_ms = best_of(before)
+        first_migration_ms = best_of(main.migrate_document, setup=lambda: copy.deepcopy(legacy_document))
+
+        # 마이그레이션된 파일을 저장소를 통해 기록 (JSON + 바이너리 스냅샷)
+        store = main.ShortcutJournalStore(json_path, journal_path, binary_path=bin_path)
+        store.save_snapshot(make_document(count, legacy=False))
+        store.close()
+
+        def after(binary):
+            s = main.ShortcutJournalStore(json_path, journal_path, binary_path=bin_path if binary else None)
+            main.migrate_document(s.load()) # 최신 버전이므로 항목을 검사하지 않음
+
+        after_json_ms = best_of(lambda: after(False))
+        after_bin_ms = best_of(lambda: after(True))
+    return before_ms, first_migration_ms, after_json_ms, after_bin_ms
+
+
+def run(counts):
+    print(f"{'항목 수':>8} | {'이전(로드+루프)':>16} | {'최초 마이그레이션':>16} | {'이후(JSON)':>12} | {'이후(바이너리)':>14}")
+    for count in counts:
+        before_ms, first_ms, after_json_ms, after_bin_ms = bench(count)
+        print(f"{count:>8} | {before_ms:>14.1f}ms | {first_ms:>14.1f}ms | {after_json_ms:>10.1f}ms | {after_bin_ms:>12.1f}ms")
+
+
+if __name__ == '__main__':
+    run([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
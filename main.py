@@ -3,24 +3,43 @@ import os
 import json
 import webbrowser
 import requests # type: ignore
-from bs4 import BeautifulSoup # type: ignore
+from requests.adapters import HTTPAdapter # type: ignore
+from urllib3.util.retry import Retry # type: ignore
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool # type: ignore
+from http.cookiejar import DefaultCookiePolicy
 from urllib.parse import urlparse, urljoin
 import uuid
+import hashlib # 파비콘 내용 해시
+import codecs # 스트리밍 HTML 디코딩
+import mmap # 아이콘 아틀라스 메모리 매핑
 import time # 디바운싱(Debouncing)을 위해 사용
 import subprocess # 데이터 폴더를 열기 위해 사용
+import threading # 백그라운드 저장 및 저널 압축(compaction)을 위해 사용
+import sqlite3 # 선택적 SQLite 저장소
+import bisect # 카테고리별 정렬 목록 유지를 위해 사용
+import heapq
+import struct # 바이너리 스냅샷 헤더/섹션 인코딩
+from array import array # 바이너리 스냅샷의 레코드 인덱스 배열
+import itertools
+import gc
+import csv # 북마크 가져오기 (CSV)
+import queue # 백그라운드 파비콘 가져오기 대기열
+from html.parser import HTMLParser # 북마크 HTML 스트리밍 파싱
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED # 파비콘 동시 새로고침, 출처 경주
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget,
     QPushButton, QLineEdit, QDialog, QInputDialog,
     QDialogButtonBox, QLabel, QSystemTrayIcon, QMenu, QListWidget, QListWidgetItem,
     QMessageBox, QStyle, QTabWidget, QTabBar, QComboBox, QSizePolicy, QListView,
-    QHBoxLayout, QMenuBar
+    QHBoxLayout, QMenuBar, QFileDialog, QProgressDialog
 )
 from PySide6.QtGui import (
     QIcon, QPixmap, QAction, QPainter, QDrag, QMouseEvent, QFocusEvent, QCursor, QFont, QColor,
-    QKeyEvent
+    QKeyEvent, QImage, QImageReader
 )
-from PySide6.QtCore import Qt, QSize, QMimeData, QPoint, Signal, Slot
+from PySide6.QtCore import Qt, QSize, QMimeData, QPoint, Signal, Slot, QTimer, QFileSystemWatcher
 
 try:
     import keyboard # type: ignore
@@ -41,12 +60,88 @@ else:
 
 # 파일들은 기본 디렉토리에 직접 저장됩니다.
 SETTINGS_FILE = os.path.join(BASE_DIR, "shortcuts.json")
+JOURNAL_FILE = os.path.join(BASE_DIR, "shortcuts.journal") # SETTINGS_FILE 스냅샷 이후의 변경 기록
+SQLITE_FILE = os.path.join(BASE_DIR, "shortcuts.db") # SQLite 저장소 사용 시 데이터베이스 파일
+SNAPSHOT_BIN_FILE = os.path.join(BASE_DIR, "shortcuts.bin") # 빠른 시작을 위한 바이너리 스냅샷 (JSON과 함께 기록)
 FAVICON_DIR = os.path.join(BASE_DIR, "favicons")
 # --- 수정 종료 ---
 
+JOURNAL_COMPACT_THRESHOLD_BYTES = 256 * 1024 # 저널이 이 크기를 넘으면 스냅샷으로 압축
+# 저장소 종류: "json"(스냅샷 + 저널, 기본값) 또는 "sqlite". 환경 변수로 변경 가능합니다.
+STORAGE_BACKEND = os.environ.get("SHORTCUTGROUP_STORAGE", "json").strip().lower()
+
 
 DEFAULT_FAVICON_FILENAME = "default_shortcut_icon.png"
 HOTKEY_DEBOUNCE_TIME = 0.3 # 초 단위
+PERSIST_DEBOUNCE_TIME = 0.5 # 초 단위, 이 구간 동안의 변경을 모아 한 번에 저장
+HOT_RELOAD_DELAY_MS = 300 # 외부 변경 감지 후 다시 읽기까지 대기 (연속된 쓰기 이벤트를 하나로 모음)
+# 우선순위는 가변 길이 문자열 순위 키(LexoRank/분수 인덱스 방식)입니다. 문자열 비교 순서가 곧 표시 순서입니다.
+# 키 = 정수부(머리 문자가 자리 수를 나타냄) + 소수부. 예: "a0" < "a0V" < "a1" < "b00"
+RANK_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz" # ASCII 순서 = 값 순서
+RANK_FIRST = "a0" # 빈 목록의 첫 키
+RANK_SMALLEST_INTEGER = "A" + "0" * 26 # 더 줄일 수 없는 정수부
+RANK_REBALANCE_LENGTH = 10 # 키가 이 길이를 넘으면 전체 키를 짧은 연속 키로 다시 매김
+RANK_REBALANCE_DELAY_MS = 2000 # 재배치가 필요해진 뒤 실행하기까지 대기 (연속된 드래그를 하나로 모음)
+RANK_MISSING = "~" # 우선순위가 없는 항목의 정렬 키 (모든 순위 키보다 뒤)
+FAVICON_REFRESH_CONCURRENCY = 8 # 아이콘 전체 새로고침 시 동시에 가져오는 도메인 수
+FAVICON_PER_HOST_CONCURRENCY = 2 # 같은 사이트(상위 두 단계 도메인)에 동시에 보내는 가져오기 수
+FAVICON_HTTP_POOL_CONNECTIONS = 32 # 연결 풀을 유지할 호스트 수
+FAVICON_HTTP_POOL_MAXSIZE = FAVICON_REFRESH_CONCURRENCY + 2 # 호스트당 유지할 연결 수 (새로고침 작업자 + 대기열 작업자)
+FAVICON_HTTP_RETRIES = 2 # 연결 실패/일시적 오류(429, 5xx) 시 재시도 횟수
+FAVICON_HTTP_BACKOFF = 0.3 # 재시도 간격 (초, 재시도마다 두 배)
+FAVICON_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+FAVICON_EXTENSIONS = ['.png', '.ico', '.jpg', '.jpeg', '.gif', '.svg'] # 캐시된 아이콘 파일 확장자
+FAVICON_META_SUFFIX = ".meta.json" # 아이콘 옆의 메타데이터 사이드카 (출처 URL, ETag, Last-Modified, 받은/검증 시각, 해시)
+FAVICON_TTL_SECONDS = 7 * 24 * 3600 # 마지막 검증 후 이 시간이 지난 아이콘은 조건부 요청으로 재검증
+FAVICON_REVALIDATE_DELAY_MS = 30 * 1000 # 시작 후 첫 재검증 검사까지 대기
+FAVICON_REVALIDATE_INTERVAL_MS = 60 * 60 * 1000 # 오래된 아이콘 재검증 검사 주기
+FAVICON_NOT_MODIFIED = "not_modified" # refresh_favicon 결과: 캐시된 아이콘이 그대로임 (304 또는 같은 내용)
+FAVICON_UPDATED = "updated" # 새 아이콘을 받음
+FAVICON_FAILED = "failed" # 가져오지 못함 (기존 아이콘이 있으면 유지)
+FAVICON_CANCELLED = "cancelled" # 취소되어 중단함 (실패로 기록하지 않으며, 호출자는 결과를 반영하지 않음)
+FAVICON_FETCH_BUDGET_SECONDS = 15 # fetch_favicon 한 번(재검증, 모든 출처, SSL 재시도 포함)의 기본 전체 시간 예산
+FAVICON_CANCEL_POLL_SECONDS = 0.1 # 결과를 기다리는 동안 마감/취소를 확인하는 간격
+FAVICON_FAILURES_FILENAME = "favicon_failures.json" # 가져오기에 실패한 도메인 기록 (FAVICON_DIR 안)
+FAVICON_FAILURE_BACKOFF_SECONDS = 15 * 60 # 첫 실패 후 재시도까지 대기 (실패할 때마다 두 배)
+FAVICON_FAILURE_BACKOFF_MAX_SECONDS = 7 * 24 * 3600 # 재시도 대기 상한
+SHORTCUT_ICON_SIZE = 48 # 바로가기 목록의 아이콘 크기 (논리 픽셀)
+FAVICON_RENDER_SUBDIR = "rendered" # 미리 크기를 맞춘 PNG를 두는 FAVICON_DIR 하위 폴더
+FAVICON_RENDER_SIZES = (SHORTCUT_ICON_SIZE,) # UI에서 쓰는 아이콘 크기
+FAVICON_RENDER_SCALES = (1, 2) # 1x와 HiDPI 2x
+FAVICON_NORMALIZE_WORKERS = 2 # 아이콘 변환 작업자 수
+FAVICON_STORE_SUBDIR = "store" # 아이콘 파일을 내용 해시(SHA-256) 이름으로 두는 FAVICON_DIR 하위 폴더
+FAVICON_GC_DELAY_MS = 10 * 1000 # 아이콘 참조가 사라진 뒤(삭제, URL 변경, 새 아이콘) 정리하기까지 대기
+FAVICON_GC_STARTUP_DELAY_MS = 2 * 60 * 1000 # 시작 후 첫 정리까지 대기
+FAVICON_GC_GRACE_SECONDS = 10 * 60 # 이보다 최근에 저장/조회된 아이콘은 참조가 없어도 지우지 않음 (결과가 아직 기록에 반영되지 않았을 수 있음)
+FAVICON_CACHE_MAX_BYTES = 16 * 1024 * 1024 # FAVICON_DIR 전체(원본, 미리 만든 PNG, 아틀라스, 메타데이터) 크기 상한
+FAVICON_CACHE_MAX_FILES = 1000 # 보관할 원본 아이콘 파일 수 상한
+FAVICON_USAGE_TOUCH_SECONDS = 60 * 60 # 아이콘을 쓸 때 마지막 사용 시각(atime)을 기록하는 최소 간격
+FAVICON_MAINTENANCE_INTERVAL_MS = 6 * 60 * 60 * 1000 # 아이콘 폴더 정리(용량 상한 적용) 주기
+FAVICON_ATLAS_INDEX_FILENAME = "atlas.json" # 아이콘 아틀라스 인덱스 (rendered 폴더 안)
+FAVICON_ATLAS_DATA_PREFIX = "atlas." # 아틀라스 픽셀 파일 이름 접두사 (atlas.<세대>.bin)
+FAVICON_ATLAS_VERSION = 1
+FAVICON_ATLAS_REBUILD_DELAY_MS = 3000 # 아이콘 변경이 잠잠해진 뒤 아틀라스를 다시 만들기까지 대기
+FAVICON_SOURCES = ("s2", "page", "ico") # 동시에 시도하는 아이콘 출처: 구글 S2, 페이지의 <link>, /favicon.ico (기록이 없을 때의 우선순위)
+FAVICON_S2_URL = "https://www.google.com/s2/favicons?sz={size}&domain_url={domain}" # 구글 S2 파비콘 서비스 주소 (벤치마크는 로컬 서버로 바꿈)
+FAVICON_S2_MIN_BYTES = 100 # S2 응답이 이 크기 이하이면 비어있거나 오류 이미지로 봄
+FAVICON_SOURCE_WORKERS = (FAVICON_REFRESH_CONCURRENCY + 2) * len(FAVICON_SOURCES) # 출처 요청 작업자 수 (새로고침 + 대기열 작업자가 모두 경주해도 충분)
+FAVICON_SOURCE_STAGGER_MS = 400 # 기록상 가장 빠른 출처를 먼저 시작하고, 이 시간 안에 끝나지 않으면 다음 출처 시작
+FAVICON_SOURCE_SKIP_FAILURES = 3 # 도메인에서 연속으로 이만큼 실패한 출처는 다른 출처가 모두 실패했을 때만 시도
+FAVICON_SOURCE_STATS_FILENAME = "favicon_sources.json" # 도메인별 출처 성적 기록 (FAVICON_DIR 안)
+FAVICON_SOURCE_STATS_SAVE_SECONDS = 30 # 출처 성적을 파일에 쓰는 최소 간격 (종료 시에도 기록)
+FAVICON_SOURCE_STATS_MAX_AGE_SECONDS = 90 * 24 * 3600 # 이 기간 동안 가져오지 않은 도메인의 기록은 버림
+FAVICON_HEAD_MAX_BYTES = 512 * 1024 # 아이콘 <link>를 찾을 때 페이지에서 읽는 최대 바이트 (보통 </head>에서 먼저 멈춤)
+FAVICON_HEAD_CHUNK_SIZE = 16 * 1024 # 페이지 스트리밍 읽기 단위
+FAVICON_LINK_RELS = ("icon", "apple-touch-icon", "apple-touch-icon-precomposed") # 아이콘 <link rel> 값 (선호 순)
+FAVICON_TARGET_SIZE = 64 # 여러 크기 중 고를 때의 목표 크기 (S2 요청 크기와 같음)
+IMPORT_BATCH_SIZE = 500 # 북마크 가져오기 시 한 번에 인덱스에 넣는 항목 수
+IMPORT_DEFAULT_CATEGORY = "가져온 북마크" # 폴더가 없는 북마크의 카테고리
+# 브라우저가 만드는 최상위 폴더 (카테고리로 쓰지 않음)
+BOOKMARK_ROOT_FOLDERS = {
+    "bookmarks bar", "bookmarks toolbar", "bookmarks menu", "other bookmarks", "mobile bookmarks",
+    "bookmark_bar", "other", "synced", "toolbar", "menu", "unfiled", "mobile",
+    "북마크바", "북마크 바", "북마크 도구 모음", "북마크 메뉴", "기타 북마크", "모바일 북마크",
+}
 
 def get_favicon_path(filename):
     """데이터 디렉토리에 있는 파비콘 파일의 전체 경로를 가져오는 헬퍼 함수입니다."""
@@ -59,151 +154,3091 @@ ALL_CATEGORY_NAME = "전체"
 ADD_CATEGORY_TAB_TEXT = " + "
 MIME_TYPE_SHORTCUT_ID = "application/x-shortcut-id"
 
-def fetch_favicon(url):
+def _counting_pool_classes(on_new_connection):
+    """새 연결을 만들 때마다 on_new_connection()을 호출하는 urllib3 연결 풀 클래스를 반환합니다."""
+    class CountingHTTPConnectionPool(HTTPConnectionPool):
+        def _new_conn(self):
+            on_new_connection()
+            return super()._new_conn()
+    class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+        def _new_conn(self):
+            on_new_connection()
+            return super()._new_conn()
+    return {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """연결 재사용 통계를 위해 새 연결 수를 세는 HTTPAdapter입니다."""
+    def __init__(self, on_new_connection, **kwargs):
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _counting_pool_classes(self._on_new_connection)
+
+class FaviconHttpClient:
+    """
+    모든 파비콘 요청이 함께 쓰는 HTTP 세션입니다. 호스트별 연결 풀(keep-alive)을 유지하므로
+    같은 호스트(특히 구글 S2)로 가는 요청은 TCP/TLS 연결을 다시 맺지 않습니다.
+    쿠키를 저장하지 않아 세션 상태가 요청 중에 바뀌지 않으므로 여러 스레드에서 동시에 사용할 수 있습니다
+    (연결 풀 자체는 urllib3가 스레드 안전하게 관리).
+    """
+    def __init__(self, pool_connections=FAVICON_HTTP_POOL_CONNECTIONS, pool_maxsize=FAVICON_HTTP_POOL_MAXSIZE,
+                 retries=FAVICON_HTTP_RETRIES, backoff_factor=FAVICON_HTTP_BACKOFF):
+        self._lock = threading.Lock()
+        self._responses = 0
+        self._new_connections = 0
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = FAVICON_USER_AGENT
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[])) # 쿠키 저장 안 함
+        self.session.hooks["response"].append(self._count_response) # 리디렉션 응답도 하나씩 셈
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff_factor,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"GET", "HEAD"}),
+                      raise_on_status=False) # 재시도 후에도 실패하면 마지막 응답을 그대로 반환
+        adapter = _CountingHTTPAdapter(self._count_new_connection, pool_connections=pool_connections,
+                                       pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.session.head(url, **kwargs)
+
+    def stats(self):
+        """{"requests": 응답 수, "new_connections": 새로 맺은 연결 수, "reused_connections": 재사용 횟수}를 반환합니다."""
+        with self._lock:
+            return {"requests": self._responses, "new_connections": self._new_connections,
+                    "reused_connections": max(0, self._responses - self._new_connections)}
+
+    def close(self):
+        self.session.close()
+
+    def _count_response(self, response, *args, **kwargs):
+        with self._lock:
+            self._responses += 1
+
+    def _count_new_connection(self):
+        with self._lock:
+            self._new_connections += 1
+
+favicon_http = FaviconHttpClient() # 모든 파비콘 요청이 공유하는 세션
+
+def favicon_filename_base(domain):
+    """도메인으로부터 아이콘 파일 이름에 쓸 안전한 기반 이름을 만듭니다."""
+    return "".join(c if c.isalnum() or c in ['.', '-'] else '_' for c in domain)
+
+class FaviconDirectoryIndex:
+    """
+    FAVICON_DIR의 아이콘 파일 목록(파일 이름 -> 크기, 수정 시각)을 메모리에 둡니다.
+    처음 조회할 때 폴더를 한 번만 읽고(os.scandir), 이후의 존재 확인/조회는 파일 시스템에 묻지 않습니다.
+    이 앱이 쓰거나 지운 파일은 note_written/note_removed로 반영하고, 외부 프로그램의 변경은
+    refresh_if_changed()(폴더 수정 시각 비교)나 invalidate()로 다음 조회 때 다시 읽습니다.
+    FAVICON_DIR 밖의 경로와 아이콘이 아닌 파일은 그대로 파일 시스템에 묻습니다.
+    """
+    def __init__(self, directory=None, subdirectory=None):
+        self._directory = directory # None이면 사용할 때의 FAVICON_DIR (subdirectory가 있으면 그 하위 폴더)
+        self._subdirectory = subdirectory
+        self._lock = threading.RLock()
+        self._entries = None # {파일 이름: (크기, 수정 시각)}, None이면 다음 조회 때 다시 읽음
+        self._by_base = {} # {기반 이름: {확장자}}
+        self._scanned_dir = None
+        self._dir_mtime = None
+        self.scans = 0 # 폴더를 읽은 횟수
+
+    @property
+    def directory(self):
+        directory = self._directory or FAVICON_DIR
+        return os.path.join(directory, self._subdirectory) if self._subdirectory else directory
+
+    def find(self, filename_base):
+        """기반 이름의 아이콘 파일 경로를 FAVICON_EXTENSIONS 순서로 찾습니다. 없으면 None."""
+        with self._lock:
+            self._ensure_locked()
+            extensions = self._by_base.get(filename_base)
+            if not extensions: return None
+            for ext in FAVICON_EXTENSIONS:
+                if ext in extensions:
+                    return os.path.join(self._scanned_dir, filename_base + ext)
+        return None
+
+    def exists(self, path):
+        name = self._indexed_name(path)
+        if name is None:
+            return os.path.exists(path)
+        with self._lock:
+            self._ensure_locked()
+            return name in self._entries
+
+    def stat(self, path):
+        """(크기, 수정 시각)을 반환합니다. 파일이 없으면 None."""
+        name = self._indexed_name(path)
+        if name is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            return st.st_size, st.st_mtime
+        with self._lock:
+            self._ensure_locked()
+            return self._entries.get(name)
+
+    def entries(self):
+        """{파일 이름: (크기, 수정 시각)}의 사본을 반환합니다."""
+        with self._lock:
+            self._ensure_locked()
+            return dict(self._entries)
+
+    def note_written(self, path):
+        """이 앱이 path를 만들거나 바꿨음을 반영합니다 (아이콘이 아닌 파일이면 폴더 수정 시각만 갱신)."""
+        self._note(path, removed=False)
+
+    def note_removed(self, path):
+        """이 앱이 path를 지웠음을 반영합니다."""
+        self._note(path, removed=True)
+
+    def refresh_if_changed(self):
+        """폴더 수정 시각이 마지막으로 알던 값과 다르면(외부 변경) 다음 조회 때 다시 읽도록 합니다. 다시 읽게 되면 True."""
+        with self._lock:
+            if self._entries is None: return False
+            if self._directory_mtime() == self._dir_mtime: return False
+            self._entries = None
+            return True
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = None
+
+    def _note(self, path, removed):
+        with self._lock:
+            if self._entries is None or os.path.normcase(os.path.dirname(os.path.abspath(path))) != os.path.normcase(self._scanned_dir):
+                return # 아직 읽지 않았거나 다른 폴더: 다음 조회 때 읽으면 반영됨
+            name = os.path.basename(path)
+            base, ext = os.path.splitext(name)
+            if ext.lower() in FAVICON_EXTENSIONS:
+                st = None
+                if not removed:
+                    try: st = os.stat(path)
+                    except OSError: pass
+                if st is None:
+                    self._entries.pop(name, None)
+                    extensions = self._by_base.get(base)
+                    if extensions:
+                        extensions.discard(ext.lower())
+                        if not extensions: del self._by_base[base]
+                else:
+                    self._entries[name] = (st.st_size, st.st_mtime)
+                    self._by_base.setdefault(base, set()).add(ext.lower())
+            self._dir_mtime = self._directory_mtime() # 자신의 변경은 외부 변경으로 보지 않음
+
+    def _indexed_name(self, path):
+        """path가 색인 대상(폴더 안의 아이콘 파일)이면 파일 이름을, 아니면 None을 반환합니다."""
+        if not path: return None
+        name = os.path.basename(path)
+        if os.path.splitext(name)[1].lower() not in FAVICON_EXTENSIONS:
+            return None
+        if os.path.normcase(os.path.dirname(os.path.abspath(path))) != os.path.normcase(os.path.abspath(self.directory)):
+            return None
+        return name
+
+    def _directory_mtime(self):
+        try:
+            return os.stat(self._scanned_dir).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def _ensure_locked(self):
+        directory = os.path.abspath(self.directory)
+        if self._entries is not None and self._scanned_dir == directory:
+            return
+        self._scanned_dir = directory
+        self._dir_mtime = self._directory_mtime() # 읽기 전에 기록: 읽는 도중의 변경은 다음 확인 때 감지
+        entries, by_base = {}, {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    base, ext = os.path.splitext(entry.name)
+                    if ext.lower() not in FAVICON_EXTENSIONS: continue
+                    try:
+                        if not entry.is_file(): continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries[entry.name] = (st.st_size, st.st_mtime)
+                    by_base.setdefault(base, set()).add(ext.lower())
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"경고 (FaviconDirectoryIndex): {directory} 읽기 실패: {e}")
+        self._entries, self._by_base = entries, by_base
+        self.scans += 1
+
+favicon_index = FaviconDirectoryIndex() # FAVICON_DIR 파일 목록 캐시
+favicon_render_index = FaviconDirectoryIndex(subdirectory=FAVICON_RENDER_SUBDIR) # 미리 만든 PNG 목록 캐시
+
+class FaviconContentStore:
+    """
+    아이콘 파일을 내용의 SHA-256 해시 이름(store/<해시><확장자>)으로 저장합니다.
+    같은 내용이면 도메인이 달라도(CDN의 기본 아이콘 등) 파일 하나를 함께 쓰고, 도메인 -> 아이콘 연결은
+    도메인의 메타데이터 사이드카("file")가 가집니다. 바로가기는 이 경로를 icon_path로 참조하며
+    (경로별 참조 수는 ShortcutIndex.icon_refs), 참조가 없어진 파일은 용량 상한을 넘을 때
+    collect_garbage()가 오래 쓰지 않은 것부터 백그라운드에서 지웁니다.
+    """
+    def __init__(self):
+        self.index = FaviconDirectoryIndex(subdirectory=FAVICON_STORE_SUBDIR) # 저장소 파일 목록 캐시
+        self._lock = threading.Lock() # put()/claim()과 정리의 삭제가 겹치지 않도록
+        self._recent = {} # {정규화된 경로: 시각} 최근에 저장/조회되어 아직 기록에 반영되지 않았을 수 있는 파일
+        self._touched = {} # {경로: 시각} 마지막으로 사용 시각을 기록한 때 (FAVICON_USAGE_TOUCH_SECONDS마다 한 번만 기록)
+        self.collected = 0 # 지금까지 정리한 파일 수
+
+    @property
+    def directory(self):
+        return self.index.directory
+
+    def blob_path(self, digest, ext):
+        return os.path.join(self.directory, digest + ext)
+
+    def temp_path(self):
+        """
+        받는 중인 아이콘을 쓸 새 임시 파일 경로입니다 (저장소와 같은 폴더라서 put()의 이름 바꾸기가 원자적).
+        다운로드마다 이름이 다릅니다: 출처 작업자가 받은 파일은 다른 스레드가 나중에 커밋하므로
+        그 사이에 같은 작업자가 다음 다운로드를 시작해도 덮어쓰지 않아야 합니다.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"incoming.{uuid.uuid4().hex}.part")
+
+    def put(self, temp_path, digest, ext):
+        """임시 파일을 내용 주소 경로로 옮기고 그 경로를 반환합니다. 같은 내용이 이미 있으면 임시 파일만 지웁니다."""
+        path = self.blob_path(digest, ext)
+        with self._lock:
+            if self.index.exists(path):
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, path)
+                self.index.note_written(path)
+            self._recent[os.path.normcase(path)] = time.time()
+        self.note_used(path)
+        return path
+
+    def claim(self, path):
+        """캐시된 아이콘 경로를 돌려주기 전에 호출합니다. 파일이 있으면 잠시 정리 대상에서 빼고 True."""
+        with self._lock:
+            if not favicon_file_index(path).exists(path): return False
+            self._recent[os.path.normcase(path)] = time.time()
+        self.note_used(path)
+        return True
+
+    def note_used(self, path, now=None):
+        """
+        아이콘을 표시하거나 돌려줄 때 호출합니다. 파일의 접근 시각(atime)을 지금으로 바꿔 정리 순서(LRU)에 씁니다.
+        수정 시각은 그대로 두므로(미리 만든 PNG의 최신 여부 비교용) 다시 변환하지 않으며,
+        파일 쓰기를 줄이도록 같은 파일은 FAVICON_USAGE_TOUCH_SECONDS에 한 번만 기록합니다.
+        """
+        now = now or time.time()
+        if now - self._touched.get(path, 0) < FAVICON_USAGE_TOUCH_SECONDS: return
+        self._touched[path] = now
+        try:
+            os.utime(path, (now, os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    def collect_garbage(self, referenced, max_bytes=None, max_files=None, grace=None, now=None):
+        """
+        아이콘 폴더가 용량 상한(기본 FAVICON_CACHE_MAX_BYTES 바이트, 원본 FAVICON_CACHE_MAX_FILES개)을 넘으면
+        바로가기가 참조하지 않는 아이콘을 마지막 사용 시각(note_used, 없으면 받은 시각)이 오래된 것부터 지웁니다
+        (작업자 스레드에서 실행 가능). referenced는 바로가기 기록이 참조하는 아이콘 경로들이며 절대 지우지 않습니다.
+        아이콘을 지울 때 그 미리 만든 PNG와 그 아이콘을 가리키는 도메인 메타데이터도 함께 지우므로 그 도메인은
+        다음에 쓸 때 다시 받습니다. 이전 방식(도메인 이름)으로 FAVICON_DIR에 저장된 아이콘도 대상입니다 (DEFAULT_FAVICON 제외).
+        상한과 관계없이 원본이 없는 PNG(DEFAULT_FAVICON의 PNG 제외), 중단된 다운로드(.part/.tmp),
+        가리키는 아이콘이 없는 메타데이터는 지웁니다.
+        grace(기본 FAVICON_GC_GRACE_SECONDS)초 안에 저장/조회/기록된 파일은 남깁니다. 반환 값: (지운 파일 수, 바이트)
+        """
+        if max_bytes is None: max_bytes = FAVICON_CACHE_MAX_BYTES
+        if max_files is None: max_files = FAVICON_CACHE_MAX_FILES
+        if grace is None: grace = FAVICON_GC_GRACE_SECONDS
+        now = now or time.time()
+        referenced = {os.path.normcase(os.path.abspath(p)) for p in referenced if p}
+        with self._lock:
+            self._recent = {path: at for path, at in self._recent.items() if now - at < grace}
+        removed, freed = 0, 0
+
+        def remove_file(path, size, index=None):
+            nonlocal removed, freed
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"경고 (FaviconContentStore): {path} 제거 실패: {e}")
+                return False
+            if index is not None: index.note_removed(path)
+            removed += 1
+            freed += size
+            return True
+
+        # 폴더별 파일 목록 (크기, 사용 시각, 수정 시각)
+        files = {}
+        for directory in (FAVICON_DIR, self.directory, get_rendered_favicon_dir()):
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if not entry.is_file(): continue
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        files[entry.path] = (st.st_size, max(st.st_atime, st.st_mtime), st.st_mtime)
+            except OSError:
+                continue
+
+        # 중단된 다운로드/쓰기의 임시 파일
+        for path, (size, _, mtime) in list(files.items()):
+            if path.endswith((".part", ".tmp")) and now - mtime >= grace and remove_file(path, size):
+                del files[path]
+
+        # 원본 아이콘 (저장소 + 이전 방식) 과 그 미리 만든 PNG
+        icons = {}
+        for index in (self.index, favicon_index):
+            for name in index.entries():
+                if index is favicon_index and name == DEFAULT_FAVICON_FILENAME: continue
+                path = os.path.join(index.directory, name)
+                if path in files: icons[path] = index
+        renders_of = {}
+        rendered_names = {}
+        for icon_path in icons:
+            for size in FAVICON_RENDER_SIZES:
+                for scale in FAVICON_RENDER_SCALES:
+                    rendered = rendered_favicon_path(icon_path, size, scale)
+                    rendered_names[os.path.basename(rendered)] = icon_path
+                    if rendered in files: renders_of.setdefault(icon_path, []).append(rendered)
+        for size in FAVICON_RENDER_SIZES: # 기본 아이콘(실패한 바로가기가 씀)의 PNG는 정리 대상이 아님
+            for scale in FAVICON_RENDER_SCALES:
+                rendered_names[os.path.basename(rendered_favicon_path(DEFAULT_FAVICON, size, scale))] = DEFAULT_FAVICON
+        render_dir = os.path.normcase(os.path.abspath(get_rendered_favicon_dir()))
+        for path, (size, _, mtime) in list(files.items()):
+            name = os.path.basename(path)
+            if (os.path.normcase(os.path.dirname(os.path.abspath(path))) == render_dir and name.endswith(".png")
+                    and name not in rendered_names and now - mtime >= grace): # 원본이 없는 PNG
+                if remove_file(path, size, favicon_render_index): del files[path]
+
+        # 도메인 메타데이터: 가리키는 아이콘별로 모음
+        icon_keys = {os.path.normcase(os.path.abspath(path)): path for path in icons}
+        metas_of = {}
+        for path, (size, _, mtime) in list(files.items()):
+            name = os.path.basename(path)
+            if not name.endswith(FAVICON_META_SUFFIX): continue
+            filename_base = name[:-len(FAVICON_META_SUFFIX)]
+            meta = read_favicon_meta(filename_base)
+            target = get_favicon_path(meta["file"]) if meta and meta.get("file") else favicon_index.find(filename_base)
+            target_key = os.path.normcase(os.path.abspath(target)) if target else None
+            if target_key in icon_keys:
+                metas_of.setdefault(icon_keys[target_key], []).append(path)
+            elif now - mtime >= grace: # 가리키는 아이콘이 없음
+                if remove_file(path, size, favicon_index): del files[path]
+
+        total_bytes = sum(size for size, _, _ in files.values())
+        icon_count = len(icons)
+        if total_bytes <= max_bytes and icon_count <= max_files:
+            self.collected += removed
+            return removed, freed
+
+        # 상한을 넘으면 참조되지 않는 아이콘을 마지막 사용 시각이 오래된 것부터 지움
+        candidates = []
+        for key, icon_path in icon_keys.items():
+            _, last_used, mtime = files[icon_path]
+            if key in referenced or now - mtime < grace: continue
+            candidates.append((last_used, icon_path, key))
+        candidates.sort()
+        for _, icon_path, key in candidates:
+            if total_bytes <= max_bytes and icon_count <= max_files: break
+            with self._lock:
+                if key in self._recent: continue # 정리하는 동안 다시 저장/조회됨
+                if not remove_file(icon_path, files[icon_path][0], icons[icon_path]): continue
+            total_bytes -= files[icon_path][0]
+            icon_count -= 1
+            for paths, index in ((renders_of.get(icon_path, []), favicon_render_index), (metas_of.get(icon_path, []), favicon_index)):
+                for path in paths:
+                    if remove_file(path, files[path][0], index): total_bytes -= files[path][0]
+        if total_bytes > max_bytes or icon_count > max_files:
+            print(f"경고 (FaviconContentStore): 바로가기가 쓰는 아이콘만으로 용량 상한을 넘습니다 "
+                  f"({total_bytes / 1024:.0f}KiB, {icon_count}개)")
+        self.collected += removed
+        return removed, freed
+
+favicon_store = FaviconContentStore() # 내용 주소 아이콘 저장소
+
+def favicon_file_index(path):
+    """아이콘 경로가 속한 폴더의 파일 목록 캐시를 반환합니다 (저장소 파일이면 favicon_store.index)."""
+    if path and os.path.normcase(os.path.dirname(os.path.abspath(path))) == os.path.normcase(os.path.abspath(favicon_store.directory)):
+        return favicon_store.index
+    return favicon_index
+
+def find_cached_favicon(filename_base, meta=None):
+    """
+    도메인의 캐시된 아이콘 경로를 반환합니다. 메타데이터(meta, 없으면 읽음)가 가리키는 저장소 파일이
+    우선이고, 없으면 이전 방식의 도메인 이름 파일을 찾습니다 (메모리 색인 조회). 없으면 None.
+    """
+    if meta is None: meta = read_favicon_meta(filename_base)
+    if meta and meta.get("file"):
+        path = get_favicon_path(meta["file"])
+        if favicon_store.claim(path): return path
+    path = favicon_index.find(filename_base)
+    return path if path and favicon_store.claim(path) else None
+
+def favicon_meta_path(filename_base):
+    """도메인의 메타데이터 사이드카 경로입니다."""
+    return get_favicon_path(filename_base + FAVICON_META_SUFFIX)
+
+def read_favicon_meta(filename_base):
+    """도메인의 아이콘 메타데이터를 읽습니다. 없거나 손상되었으면 None."""
+    try:
+        with open(favicon_meta_path(filename_base), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"경고 (파비콘 메타데이터): {favicon_meta_path(filename_base)} 읽기 실패: {e}")
+        return None
+    return meta if isinstance(meta, dict) else None
+
+def write_favicon_meta(filename_base, meta):
+    """도메인의 아이콘 메타데이터를 임시 파일에 쓴 뒤 교체합니다 (동시에 읽어도 깨진 파일을 보지 않음)."""
+    meta_path = favicon_meta_path(filename_base)
+    temp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_path, meta_path)
+    except OSError as e:
+        print(f"경고 (파비콘 메타데이터): {meta_path} 쓰기 실패: {e}")
+        try: os.remove(temp_path)
+        except OSError: pass
+    favicon_index.note_written(meta_path)
+
+def remove_favicon_meta(filename_base):
+    """도메인의 메타데이터 사이드카를 지웁니다 (없으면 무시)."""
+    try: os.remove(favicon_meta_path(filename_base))
+    except OSError: return
+    favicon_index.note_removed(favicon_meta_path(filename_base))
+
+def favicon_meta_expired(icon_path, meta, ttl=None):
+    """마지막 검증 후 ttl초(기본 FAVICON_TTL_SECONDS)가 지났는지 반환합니다. 메타데이터가 없는 이전 캐시는 파일 수정 시각을 기준으로 합니다."""
+    if ttl is None: ttl = FAVICON_TTL_SECONDS
+    checked_at = meta.get("checked_at") if meta else None
+    if not isinstance(checked_at, (int, float)):
+        file_stat = favicon_file_index(icon_path).stat(icon_path)
+        if file_stat is None: return True
+        checked_at = file_stat[1]
+    return time.time() - checked_at >= ttl
+
+def favicon_needs_revalidation(url):
+    """URL의 캐시된 아이콘이 있고 TTL이 지났으면 True (캐시가 없으면 재검증할 것도 없음)."""
+    domain = favicon_cache_domain(url)
+    if not domain: return False
+    meta = read_favicon_meta(favicon_filename_base(domain))
+    cached_path = find_cached_favicon(favicon_filename_base(domain), meta)
+    return cached_path is not None and favicon_meta_expired(cached_path, meta)
+
+def _favicon_extension(content_type):
+    """응답의 Content-Type에 맞는 아이콘 파일 확장자를 반환합니다."""
+    content_type = content_type.lower()
+    if 'png' in content_type: return '.png'
+    if 'jpeg' in content_type or 'jpg' in content_type: return '.jpg'
+    if 'gif' in content_type: return '.gif'
+    if 'svg' in content_type: return '.svg'
+    return '.ico' # 기본 확장자 (필요 시 다른 타입 추가)
+
+class _IconLinkParser(HTMLParser):
+    """
+    HTML <head>의 아이콘 <link>와 <base href>를 읽습니다. 후보는 self.candidates에 쌓입니다.
+    </head> 또는 <body>를 만나면 done이 되어 이후 태그는 무시합니다.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.candidates = [] # [{"href", "rel", "sizes", "type", "size"}] (문서 순서)
+        self.base_href = None
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done: return
+        if tag == "body":
+            self.done = True
+        elif tag == "base" and self.base_href is None:
+            self.base_href = dict(attrs).get("href")
+        elif tag == "link":
+            attrs = dict(attrs)
+            href = (attrs.get("href") or "").strip()
+            if not href or href.lower().startswith("data:"): return # 데이터 URI는 무시
+            rel_tokens = (attrs.get("rel") or "").lower().split()
+            rel = next((r for r in FAVICON_LINK_RELS if r in rel_tokens), None) # "shortcut icon"도 'icon'으로 처리
+            if rel is None: return
+            sizes = (attrs.get("sizes") or "").strip()
+            self.candidates.append({"href": href, "rel": rel, "sizes": sizes,
+                                    "type": (attrs.get("type") or "").strip().lower(),
+                                    "size": _icon_link_size(sizes)})
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.done = True
+
+def _icon_link_size(sizes):
+    """<link sizes> 값("16x16 32x32", "any")에서 가장 큰 변의 길이를 반환합니다. "any"(벡터)는 무한대, 없으면 None."""
+    largest = None
+    for token in sizes.lower().split():
+        if token == "any":
+            return float('inf')
+        width, _, height = token.partition("x")
+        if width.isdigit() and height.isdigit():
+            largest = max(largest or 0, int(width), int(height))
+    return largest
+
+def find_icon_candidates(chunks, encoding='utf-8', max_bytes=None):
+    """
+    HTML 바이트 조각을 차례로 파싱해 아이콘 후보를 찾습니다. </head>(또는 <body>)를 만나거나
+    max_bytes(기본 FAVICON_HEAD_MAX_BYTES)를 읽으면 나머지는 읽지 않습니다.
+    반환 값: (후보 목록, <base href> 또는 None, 읽은 바이트 수)
+    """
+    if max_bytes is None: max_bytes = FAVICON_HEAD_MAX_BYTES
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError: # 알 수 없는 charset
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parser = _IconLinkParser()
+    bytes_read = 0
+    for chunk in chunks:
+        chunk = chunk[:max_bytes - bytes_read]
+        bytes_read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or bytes_read >= max_bytes:
+            break
+    return parser.candidates, parser.base_href, bytes_read
+
+def choose_icon_candidate(candidates):
+    """
+    아이콘 후보 중 하나를 고릅니다. rel 순서(FAVICON_LINK_RELS)가 우선이고, 같은 rel 안에서는
+    FAVICON_TARGET_SIZE 이상인 가장 작은 크기 > 크기 미지정 > 목표보다 작은 것 중 가장 큰 크기 순입니다.
+    같은 조건이면 문서 순서를 따릅니다. 후보가 없으면 None.
+    """
+    def preference(candidate):
+        size = candidate["size"]
+        if size is None: fit = (1, 0)
+        elif size >= FAVICON_TARGET_SIZE: fit = (0, size)
+        else: fit = (2, -size)
+        return FAVICON_LINK_RELS.index(candidate["rel"]), fit
+    return min(candidates, key=preference, default=None) # min은 같은 키 중 첫 항목을 반환
+
+_IMAGE_SIGNATURES = (b"\x89PNG\r\n\x1a\n", b"\x00\x00\x01\x00", b"\x00\x00\x02\x00", b"GIF87a", b"GIF89a", b"\xff\xd8\xff", b"BM")
+
+def _looks_like_image(head):
+    """본문 앞부분이 아이콘으로 쓸 수 있는 이미지인지 확인합니다 (오류 페이지를 image/x-icon으로 주는 서버 대비)."""
+    if head.startswith(_IMAGE_SIGNATURES): return True
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP": return True
+    text = head.lstrip().lower()
+    return text.startswith((b"<svg", b"<?xml", b"<!doctype svg")) and b"<svg" in text
+
+def _download_favicon(response, min_size=0, budget=None):
+    """
+    아이콘 응답 본문을 저장소의 임시 파일로 받으면서 SHA-256을 계산합니다. 반환 값: (임시 경로, 해시, 크기)
+    본문이 min_size 바이트 이하이거나 이미지가 아니면 ValueError, 받는 도중 budget(FaviconBudget)의 마감이 지나거나
+    취소되면 FaviconFetchCancelled입니다 (두 경우 모두 임시 파일은 지움).
+    """
+    temp_path = favicon_store.temp_path()
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in response.iter_content(8192): # 스트림 다운로드
+                if budget is not None: budget.check()
+                if len(head) < 1024: head += chunk[:1024]
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        if size <= min_size or not _looks_like_image(head):
+            raise ValueError(f"이미지가 아닌 응답 ({size}바이트, {response.headers.get('content-type', '')})")
+    except (OSError, ValueError, FaviconFetchCancelled):
+        try: os.remove(temp_path)
+        except OSError: pass
+        raise
+    return temp_path, digest.hexdigest(), size
+
+def _discard_favicon_download(candidate):
+    """경주에서 쓰이지 않은 출처 결과의 임시 파일을 지웁니다."""
+    if candidate and candidate.get("download"):
+        try: os.remove(candidate["download"][0])
+        except OSError: pass
+
+def _commit_favicon(filename_base, download, ext, headers, page_url, source_url, via):
+    """
+    받은 임시 파일을 저장소(favicon_store)의 내용 주소 경로로 옮기고, 도메인의 메타데이터(출처 URL, ETag,
+    Last-Modified, 받은 시각, 해시, 저장소 파일)를 기록합니다. 같은 내용의 파일이 이미 있으면(다른 도메인 포함)
+    그 파일을 함께 씁니다. 이전 아이콘 파일은 지우지 않습니다 (다른 바로가기가 아직 참조할 수 있음).
+    반환 값: (경로, 상태) - 내용이 이전과 같으면 FAVICON_NOT_MODIFIED, 다르면 FAVICON_UPDATED.
+    """
+    temp_path, digest, size = download
+    try:
+        icon_path = favicon_store.put(temp_path, digest, ext)
+    except OSError:
+        try: os.remove(temp_path)
+        except OSError: pass
+        raise
+
+    stored_file = os.path.join(FAVICON_STORE_SUBDIR, os.path.basename(icon_path)) # FAVICON_DIR 기준 상대 경로
+    previous = read_favicon_meta(filename_base)
+    unchanged = previous is not None and previous.get("file") == stored_file
+    now = time.time()
+    write_favicon_meta(filename_base, {
+        "url": page_url,
+        "source_url": source_url,
+        "via": via, # FAVICON_SOURCES 중 하나 (이전 기록은 "site")
+        "etag": headers.get('ETag'),
+        "last_modified": headers.get('Last-Modified'),
+        "fetched_at": previous.get("fetched_at", now) if unchanged else now,
+        "checked_at": now,
+        "sha256": digest,
+        "size": size,
+        "file": stored_file,
+    })
+    return icon_path, (FAVICON_NOT_MODIFIED if unchanged else FAVICON_UPDATED)
+
+def _store_favicon_response(response, filename_base, ext, page_url, source_url, via, min_size=0, budget=None):
+    """
+    아이콘 응답을 받아 저장소에 저장합니다 (_download_favicon + _commit_favicon). 반환 값: (경로, 상태)
+    본문이 min_size 바이트 이하이거나 이미지가 아니면 아무것도 바꾸지 않고 None을 반환합니다.
+    """
+    try:
+        download = _download_favicon(response, min_size, budget)
+    except ValueError:
+        return None
+    return _commit_favicon(filename_base, download, ext, response.headers, page_url, source_url, via)
+
+def _revalidate_favicon(page_url, filename_base, icon_path, meta, budget):
+    """
+    메타데이터의 출처 URL로 조건부 요청(If-None-Match / If-Modified-Since)을 보냅니다.
+    304이면 검증 시각만 갱신합니다. 반환 값: (경로, 상태), 재검증할 수 없거나 시간 예산이 끝났으면 None.
+    """
+    headers = {}
+    if meta.get("etag"): headers['If-None-Match'] = meta["etag"]
+    if meta.get("last_modified"): headers['If-Modified-Since'] = meta["last_modified"]
+    via = meta.get("via", "site")
+    try:
+        with favicon_http.get(meta["source_url"], headers=headers, timeout=budget.timeout(5), stream=True) as response:
+            if response.status_code == 304:
+                meta["checked_at"] = time.time()
+                write_favicon_meta(filename_base, meta)
+                return icon_path, FAVICON_NOT_MODIFIED
+            if response.status_code != 200: return None
+            content_type = response.headers.get('content-type', '')
+            if via == "s2":
+                if 'image' not in content_type.lower(): return None
+                return _store_favicon_response(response, filename_base, ".png", page_url, meta["source_url"], via,
+                                               min_size=FAVICON_S2_MIN_BYTES, budget=budget)
+            return _store_favicon_response(response, filename_base, _favicon_extension(content_type), page_url, meta["source_url"], via,
+                                           budget=budget)
+    except (requests.RequestException, OSError, FaviconFetchCancelled) as e:
+        print(f"경고 (fetch_favicon): {meta.get('source_url')} 재검증 실패: {e}")
+        return None
+
+class FaviconFetchCancelled(Exception):
+    """시간 예산이 끝났거나 취소되어 파비콘 가져오기를 중단함."""
+
+class FaviconBudget:
+    """
+    파비콘 가져오기의 전체 시간 예산(마감 시각)과 협조적 취소 토큰입니다.
+    하위 요청은 timeout(상한)으로 남은 시간만큼만 기다리고, 받는 도중에는 check()로 마감과 취소를 확인합니다.
+    parent가 있으면 마감은 parent의 마감을 넘지 않고, parent가 취소되면 함께 취소된 것으로 봅니다.
+    작업자나 엔진처럼 오래 사는 취소 토큰은 seconds=float('inf')로 만들고 작업마다 자식 예산을 만듭니다.
+    """
+    def __init__(self, seconds=None, parent=None):
+        if seconds is None: seconds = FAVICON_FETCH_BUDGET_SECONDS
+        self.parent = parent
+        self.deadline = time.monotonic() + seconds
+        if parent is not None: self.deadline = min(self.deadline, parent.deadline)
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.is_cancelled())
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        """취소되었거나 마감이 지났으면 True."""
+        return self.is_cancelled() or self.remaining() <= 0
+
+    def check(self):
+        """취소되었거나 마감이 지났으면 FaviconFetchCancelled를 일으킵니다."""
+        if self.is_cancelled(): raise FaviconFetchCancelled("취소됨")
+        if self.remaining() <= 0: raise FaviconFetchCancelled("시간 예산 초과")
+
+    def timeout(self, limit):
+        """하위 요청에 쓸 timeout(초): limit과 남은 시간 중 작은 값. 남은 시간이 없거나 취소되었으면 FaviconFetchCancelled."""
+        self.check()
+        return min(limit, self.remaining())
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합칩니다. 먼저 온 호출만 실제로 실행하고,
+    실행 중에 같은 키로 들어온 호출은 끝날 때까지 기다려 같은 결과(또는 같은 예외)를 받습니다.
+    실행이 끝나면 키를 지우므로 결과를 캐시하지는 않습니다.
+    기다리는 호출은 check(주어지면)를 주기적으로 불러, check가 예외를 일으키면 기다리기를 그만둡니다.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {} # {키: {"done": Event, "result": 결과, "error": 예외}}
+        self.coalesced = 0 # 다른 호출의 결과를 함께 받은 호출 수
+
+    def do(self, key, fn, check=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+            else:
+                self.coalesced += 1
+        if not leader:
+            while not call["done"].wait(FAVICON_CANCEL_POLL_SECONDS if check else None):
+                check()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+favicon_flights = SingleFlight() # 도메인별 진행 중인 파비콘 가져오기
+
+class FaviconNegativeCache:
+    """
+    파비콘을 가져오지 못한 도메인을 기록합니다 (실패 이유, 시도 횟수, 다음 재시도 시각).
+    재시도 간격은 실패할 때마다 두 배로 늘어나며(FAVICON_FAILURE_BACKOFF_SECONDS부터
+    FAVICON_FAILURE_BACKOFF_MAX_SECONDS까지), 재시도 시각 전에는 요청 없이 바로 대체 아이콘을 씁니다.
+    성공하면 기록을 지웁니다. 기록은 FAVICON_DIR의 JSON 파일에 저장되어 다시 시작해도 유지됩니다.
+    """
+    def __init__(self, path=None):
+        self._path = path # None이면 사용할 때의 FAVICON_DIR 기준
+        self._lock = threading.Lock()
+        self._entries = None # {도메인 키: {"reason", "attempts", "failed_at", "retry_at"}}, 처음 사용할 때 로드
+
+    @property
+    def path(self):
+        return self._path or get_favicon_path(FAVICON_FAILURES_FILENAME)
+
+    def get(self, key):
+        """도메인의 실패 기록(사본)을 반환합니다. 없으면 None."""
+        with self._lock:
+            entry = self._load_locked().get(key)
+            return dict(entry) if entry else None
+
+    def is_blocked(self, key, now=None):
+        """도메인이 재시도 대기 중이면 True."""
+        with self._lock:
+            entry = self._load_locked().get(key)
+        return entry is not None and (now or time.time()) < entry.get("retry_at", 0)
+
+    def record_failure(self, key, reason, now=None):
+        """실패를 기록하고 다음 재시도 시각을 반환합니다."""
+        now = now or time.time()
+        with self._lock:
+            entries = self._load_locked()
+            attempts = entries.get(key, {}).get("attempts", 0) + 1
+            delay = min(FAVICON_FAILURE_BACKOFF_SECONDS * 2 ** (attempts - 1), FAVICON_FAILURE_BACKOFF_MAX_SECONDS)
+            entries[key] = {"reason": str(reason)[:300], "attempts": attempts, "failed_at": now, "retry_at": now + delay}
+            self._save_locked()
+            return now + delay
+
+    def record_success(self, key):
+        with self._lock:
+            entries = self._load_locked()
+            if key in entries:
+                del entries[key]
+                self._save_locked()
+
+    def clear(self):
+        """모든 실패 기록을 지웁니다."""
+        with self._lock:
+            self._entries = {}
+            self._save_locked()
+
+    def _load_locked(self):
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                if isinstance(loaded, dict):
+                    self._entries = {k: v for k, v in loaded.items() if isinstance(v, dict)}
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                print(f"경고 (FaviconNegativeCache): {self.path} 읽기 실패, 기록을 비웁니다: {e}")
+        return self._entries
+
+    def _save_locked(self):
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"경고 (FaviconNegativeCache): {self.path} 저장 실패: {e}")
+        favicon_index.note_written(self.path)
+
+favicon_failures = FaviconNegativeCache() # 실패한 도메인의 재시도 대기 기록
+
+class FaviconSourceStats:
+    """
+    도메인별로 아이콘 출처(FAVICON_SOURCES)의 성적을 기록합니다: 경주에서 이긴 횟수, 성공했을 때 걸린 시간의
+    지수 이동 평균(ms), 연속 실패 횟수. plan()은 이 기록으로 다음 가져오기의 출처 순서를 정합니다.
+    기록은 FAVICON_DIR의 JSON 파일에 FAVICON_SOURCE_STATS_SAVE_SECONDS에 한 번만 쓰고, 종료할 때 flush()로 남은 변경을 씁니다.
+    """
+    EWMA_WEIGHT = 0.3 # 새 측정값의 가중치
+
+    def __init__(self, path=None):
+        self._path = path # None이면 사용할 때의 FAVICON_DIR 기준
+        self._lock = threading.Lock()
+        self._entries = None # {도메인 키: {"at": 마지막 기록 시각, 출처: {"wins", "ms", "fails"}}}, 처음 사용할 때 로드
+        self._dirty = False
+        self._saved_at = 0.0
+
+    @property
+    def path(self):
+        return self._path or get_favicon_path(FAVICON_SOURCE_STATS_FILENAME)
+
+    def get(self, key):
+        """도메인의 출처별 기록(사본)을 반환합니다. 없으면 None."""
+        with self._lock:
+            entry = self._load_locked().get(key)
+            return json.loads(json.dumps(entry)) if entry else None
+
+    def plan(self, key, sources=FAVICON_SOURCES):
+        """
+        다음 가져오기의 출처 순서를 정합니다. 반환 값: (시도할 출처 목록, 미룬 출처 목록, 간격을 두고 차례로 시작할지)
+        시도할 출처는 기록상 빠른 순(기록이 없으면 sources 순서)이고, 연속으로 FAVICON_SOURCE_SKIP_FAILURES번 실패한
+        출처는 미룹니다. 걸린 시간 기록이 있으면 가장 빠른 출처부터 FAVICON_SOURCE_STAGGER_MS 간격으로 시작하고,
+        없으면 모두 동시에 시작합니다.
+        """
+        with self._lock:
+            entry = self._load_locked().get(key) or {}
+        stats = {name: entry.get(name) or {} for name in sources}
+        deferred = [name for name in sources if stats[name].get("fails", 0) >= FAVICON_SOURCE_SKIP_FAILURES]
+        active = [name for name in sources if name not in deferred]
+        if not active: # 모두 계속 실패했으면 다시 모두 시도
+            active, deferred = deferred, []
+        active.sort(key=lambda name: stats[name].get("ms", float('inf'))) # 안정 정렬: 기록 없는 출처는 원래 순서
+        return active, deferred, any("ms" in stats[name] for name in active)
+
+    def record(self, key, source, elapsed_ms, now=None):
+        """출처 한 번의 결과를 기록합니다. elapsed_ms가 None이면 실패입니다."""
+        with self._lock:
+            stats = self._stats_locked(key, source, now)
+            if elapsed_ms is None:
+                stats["fails"] = stats.get("fails", 0) + 1
+            else:
+                stats["fails"] = 0
+                previous = stats.get("ms")
+                stats["ms"] = round(elapsed_ms if previous is None else previous + self.EWMA_WEIGHT * (elapsed_ms - previous), 1)
+            self._save_if_due_locked(now)
+
+    def record_win(self, key, source, now=None):
+        with self._lock:
+            stats = self._stats_locked(key, source, now)
+            stats["wins"] = stats.get("wins", 0) + 1
+            self._save_if_due_locked(now)
+
+    def flush(self):
+        """저장하지 않은 변경이 있으면 씁니다."""
+        with self._lock:
+            if self._dirty: self._save_locked()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save_locked()
+
+    def _stats_locked(self, key, source, now):
+        entry = self._load_locked().setdefault(key, {})
+        entry["at"] = now or time.time()
+        self._dirty = True
+        return entry.setdefault(source, {})
+
+    def _save_if_due_locked(self, now):
+        if (now or time.time()) - self._saved_at >= FAVICON_SOURCE_STATS_SAVE_SECONDS:
+            self._save_locked()
+
+    def _load_locked(self):
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                if isinstance(loaded, dict):
+                    self._entries = {k: v for k, v in loaded.items() if isinstance(v, dict)}
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                print(f"경고 (FaviconSourceStats): {self.path} 읽기 실패, 기록을 비웁니다: {e}")
+        return self._entries
+
+    def _save_locked(self):
+        now = time.time()
+        self._entries = {k: v for k, v in self._entries.items() if now - v.get("at", 0) < FAVICON_SOURCE_STATS_MAX_AGE_SECONDS}
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"경고 (FaviconSourceStats): {self.path} 저장 실패: {e}")
+            return
+        self._dirty = False
+        self._saved_at = now
+        favicon_index.note_written(self.path)
+
+favicon_source_stats = FaviconSourceStats() # 도메인별 아이콘 출처 성적
+favicon_source_pool = ThreadPoolExecutor(max_workers=FAVICON_SOURCE_WORKERS, thread_name_prefix="FaviconSource") # 출처 경주 요청
+
+def favicon_flight_key(url):
+    """파비콘 가져오기를 합칠 때 쓰는 정규화된 도메인 키 (아이콘 파일 이름과 같은 단위). 도메인이 없으면 None."""
+    domain = urlparse(url).netloc.lower()
+    return favicon_filename_base(domain) if domain else None
+
+def _fetch_favicon_once(url, revalidate, budget):
+    """
+    같은 도메인을 이미 가져오는 중이면 그 결과를 기다려 함께 받습니다 (기다리는 동안에도 budget의 마감/취소를 따름).
+    그 호출이 취소되어 멈췄으면 결과를 받지 않고 이 호출이 다시 가져옵니다.
+    재시도 대기 중인 도메인은 요청 없이 캐시된 아이콘(없으면 DEFAULT_FAVICON)을 바로 반환합니다.
+    """
+    if budget is None: budget = FaviconBudget()
+    key = favicon_flight_key(url)
+    if key is None:
+        return _fetch_favicon(url, revalidate, budget)
+    if favicon_failures.is_blocked(key):
+        cached_path = find_cached_favicon(favicon_filename_base(urlparse(url).netloc))
+        if cached_path: return cached_path, FAVICON_NOT_MODIFIED
+        return (DEFAULT_FAVICON if favicon_index.exists(DEFAULT_FAVICON) else None), FAVICON_FAILED
+    while True:
+        try:
+            icon_path, status = favicon_flights.do(key, lambda: _fetch_favicon(url, revalidate, budget), check=budget.check)
+        except FaviconFetchCancelled: # 같은 도메인을 가져오는 다른 호출을 기다리다 마감/취소됨
+            return find_cached_favicon(favicon_filename_base(urlparse(url).netloc)), FAVICON_CANCELLED
+        if status != FAVICON_CANCELLED or budget.is_cancelled():
+            break
+        # 함께 기다린 다른 호출이 자기 예산의 취소로 멈춤: 이 호출의 예산이 남아 있으면 직접 다시 가져옴
+    if status not in (FAVICON_FAILED, FAVICON_CANCELLED):
+        favicon_failures.record_success(key)
+    return icon_path, status
+
+def fetch_favicon(url, revalidate=False, budget=None):
     """
     주어진 URL의 파비콘을 가져옵니다.
-    먼저 구글의 S2 서비스를 시도하고, 실패 시 HTML을 파싱하는 방식으로 대체합니다.
-    아이콘을 FAVICON_DIR에 저장합니다.
+    구글 S2 서비스, 페이지 HTML의 <link>, /favicon.ico를 동시에 시도하고 먼저 유효한 이미지를 준 출처를 씁니다
+    (도메인별 출처 성적에 따라 빠른 출처부터 시작하고, 계속 실패하는 출처는 미룸).
+    아이콘은 내용 해시 이름으로 저장소(favicon_store)에 저장합니다.
     저장된 아이콘의 경로를 반환하며, 가져오기 실패 시 DEFAULT_FAVICON을 반환합니다.
+    캐시된 아이콘은 TTL이 지났거나 revalidate=True일 때 조건부 요청으로 재검증합니다.
+    같은 도메인을 동시에 요청하면 한 번만 가져오고 모든 호출자가 같은 경로를 받습니다.
+    모든 요청은 budget(FaviconBudget, 기본 FAVICON_FETCH_BUDGET_SECONDS초)의 남은 시간 안에서만 기다리며,
+    budget이 취소되면 진행 중인 요청도 다음 확인 시점에 멈추고 캐시된 아이콘(없으면 None)을 반환합니다.
     """
+    return _fetch_favicon_once(url, revalidate, budget)[0]
+
+def refresh_favicon(url, budget=None):
+    """
+    캐시된 아이콘을 재검증하고 바뀌었으면 다시 받습니다 (전체 새로고침용, budget은 fetch_favicon과 같음).
+    반환 값: (경로, 상태) - 상태는 FAVICON_NOT_MODIFIED, FAVICON_UPDATED, FAVICON_FAILED, FAVICON_CANCELLED 중 하나.
+    """
+    return _fetch_favicon_once(url, True, budget)
+
+def _favicon_from_s2(url, budget):
+    """구글 S2 파비콘 서비스에서 아이콘을 받습니다 (S2는 png로 가정)."""
+    s2_url = FAVICON_S2_URL.format(size=FAVICON_TARGET_SIZE, domain=urlparse(url).netloc)
+    # with: 스트림 응답을 닫아 연결이 풀로 돌아가도록 함 (이미지가 아닌 응답 포함)
+    with favicon_http.get(s2_url, timeout=budget.timeout(5), stream=True) as response:
+        if response.status_code != 200 or 'image' not in response.headers.get('content-type', '').lower():
+            raise ValueError(f"HTTP {response.status_code} {response.headers.get('content-type', '')}")
+        download = _download_favicon(response, FAVICON_S2_MIN_BYTES, budget)
+        return {"via": "s2", "source_url": s2_url, "download": download, "ext": ".png", "headers": dict(response.headers)}
+
+def _favicon_from_page(url, budget):
+    """페이지의 <head>에서 아이콘 <link>를 찾아 받습니다. 다른 도메인으로 리디렉션되었고 그 도메인의 아이콘이 캐시에 있으면 그것을 씁니다."""
+    # 본문 전체 대신 </head>까지만 스트리밍으로 읽고, with를 벗어나면 남은 본문은 받지 않고 연결을 닫음
+    with favicon_http.get(url, timeout=budget.timeout(7), allow_redirects=True, stream=True) as response:
+        response.raise_for_status() # 잘못된 응답(4xx 또는 5xx)에 대해 HTTPError 발생
+        page_url = response.url
+        final_domain = urlparse(page_url).netloc
+        if final_domain and final_domain != urlparse(url).netloc: # 다른 도메인으로 리디렉션됨
+            redirected_path = find_cached_favicon(favicon_filename_base(final_domain))
+            if redirected_path:
+                return {"via": "page", "cached_path": redirected_path}
+        # charset이 없으면 requests는 ISO-8859-1로 가정하므로 UTF-8로 읽음
+        has_charset = 'charset' in response.headers.get('content-type', '').lower()
+        candidates, base_href, _ = find_icon_candidates(_checked_chunks(response.iter_content(FAVICON_HEAD_CHUNK_SIZE), budget),
+                                                        response.encoding if has_charset else 'utf-8')
+
+    # <link rel="icon" ...> 후보 중 선택 (상대 경로는 <base href> 기준). 없으면 "ico" 출처가 /favicon.ico를 맡음
+    best_candidate = choose_icon_candidate(candidates)
+    if best_candidate is None:
+        raise ValueError("아이콘 링크 없음")
+    icon_base_url = urljoin(page_url, base_href) if base_href else page_url
+    icon_url = urljoin(icon_base_url, best_candidate["href"])
+    with favicon_http.get(icon_url, timeout=budget.timeout(5), stream=True) as icon_response:
+        icon_response.raise_for_status()
+        download = _download_favicon(icon_response, 0, budget)
+        return {"via": "page", "source_url": icon_url, "download": download,
+                "ext": _favicon_extension(icon_response.headers.get('content-type', '')), "headers": dict(icon_response.headers)}
+
+def _favicon_from_ico(url, budget):
+    """사이트의 /favicon.ico를 받습니다."""
+    ico_url = urljoin(url, '/favicon.ico')
+    with favicon_http.get(ico_url, timeout=budget.timeout(5), allow_redirects=True, stream=True) as response:
+        response.raise_for_status()
+        download = _download_favicon(response, 0, budget)
+        return {"via": "ico", "source_url": ico_url, "download": download,
+                "ext": _favicon_extension(response.headers.get('content-type', '')), "headers": dict(response.headers)}
+
+def _checked_chunks(chunks, budget):
+    """바이트 조각을 넘기기 전마다 budget의 마감/취소를 확인합니다."""
+    for chunk in chunks:
+        budget.check()
+        yield chunk
+
+def _with_http_fallback(source):
+    """https 사이트에서 SSL 오류가 나면 http로 한 번 더 시도하는 출처로 감쌉니다."""
+    def run(url, budget):
+        try:
+            return source(url, budget)
+        except requests.exceptions.SSLError:
+            if not url.startswith("https://"): raise
+            print(f"경고 (fetch_favicon): {url}에서 SSL 오류 발생, http로 재시도합니다.")
+            return source(url.replace("https://", "http://", 1), budget) # 남은 예산 안에서만 재시도
+    return run
+
+FAVICON_SOURCE_FUNCTIONS = { # FAVICON_SOURCES의 각 출처: (url, FaviconBudget) -> 후보 dict, 실패하면 예외 (마감/취소는 FaviconFetchCancelled)
+    "s2": _favicon_from_s2,
+    "page": _with_http_fallback(_favicon_from_page),
+    "ico": _with_http_fallback(_favicon_from_ico),
+}
+
+def _race_favicon_sources(url, key, budget):
+    """
+    아이콘 출처들을 동시에 시도하고 처음으로 유효한 이미지를 준 출처의 후보를 반환합니다.
+    순서와 시작 간격은 favicon_source_stats.plan()을 따르며(기록이 없으면 모두 동시에), 실패한 출처가 있으면
+    다음 출처를 바로 시작하고, 시도한 출처가 모두 실패하면 미뤄 둔 출처도 시도합니다.
+    승자가 정해지면 나머지 출처는 취소 표시를 보고 받기를 멈추며 결과는 버립니다.
+    budget이 마감되거나 취소되면 새 출처를 시작하지 않고 진행 중인 출처도 멈춥니다.
+    반환 값: (후보 dict 또는 None, 실패 이유 목록)
+    """
+    waiting, deferred, staggered = favicon_source_stats.plan(key)
+    race = FaviconBudget(parent=budget) # 승자가 정해지면 이 경주만 취소 (budget은 그대로)
+    reasons = []
+
+    def run(name):
+        started = time.perf_counter()
+        try:
+            candidate = FAVICON_SOURCE_FUNCTIONS[name](url, race)
+        except Exception as e:
+            if race.is_cancelled() or isinstance(e, FaviconFetchCancelled):
+                return None # 승자가 정해진 뒤나 마감/취소로 멈춘 출처는 실패로 기록하지 않음
+            favicon_source_stats.record(key, name, None)
+            reasons.append(f"{name}: {type(e).__name__}: {e}")
+            return None
+        if candidate is not None:
+            favicon_source_stats.record(key, name, (time.perf_counter() - started) * 1000.0)
+        return candidate
+
+    pending = {}
+    next_start_at = None # 시차를 두고 시작할 때 다음 출처의 시작 시각
+    def start_next():
+        nonlocal next_start_at
+        name = waiting.pop(0)
+        pending[favicon_source_pool.submit(run, name)] = name
+        next_start_at = time.monotonic() + FAVICON_SOURCE_STAGGER_MS / 1000.0
+
+    start_next()
+    while waiting and not staggered:
+        start_next()
+    winner = None
+    while winner is None:
+        if budget.expired():
+            reasons.append("취소됨" if budget.is_cancelled() else "시간 예산 초과")
+            break
+        if not pending:
+            if not waiting and deferred: # 시도한 출처가 모두 실패: 미뤄 둔 출처 시도
+                waiting, deferred = deferred, []
+            if not waiting: break
+            start_next()
+            continue
+        if waiting and time.monotonic() >= next_start_at: # 먼저 시작한 출처가 느림: 다음 출처도 시작
+            start_next()
+            continue
+        # 취소를 알아챌 수 있도록 짧게 나눠 기다림
+        timeout = FAVICON_CANCEL_POLL_SECONDS
+        if waiting: timeout = min(timeout, max(0.0, next_start_at - time.monotonic()))
+        done, _ = wait(pending, timeout=min(timeout, budget.remaining()), return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.pop(future)
+            candidate = future.result()
+            if candidate is None:
+                if waiting: start_next() # 실패: 기다리지 않고 다음 출처 시작
+            elif winner is None:
+                winner = candidate
+            else: # 같은 순간에 끝난 다른 성공
+                _discard_favicon_download(candidate)
+    race.cancel()
+    for future in pending: # 남은 출처는 끝나는 대로 결과를 버림
+        future.add_done_callback(lambda f: _discard_favicon_download(f.result()))
+    if winner is not None:
+        favicon_source_stats.record_win(key, winner["via"])
+    return winner, reasons
+
+def _fetch_favicon(url, revalidate, budget):
     if not os.path.exists(FAVICON_DIR):
         try:
             os.makedirs(FAVICON_DIR)
         except OSError as e:
             print(f"경고 (fetch_favicon): 파비콘 디렉토리 {FAVICON_DIR} 생성 실패: {e}")
-            return None # 디렉토리 생성 실패 시 저장 불가
+            return None, FAVICON_FAILED # 디렉토리 생성 실패 시 저장 불가
 
     parsed_url = urlparse(url)
     current_effective_domain = parsed_url.netloc
 
     if not current_effective_domain:
         if parsed_url.scheme == 'file': # 로컬 파일은 웹 파비콘이 없습니다.
-            return None
+            return None, FAVICON_FAILED
         print(f"경고 (fetch_favicon): URL에서 도메인을 파싱할 수 없음: {url}")
-        return DEFAULT_FAVICON if os.path.exists(DEFAULT_FAVICON) else None
+        return (DEFAULT_FAVICON if favicon_index.exists(DEFAULT_FAVICON) else None), FAVICON_FAILED
+    if parsed_url.scheme == 'file': # 로컬 파일은 웹 파비콘 없음
+        return (DEFAULT_FAVICON if favicon_index.exists(DEFAULT_FAVICON) else None), FAVICON_FAILED
 
     # 도메인으로부터 안전한 파일명 기반을 생성합니다.
-    current_safe_filename_base = "".join(c if c.isalnum() or c in ['.', '-'] else '_' for c in current_effective_domain)
-    original_domain_for_s2 = current_effective_domain # S2 서비스를 위해 원본 도메인 유지
+    cached_base = favicon_filename_base(current_effective_domain)
+
+    # 캐시된 아이콘이 있으면 TTL 안에서는 그대로 쓰고, 지났으면 조건부 요청으로 재검증합니다.
+    cached_meta = read_favicon_meta(cached_base)
+    cached_path = find_cached_favicon(cached_base, cached_meta)
+    if cached_path:
+        if not revalidate and not favicon_meta_expired(cached_path, cached_meta):
+            return cached_path, FAVICON_NOT_MODIFIED
+        if cached_meta and cached_meta.get("source_url"):
+            result = _revalidate_favicon(url, cached_base, cached_path, cached_meta, budget)
+            if result: return result
+        # 메타데이터가 없는 이전 캐시이거나 재검증 실패: 아래에서 새로 받고, 실패하면 기존 아이콘을 유지
+
+    # S2, 페이지의 <link>, /favicon.ico를 동시에 시도하고 먼저 유효한 이미지를 준 출처를 씀
+    # (리디렉션된 도메인의 아이콘도 원래 도메인 이름으로 기록하므로 다음에는 캐시에서 바로 찾음)
+    candidate, reasons = _race_favicon_sources(url, favicon_flight_key(url), budget)
+    if candidate is not None:
+        if "cached_path" in candidate:
+            return candidate["cached_path"], FAVICON_NOT_MODIFIED
+        return _commit_favicon(cached_base, candidate["download"], candidate["ext"], candidate["headers"],
+                               url, candidate["source_url"], candidate["via"])
+    if budget.is_cancelled(): # 사용자가 취소함: 실패로 기록하지 않고 기존 아이콘을 그대로 둠
+        return cached_path, FAVICON_CANCELLED
+    failure_reason = "; ".join(reasons) or "아이콘 링크와 /favicon.ico를 찾지 못함" # 모든 출처가 실패했을 때 기록할 이유
+
+    # 재시도 시각 전까지는 이 도메인에 요청하지 않음
+    retry_at = favicon_failures.record_failure(favicon_flight_key(url), failure_reason)
+    print(f"경고 (fetch_favicon): {url} 실패 ({failure_reason}), {time.strftime('%Y-%m-%d %H:%M', time.localtime(retry_at))} 이후 재시도")
+    if cached_path and favicon_file_index(cached_path).exists(cached_path): # 새로 받지 못했으면 기존 아이콘 유지, TTL 동안 다시 시도하지 않음
+        meta = dict(cached_meta or {}, checked_at=time.time())
+        write_favicon_meta(cached_base, meta)
+        return cached_path, FAVICON_FAILED
+    return (DEFAULT_FAVICON if favicon_index.exists(DEFAULT_FAVICON) else None), FAVICON_FAILED
 
-    # 흔한 확장자로 아이콘이 이미 존재하는지 확인합니다.
-    for ext in ['.png', '.ico', '.jpg', '.jpeg', '.gif', '.svg']:
-        potential_path = get_favicon_path(f"{current_safe_filename_base}{ext}")
-        if os.path.exists(potential_path):
-            return potential_path
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+def load_icon_pixmap(icon_path, icon_size: QSize):
+    """
+    경로에서 아이콘을 로드하여 icon_size 크기의 QIcon을 반환합니다.
+    아이콘 아틀라스 > 미리 만든 PNG(normalize_favicon) > 원본 디코딩 및 스케일링 순으로 시도합니다.
+    """
+    if not icon_path : return QIcon() # 경로가 없으면 빈 QIcon 반환
+
+    # 경로가 절대 경로인지 FAVICON_DIR에 대한 상대 경로인지 결정
+    final_path = resolve_icon_path(icon_path)
+    favicon_store.note_used(final_path) # 용량 정리 순서(LRU)용
+
+    if icon_size.width() == icon_size.height() and icon_size.width() == favicon_atlas.size:
+        atlas_icon = favicon_atlas.icon(final_path)
+        if not atlas_icon.isNull():
+            return atlas_icon
+    if icon_size.width() == icon_size.height() and icon_size.width() in FAVICON_RENDER_SIZES:
+        rendered_icon = load_rendered_icon(final_path, icon_size.width())
+        if not rendered_icon.isNull():
+            return rendered_icon
+
+    if favicon_file_index(final_path).exists(final_path):
+        px = QPixmap(final_path)
+        if not px.isNull():
+            return QIcon(px.scaled(icon_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+    return QIcon() # 로딩 실패 또는 경로가 존재하지 않으면 빈 QIcon 반환
 
-    # 1. 구글 S2 파비콘 서비스 시도
-    if original_domain_for_s2: # 도메인이 있을 경우에만 시도
+def resolve_icon_path(icon_path):
+    """저장된 아이콘 경로를 실제 파일 경로로 바꿉니다 (상대 경로는 FAVICON_DIR 기준, 저장소 파일은 store 폴더)."""
+    if not icon_path or os.path.isabs(icon_path):
+        return icon_path
+    if os.path.basename(os.path.dirname(icon_path)) == FAVICON_STORE_SUBDIR:
+        return os.path.join(favicon_store.directory, os.path.basename(icon_path))
+    return get_favicon_path(os.path.basename(icon_path))
+
+def get_rendered_favicon_dir():
+    return os.path.join(FAVICON_DIR, FAVICON_RENDER_SUBDIR)
+
+def rendered_favicon_path(icon_path, size, scale=1):
+    """원본 아이콘의 size(논리 픽셀) x scale 배율 PNG 경로입니다. 예: example.com.ico -> rendered/example.com.ico.48@2x.png"""
+    suffix = f"@{scale}x" if scale != 1 else ""
+    return os.path.join(get_rendered_favicon_dir(), f"{os.path.basename(icon_path)}.{size}{suffix}.png")
+
+def has_rendered_favicon(icon_path, size):
+    """원본보다 새로운 size 크기의 PNG가 모든 배율에 대해 있으면 True (메모리 색인 조회)."""
+    source_stat = favicon_file_index(icon_path).stat(icon_path)
+    if source_stat is None: return False
+    for scale in FAVICON_RENDER_SCALES:
+        rendered_stat = favicon_render_index.stat(rendered_favicon_path(icon_path, size, scale))
+        if rendered_stat is None or rendered_stat[1] < source_stat[1]: # 원본이 다시 받아졌으면 다시 만듦
+            return False
+    return True
+
+def _read_icon_frames(icon_path):
+    """아이콘 파일의 모든 프레임(ICO의 여러 크기 등)을 QImage 목록으로 읽습니다. 벡터 이미지이면 None (크기별로 래스터화)."""
+    reader = QImageReader(icon_path)
+    if bytes(reader.format()).lower() in (b"svg", b"svgz"):
+        return None
+    frames = []
+    for index in range(max(1, reader.imageCount())):
+        if index and not reader.jumpToImage(index): break
+        image = reader.read()
+        if image.isNull(): break
+        frames.append(image)
+    if not frames:
+        raise ValueError(reader.errorString())
+    return frames
+
+def _best_icon_frame(frames, pixels):
+    """pixels 이상인 가장 작은 프레임을 고릅니다 (축소가 확대보다 선명함). 없으면 가장 큰 프레임."""
+    def side(image): return max(image.width(), image.height())
+    large_enough = [f for f in frames if side(f) >= pixels]
+    if large_enough:
+        return min(large_enough, key=side)
+    return max(frames, key=lambda f: (side(f), f.depth()))
+
+def normalize_favicon(icon_path):
+    """
+    원본 아이콘(PNG/ICO/JPG/GIF/SVG 등)을 디코딩해 FAVICON_RENDER_SIZES x FAVICON_RENDER_SCALES 크기의
+    PNG를 만듭니다. ICO는 크기별로 가장 알맞은 프레임을, SVG는 목표 크기로 바로 래스터화합니다.
+    QImage만 사용하므로 작업자 스레드에서 실행할 수 있습니다. 만든 경로 목록을 반환하고, 디코딩 실패 시 ValueError.
+    """
+    render_dir = get_rendered_favicon_dir()
+    os.makedirs(render_dir, exist_ok=True)
+    frames = _read_icon_frames(icon_path)
+    written = []
+    for size in FAVICON_RENDER_SIZES:
+        for scale in FAVICON_RENDER_SCALES:
+            pixels = size * scale
+            if frames is None: # 벡터: 목표 크기로 래스터화
+                reader = QImageReader(icon_path)
+                source_size = reader.size()
+                if source_size.isValid() and not source_size.isEmpty():
+                    reader.setScaledSize(source_size.scaled(pixels, pixels, Qt.AspectRatioMode.KeepAspectRatio))
+                else:
+                    reader.setScaledSize(QSize(pixels, pixels))
+                image = reader.read()
+                if image.isNull():
+                    raise ValueError(reader.errorString())
+            else:
+                image = _best_icon_frame(frames, pixels)
+            if max(image.width(), image.height()) != pixels:
+                image = image.scaled(pixels, pixels, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied) # 표시할 때 변환하지 않도록
+            path = rendered_favicon_path(icon_path, size, scale)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            if not image.save(temp_path, "PNG"):
+                raise ValueError(f"{temp_path} 저장 실패")
+            os.replace(temp_path, path)
+            favicon_render_index.note_written(path)
+            written.append(path)
+    return written
+
+def load_rendered_icon(icon_path, size):
+    """미리 만든 1x/2x PNG로 QIcon을 만듭니다 (표시할 때 배율에 맞는 파일을 고르며 크기 조정 없음). 없으면 빈 QIcon."""
+    if not has_rendered_favicon(icon_path, size):
+        return QIcon()
+    icon = QIcon()
+    for scale in FAVICON_RENDER_SCALES:
+        icon.addFile(rendered_favicon_path(icon_path, size, scale), QSize(size * scale, size * scale))
+    return icon
+
+def _rendered_favicon_mtime(icon_path, size):
+    """원본의 size 크기 PNG들 중 가장 최근 수정 시각입니다 (아틀라스 칸이 최신인지 비교용). 없으면 None."""
+    mtimes = []
+    for scale in FAVICON_RENDER_SCALES:
+        rendered_stat = favicon_render_index.stat(rendered_favicon_path(icon_path, size, scale))
+        if rendered_stat is None: return None
+        mtimes.append(rendered_stat[1])
+    return max(mtimes)
+
+class FaviconAtlas:
+    """
+    목록 크기의 모든 아이콘(1x/2x)을 ARGB32 픽셀 그대로 이어 붙인 파일 하나(아틀라스)와
+    인덱스(JSON: 원본 파일 이름 -> 배율별 [오프셋, 너비, 높이])로 묶어 메모리 매핑합니다.
+    목록을 채울 때 아이콘 파일을 하나씩 열고 디코딩하는 대신 매핑된 버퍼에서 잘라 씁니다.
+    - build()는 작업자 스레드에서 새 세대 파일을 만듭니다. 바뀌지 않은 칸은 이전 아틀라스에서 복사하고
+      새로 만들어졌거나 바뀐 PNG만 디코딩합니다 (증분 재구성).
+    - open()은 GUI 스레드에서 최신 세대를 다시 매핑하고 이전 세대 파일을 지웁니다
+      (매핑 중인 파일은 Windows에서 교체할 수 없으므로 세대마다 다른 파일을 씀).
+    """
+    def __init__(self, size=SHORTCUT_ICON_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._file = None
+        self._mmap = None
+        self._entries = {} # {원본 파일 이름: {"mtime": 렌더 시각, "cells": [[오프셋, 너비, 높이], ...]}}
+        self._generation = 0
+        self._icons = {} # {원본 파일 이름: QIcon} (GUI 스레드 전용, 다시 열면 비움)
+        self.dirty = False # 아틀라스에 없거나 오래된 아이콘을 요청받았으면 True (재구성 필요)
+
+    @property
+    def index_path(self):
+        return os.path.join(get_rendered_favicon_dir(), FAVICON_ATLAS_INDEX_FILENAME)
+
+    def _data_path(self, generation):
+        return os.path.join(get_rendered_favicon_dir(), f"{FAVICON_ATLAS_DATA_PREFIX}{generation}.bin")
+
+    def open(self):
+        """인덱스와 최신 세대 아틀라스를 다시 매핑합니다. 성공하면 True."""
         try:
-            google_s2_url = f"https://www.google.com/s2/favicons?sz=64&domain_url={original_domain_for_s2}"
-            s2_response = requests.get(google_s2_url, headers=headers, timeout=5, stream=True)
-            if s2_response.status_code == 200 and 'image' in s2_response.headers.get('content-type', '').lower():
-                s2_favicon_path = get_favicon_path(f"{current_safe_filename_base}.png") # S2는 png로 가정
-                with open(s2_favicon_path, 'wb') as f:
-                    for chunk in s2_response.iter_content(8192):
-                        f.write(chunk)
-                if os.path.getsize(s2_favicon_path) > 100: # 비어있거나 오류 이미지가 아닌지 기본 검사
-                    return s2_favicon_path
-                else: # S2가 매우 작은 (오류일 가능성이 높은) 이미지를 반환했으므로 삭제
-                    try: os.remove(s2_favicon_path)
-                    except OSError: pass # 삭제 실패 시 무시
-        except Exception as e:
-            print(f"경고 (fetch_favicon): {original_domain_for_s2}에 대한 구글 S2 오류: {e}")
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if (index.get("version") != FAVICON_ATLAS_VERSION or index.get("size") != self.size
+                    or index.get("scales") != list(FAVICON_RENDER_SCALES)):
+                raise ValueError("아틀라스 형식이 현재 설정과 다릅니다")
+            generation = int(index["generation"])
+            data_file = open(self._data_path(generation), 'rb')
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"경고 (FaviconAtlas): 아틀라스 열기 실패, 다시 만듭니다: {e}")
+            self.dirty = True
+            return False
+        try:
+            mapped = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(data_file.fileno()).st_size else None
+        except (OSError, ValueError) as e:
+            data_file.close()
+            print(f"경고 (FaviconAtlas): 아틀라스 매핑 실패: {e}")
+            return False
+        with self._lock:
+            self._close_locked()
+            self._file, self._mmap = data_file, mapped
+            self._entries = index.get("icons", {})
+            self._generation = generation
+            self._icons = {}
+        self._remove_old_generations(generation)
+        return True
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        if self._mmap is not None: self._mmap.close()
+        if self._file is not None: self._file.close()
+        self._mmap = self._file = None
+        self._entries = {}
+
+    def _remove_old_generations(self, current):
+        directory = get_rendered_favicon_dir()
+        current_name = os.path.basename(self._data_path(current))
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(FAVICON_ATLAS_DATA_PREFIX) and name != current_name:
+                try: os.remove(os.path.join(directory, name))
+                except OSError: pass # 다른 인스턴스가 아직 매핑 중이면 다음에 지움
+
+    def icon(self, icon_path):
+        """원본 아이콘 경로의 QIcon(1x/2x)을 아틀라스에서 만듭니다. 없거나 오래되었으면 빈 QIcon (dirty 표시)."""
+        name = os.path.basename(icon_path)
+        rendered_mtime = _rendered_favicon_mtime(icon_path, self.size) if has_rendered_favicon(icon_path, self.size) else None
+        entry = self._entries.get(name)
+        if entry is None or self._mmap is None or entry.get("mtime") != rendered_mtime:
+            if rendered_mtime is not None: self.dirty = True # PNG는 있는데 아틀라스에 없음
+            return QIcon()
+        icon = self._icons.get(name)
+        if icon is None:
+            icon = QIcon()
+            for offset, width, height in entry["cells"]:
+                image = QImage(self._mmap[offset:offset + width * height * 4], width, height, width * 4,
+                               QImage.Format.Format_ARGB32_Premultiplied)
+                icon.addPixmap(QPixmap.fromImage(image))
+            self._icons[name] = icon
+        return icon
+
+    def build(self, icon_paths):
+        """
+        icon_paths(원본 아이콘 경로)의 미리 만든 PNG로 새 세대 아틀라스를 씁니다 (작업자 스레드에서 실행 가능).
+        내용이 바뀌지 않으면 아무것도 쓰지 않고 False를 반환합니다.
+        """
+        with self._lock:
+            old_entries, old_mmap, generation = dict(self._entries), self._mmap, self._generation + 1
+            wanted = {}
+            for icon_path in icon_paths:
+                if icon_path and has_rendered_favicon(icon_path, self.size):
+                    wanted[os.path.basename(icon_path)] = (icon_path, _rendered_favicon_mtime(icon_path, self.size))
+            if old_mmap is not None and wanted.keys() == old_entries.keys() and all(
+                    old_entries[name].get("mtime") == mtime for name, (_, mtime) in wanted.items()):
+                return False
+
+            os.makedirs(get_rendered_favicon_dir(), exist_ok=True)
+            data_path = self._data_path(generation)
+            entries = {}
+            offset = 0
+            reused = 0
+            with open(data_path, 'wb') as f:
+                for name in sorted(wanted):
+                    icon_path, mtime = wanted[name]
+                    old = old_entries.get(name)
+                    if old is not None and old_mmap is not None and old.get("mtime") == mtime:
+                        cells = [(old_mmap[o:o + w * h * 4], w, h) for o, w, h in old["cells"]] # 디코딩 없이 복사
+                        reused += 1
+                    else:
+                        cells = []
+                        for scale in FAVICON_RENDER_SCALES:
+                            image = QImage(rendered_favicon_path(icon_path, self.size, scale))
+                            if image.isNull(): break
+                            image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+                            cells.append((bytes(image.constBits())[:image.sizeInBytes()], image.width(), image.height()))
+                        if len(cells) != len(FAVICON_RENDER_SCALES): continue # 읽을 수 없는 PNG는 건너뜀
+                    entry_cells = []
+                    for pixels, width, height in cells:
+                        f.write(pixels)
+                        entry_cells.append([offset, width, height])
+                        offset += len(pixels)
+                    entries[name] = {"mtime": mtime, "cells": entry_cells}
+
+            index = {"version": FAVICON_ATLAS_VERSION, "size": self.size, "scales": list(FAVICON_RENDER_SCALES),
+                     "generation": generation, "icons": entries}
+            temp_path = f"{self.index_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+            self._generation = generation # 다음 build가 같은 세대 파일을 덮어쓰지 않도록
+        print(f"정보 (FaviconAtlas): 아이콘 {len(entries)}개 아틀라스 재구성 (재사용 {reused}개, {offset // 1024}KiB)")
+        return True
+
+favicon_atlas = FaviconAtlas() # 목록 아이콘 아틀라스
+
+class FaviconNormalizer:
+    """
+    다운로드된 아이콘을 작업자 풀에서 normalize_favicon으로 변환합니다.
+    같은 파일이 대기 중이면 다시 넣지 않고, 디코딩에 실패한 파일은 바뀌기 전까지 다시 시도하지 않습니다.
+    on_done(원본 경로)은 작업자 스레드에서 호출되므로 시그널로 연결해야 합니다.
+    """
+    def __init__(self, on_done, workers=FAVICON_NORMALIZE_WORKERS):
+        self.on_done = on_done
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="FaviconNormalize")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._failed = {} # {원본 경로: 실패 당시 (크기, 수정 시각)}
+
+    def submit(self, icon_path):
+        """아이콘 정규화를 예약합니다. 예약했으면 True."""
+        icon_path = resolve_icon_path(icon_path)
+        if not icon_path: return False
+        source_stat = favicon_file_index(icon_path).stat(icon_path)
+        if source_stat is None: return False
+        with self._lock:
+            if icon_path in self._pending or self._failed.get(icon_path) == source_stat:
+                return False
+            self._pending.add(icon_path)
+        try:
+            self._pool.submit(self._run, icon_path, source_stat)
+        except RuntimeError: # 종료 후
+            with self._lock: self._pending.discard(icon_path)
+            return False
+        return True
+
+    def shutdown(self):
+        """대기 중인 작업을 버리고 작업자를 멈춥니다 (진행 중인 변환은 끝까지 실행됨)."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, icon_path, source_stat):
+        try:
+            normalize_favicon(icon_path)
+        except Exception as e: # 손상된 이미지, 지원하지 않는 형식, 디스크 오류
+            print(f"경고 (파비콘 정규화): {icon_path} 변환 실패: {e}")
+            with self._lock:
+                self._failed[icon_path] = source_stat
+                self._pending.discard(icon_path)
+            return
+        with self._lock:
+            self._pending.discard(icon_path)
+        self.on_done(icon_path)
+
 
-    # 2. 웹사이트 자체에서 직접 가져오기로 대체
+def _empty_store_state():
+    """저장소 내부 상태의 빈 형태를 반환합니다. 바로가기는 ID를 키로 하는 dict로 보관합니다."""
+    return {"categories_order": [], "shortcuts": {}, "global_show_window_hotkey": "ctrl+shift+x"}
+
+def apply_journal_record(state, record):
+    """
+    저널 레코드 하나를 저장소 상태(state)에 적용합니다.
+    state["shortcuts"]는 {id: 바로가기 dict} 형태입니다. 알 수 없는 op는 무시합니다.
+    """
+    op = record.get("op")
+    shortcuts = state["shortcuts"]
+    if op in ("add", "update"): # 추가/편집은 항목 전체를 교체
+        item = record.get("item") or {}
+        if item.get("id"):
+            shortcuts[item["id"]] = dict(item)
+    elif op == "delete":
+        shortcuts.pop(record.get("id"), None)
+    elif op == "patch": # 우선순위 변경, 카테고리 이동 등 일부 필드만 변경
+        sc = shortcuts.get(record.get("id"))
+        if sc is not None:
+            sc.update(record.get("fields") or {})
+    elif op == "recategorize": # 카테고리 삭제 시 해당 카테고리의 모든 항목 이동
+        from_cat, to_cat = record.get("from"), record.get("to")
+        for sc in shortcuts.values():
+            if sc.get("category") == from_cat:
+                sc["category"] = to_cat
+    elif op == "categories":
+        state["categories_order"] = list(record.get("order") or [])
+    elif op == "setting":
+        state[record.get("key")] = record.get("value")
+
+BINARY_SNAPSHOT_MAGIC = b"SCGBIN\x00\x01"
+BINARY_SNAPSHOT_HEADER = struct.Struct("<8sQqq") # 매직, journal_seq, 원본 JSON mtime_ns, 원본 JSON 크기
+_SECTION_LEN = struct.Struct("<I")
+
+def _file_signature(path):
+    """파일의 (mtime_ns, 크기)를 반환합니다. 파일이 없으면 None."""
     try:
-        temp_url = url
-        # 웹 URL에 스킴(http/https)이 없으면 추가
-        if not parsed_url.scheme and not url.lower().startswith("file:"):
-            temp_url = "http://" + url # http 먼저 시도
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
-        if urlparse(temp_url).scheme == 'file': # 로컬 파일은 웹 파비콘 없음
-            return DEFAULT_FAVICON if os.path.exists(DEFAULT_FAVICON) else None
+def write_binary_snapshot(path, document, journal_seq, json_signature):
+    """
+    문서를 빠른 시작용 바이너리 스냅샷으로 기록합니다 (임시 파일 + 이름 바꾸기).
+    구성: 헤더 | 설정(JSON) | 값 테이블(JSON 배열) | 키 모양 목록 | 값 번호 배열(uint32)
+    카테고리, 아이콘 경로 등 모든 값은 값 테이블에 한 번만 저장되고(인터닝),
+    같은 키 구성을 가진 레코드들은 키(열)별로 값 번호가 연속 저장됩니다.
+    로드 시 열 단위로 값을 찾아 dict를 만들 수 있어 항목별 파싱/검증 작업이 없습니다.
+    """
+    values, value_ids = [], {}
+    groups = {} # {키 튜플: [레코드, ...]}
+    for sc in document.get("shortcuts", []):
+        groups.setdefault(tuple(sc.keys()), []).append(sc)
+
+    def intern(value):
+        value_key = (type(value).__name__, value if not isinstance(value, (dict, list)) else json.dumps(value, sort_keys=True))
+        value_id = value_ids.get(value_key)
+        if value_id is None:
+            value_id = value_ids[value_key] = len(values)
+            values.append(value)
+        return value_id
+
+    indices = array('I')
+    shapes = []
+    for keys, records in groups.items():
+        shapes.append([list(keys), len(records)])
+        for key in keys: # 열 단위로 기록
+            indices.extend(intern(sc[key]) for sc in records)
+    if sys.byteorder == "big": # 파일은 항상 리틀 엔디언
+        indices.byteswap()
+
+    settings = {k: v for k, v in document.items() if k != "shortcuts"}
+    sections = [
+        json.dumps(settings, ensure_ascii=False).encode('utf-8'),
+        json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+        json.dumps(shapes, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+        indices.tobytes(),
+    ]
+    mtime_ns, size = json_signature or (-1, -1)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(BINARY_SNAPSHOT_HEADER.pack(BINARY_SNAPSHOT_MAGIC, journal_seq, mtime_ns, size))
+        for section in sections:
+            f.write(_SECTION_LEN.pack(len(section)))
+            f.write(section)
+    os.replace(tmp_path, path)
+
+def read_binary_snapshot(path):
+    """
+    바이너리 스냅샷을 읽어 (문서, journal_seq, 원본 JSON 서명)을 반환합니다.
+    형식이 맞지 않으면 ValueError를 발생시킵니다.
+    """
+    with open(path, 'rb') as f:
+        buf = f.read()
+    if len(buf) < BINARY_SNAPSHOT_HEADER.size:
+        raise ValueError("바이너리 스냅샷 헤더가 잘렸습니다.")
+    magic, journal_seq, mtime_ns, size = BINARY_SNAPSHOT_HEADER.unpack_from(buf, 0)
+    if magic != BINARY_SNAPSHOT_MAGIC:
+        raise ValueError("바이너리 스냅샷 형식이 아닙니다.")
+    offset = BINARY_SNAPSHOT_HEADER.size
+    sections = []
+    for _ in range(4):
+        (length,) = _SECTION_LEN.unpack_from(buf, offset)
+        offset += _SECTION_LEN.size
+        if offset + length > len(buf):
+            raise ValueError("바이너리 스냅샷 섹션이 잘렸습니다.")
+        sections.append(buf[offset:offset + length])
+        offset += length
+
+    # 수만 개의 dict를 한 번에 만드는 동안 순환 GC가 반복 실행되지 않도록 잠시 끔
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        document = _decode_binary_sections(sections)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    json_signature = None if mtime_ns < 0 else (mtime_ns, size)
+    return document, journal_seq, json_signature
+
+def _decode_binary_sections(sections):
+    """바이너리 스냅샷의 네 섹션을 문서 dict로 변환합니다."""
+    document = json.loads(sections[0])
+    values = json.loads(sections[1])
+    indices = array('I')
+    indices.frombytes(sections[3])
+    if sys.byteorder == "big":
+        indices.byteswap()
+
+    shortcuts = []
+    pos = 0
+    get_value = values.__getitem__
+    for keys, count in json.loads(sections[2]):
+        if pos + len(keys) * count > len(indices):
+            raise ValueError("바이너리 스냅샷 레코드 배열이 잘렸습니다.")
+        columns = []
+        for _ in keys:
+            columns.append(map(get_value, indices[pos:pos + count]))
+            pos += count
+        # 열들을 행으로 묶어 dict 생성 (항목별 파이썬 코드 실행 없이 C 수준에서 처리)
+        shortcuts.extend(map(dict, map(zip, itertools.repeat(tuple(keys), count), zip(*columns))))
+    document["shortcuts"] = shortcuts
+    return document
+
+
+class ShortcutJournalStore:
+    """
+    바로가기 데이터를 스냅샷(SETTINGS_FILE) + 추가 전용 저널(JOURNAL_FILE)로 저장합니다.
+    각 변경은 저널에 한 줄짜리 JSON 레코드로 추가되며, 저널이 임계값을 넘으면
+    백그라운드 스레드에서 스냅샷으로 압축됩니다. 시작 시에는 스냅샷 이후의 레코드를 재생합니다.
+    """
+    def __init__(self, snapshot_path, journal_path, compact_threshold=JOURNAL_COMPACT_THRESHOLD_BYTES, binary_path=None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.binary_path = binary_path # None이면 바이너리 스냅샷을 사용하지 않음
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock() # 저널 파일과 내부 상태 보호
+        self._state = _empty_store_state() # 압축에 사용할 디스크 상태의 복제본
+        self._seq = 0 # 마지막으로 기록된 레코드 번호
+        self._journal_fp = None # 추가 모드로 열린 저널 파일 핸들
+        self._compact_thread = None
+        self._binary_thread = None # 시작할 때 바이너리 스냅샷만 만드는 스레드
+        self._snapshot_lock = threading.Lock() # 스냅샷 파일(JSON, 바이너리)과 그 임시 파일을 쓰는 스레드를 직렬화
+        self._snapshot_seq = 0 # 이 저장소가 마지막으로 기록한 스냅샷의 레코드 번호
+
+    def has_data(self):
+        """스냅샷 또는 저널 파일이 존재하는지 반환합니다."""
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.journal_path)
+
+    def load(self):
+        """
+        스냅샷을 읽고 그 이후의 저널 레코드를 재생하여 문서를 반환합니다.
+        반환 값: {"categories_order": [...], "shortcuts": [...], "global_show_window_hotkey": str}
+        스냅샷 JSON이 손상된 경우 예외가 그대로 전달됩니다.
+        """
+        with self._lock:
+            self._state, self._seq, from_binary = self._read_state()
+            document = self._export_state(sort=False) # 호출자(인덱스)가 직접 정렬하므로 정렬 생략
+            if self.binary_path and not from_binary and document["shortcuts"]:
+                # 바이너리 스냅샷이 없거나 오래됨: 다음 시작을 위해 백그라운드에서 만들어 둠
+                self._binary_thread = threading.Thread(
+                    target=self._write_binary_only,
+                    args=(self._export_state(), self._seq, _file_signature(self.snapshot_path)), daemon=True)
+                self._binary_thread.start()
+            return document
+
+    def read_document(self):
+        """내부 상태를 바꾸지 않고 디스크의 문서(스냅샷 + 저널)를 읽어 반환합니다."""
+        with self._lock:
+            state, _, _ = self._read_state()
+            return self._export_state(state)
+
+    def data_paths(self):
+        """이 저장소의 내용이 담긴 파일 경로 목록을 반환합니다 (변경 감지용)."""
+        return [self.snapshot_path, self.journal_path]
+
+    def _read_state(self):
+        """스냅샷과 저널을 읽어 (상태, 마지막 레코드 번호, 바이너리 스냅샷 사용 여부)를 반환합니다."""
+        state = _empty_store_state()
+        snapshot_seq = 0
+        data = self._read_binary_snapshot() # JSON이 그 이후 바뀌지 않았으면 바이너리 스냅샷 사용
+        from_binary = data is not None
+        if data is None and os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        if data is not None:
+            # 바로가기 외의 최상위 키(카테고리 순서, 설정 값)는 그대로 보존
+            state.update({k: v for k, v in data.items() if k not in ("shortcuts", "journal_seq")})
+            for idx, sc in enumerate(data.get("shortcuts", [])):
+                if not sc.get("id"):
+                    # ID가 없는 항목(이전 버전 또는 직접 편집)은 임시 키로 보관하고,
+                    # 문서를 마이그레이션되지 않은 것으로 표시하여 무결성 단계가 다시 실행되도록 함
+                    state["shortcuts"][f"__no_id_{idx}"] = sc
+                    state.pop("schema_version", None)
+                    continue
+                state["shortcuts"][sc["id"]] = sc
+            snapshot_seq = data.get("journal_seq", 0)
+
+        last_seq = snapshot_seq
+        for record in self._read_journal_records():
+            if record.get("seq", 0) <= snapshot_seq: # 이미 스냅샷에 반영된 레코드
+                continue
+            apply_journal_record(state, record)
+            last_seq = max(last_seq, record.get("seq", 0))
+        return state, last_seq, from_binary
+
+    def append(self, op, **payload):
+        """변경 레코드 하나를 저널에 추가하고, 필요하면 백그라운드 압축을 시작합니다."""
+        self.append_many([(op, payload)])
+        if self.needs_compaction():
+            self.compact_async()
+
+    def append_many(self, changes):
+        """
+        (op, payload) 목록을 한 번의 쓰기로 저널에 추가합니다.
+        쓰기 직후의 저장소 파일 서명(store_signature)을 반환합니다 (자신의 쓰기와 외부 변경 구분용).
+        """
+        with self._lock:
+            lines = []
+            for op, payload in changes:
+                self._seq += 1
+                record = {"seq": self._seq, "op": op}
+                record.update(payload)
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+                apply_journal_record(self._state, record)
+            if self._journal_fp is None:
+                self._journal_fp = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal_fp.write("".join(lines))
+            self._journal_fp.flush()
+            return store_signature(self)
+
+    def needs_compaction(self):
+        """저널이 압축 임계값을 넘었는지 반환합니다."""
+        with self._lock:
+            return self._journal_fp is not None and self._journal_fp.tell() > self.compact_threshold
+
+    def save_snapshot(self, document):
+        """
+        전체 문서를 스냅샷으로 즉시 기록하고 저널을 비웁니다.
+        마이그레이션이나 아이콘 전체 새로고침처럼 많은 항목이 한 번에 바뀔 때 사용합니다.
+        기록 직후의 저장소 파일 서명을 반환합니다.
+        """
+        with self._lock:
+            state = _empty_store_state()
+            state.update({k: v for k, v in document.items() if k not in ("shortcuts", "journal_seq")})
+            state["shortcuts"] = {sc["id"]: dict(sc) for sc in document.get("shortcuts", []) if sc.get("id")}
+            self._state = state
+            self._seq += 1 # 스냅샷 자체를 하나의 레코드 번호로 취급
+            self._write_snapshot(self._export_state(), self._seq)
+            self._rewrite_journal_after(self._seq)
+            return store_signature(self)
+
+    def compact_async(self):
+        """현재 상태를 백그라운드 스레드에서 스냅샷으로 기록하고 반영된 저널 레코드를 제거합니다."""
+        with self._lock:
+            if self._compact_thread is not None and self._compact_thread.is_alive():
+                return # 이미 압축 중
+            document = self._export_state() # GUI 스레드에서 얕은 복사만 수행
+            seq = self._seq
+            self._compact_thread = threading.Thread(target=self._compact, args=(document, seq), daemon=True)
+            self._compact_thread.start()
+
+    def compact(self):
+        """
+        현재 상태를 호출한 스레드에서 바로 스냅샷으로 압축합니다 (백그라운드 작업자용).
+        기록 직후의 저장소 파일 서명을 반환합니다 (기록하지 않았거나 실패하면 None).
+        """
+        with self._lock:
+            document = self._export_state()
+            seq = self._seq
+        return self._compact(document, seq)
+
+    def wait_for_compaction(self, timeout=None):
+        """진행 중인 백그라운드 압축과 바이너리 스냅샷 기록이 끝날 때까지 기다립니다."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in (self._compact_thread, self._binary_thread):
+            if thread is not None:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def close(self):
+        """저널 파일 핸들을 닫습니다."""
+        with self._lock:
+            if self._journal_fp is not None:
+                self._journal_fp.close()
+                self._journal_fp = None
+
+    def _compact(self, document, seq):
+        try:
+            if not self._write_snapshot(document, seq):
+                return None # 더 새로운 스냅샷이 이미 기록됨 (저널도 그 기준으로 정리됨)
+            with self._lock:
+                self._rewrite_journal_after(seq)
+                return store_signature(self)
+        except Exception as e:
+            print(f"경고 (저널 압축): 스냅샷 기록 실패: {e}")
+            return None
 
-        response = requests.get(temp_url, headers=headers, timeout=7, allow_redirects=True)
-        response.raise_for_status() # 잘못된 응답(4xx 또는 5xx)에 대해 HTTPError 발생
+    def _export_state(self, state=None, sort=True):
+        """상태(기본값: 내부 상태)를 우선순위로 정렬된 문서 형태로 복사하여 반환합니다."""
+        state = self._state if state is None else state
+        shortcuts = [dict(sc) for sc in state["shortcuts"].values()]
+        if sort:
+            shortcuts.sort(key=priority_sort_key)
+        document = {k: (list(v) if isinstance(v, list) else v) for k, v in state.items() if k != "shortcuts"}
+        document["shortcuts"] = shortcuts
+        return document
+
+    def _write_snapshot(self, document, seq):
+        """
+        임시 파일에 쓴 뒤 이름을 바꿔 스냅샷을 원자적으로 교체합니다.
+        이미 seq 이후의 스냅샷을 기록했으면 쓰지 않고 False를 반환합니다 (늦게 끝난 이전 압축이 덮어쓰지 않도록).
+        """
+        with self._snapshot_lock:
+            if seq <= self._snapshot_seq:
+                return False
+            data_to_save = dict(document)
+            data_to_save["journal_seq"] = seq # 이 번호까지의 저널 레코드가 반영됨
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data_to_save, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.snapshot_path)
+            self._snapshot_seq = seq
 
-        # 다른 도메인으로 리디렉션된 경우 도메인 업데이트
-        final_url_details = urlparse(response.url)
-        if final_url_details.netloc and final_url_details.netloc != current_effective_domain:
-            current_effective_domain = final_url_details.netloc
-            current_safe_filename_base = "".join(c if c.isalnum() or c in ['.', '-'] else '_' for c in current_effective_domain)
-            # 새 도메인에 대해 아이콘이 이미 존재하는지 다시 확인
-            for ext in ['.png', '.ico', '.jpg', '.jpeg', '.gif', '.svg']:
-                potential_path = get_favicon_path(f"{current_safe_filename_base}{ext}")
-                if os.path.exists(potential_path):
-                    return potential_path
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-        icon_url_from_html = None
-
-        # <link rel="icon" ...> 태그 검색
-        for rel_value in ['icon', 'shortcut icon', 'apple-touch-icon', 'apple-touch-icon-precomposed']:
-            for tag in soup.find_all('link', rel=rel_value, href=True):
-                href = tag.get('href')
-                if href and not href.startswith('data:'): # 데이터 URI는 무시
-                    icon_url_from_html = urljoin(response.url, href)
-                    break
-            if icon_url_from_html:
-                break
+            if self.binary_path:
+                # 방금 기록한 JSON의 서명을 함께 저장하여, JSON이 외부에서 편집되면 바이너리를 무시하도록 함
+                try:
+                    write_binary_snapshot(self.binary_path, document, seq, _file_signature(self.snapshot_path))
+                except Exception as e:
+                    print(f"경고 (바이너리 스냅샷): {self.binary_path} 기록 실패: {e}")
+                    try: os.remove(self.binary_path)
+                    except OSError: pass
+            return True
+
+    def _write_binary_only(self, document, seq, json_signature):
+        """JSON은 그대로 두고 바이너리 스냅샷만 기록합니다 (JSON + 저널 seq까지 반영된 상태)."""
+        with self._snapshot_lock:
+            if self._snapshot_seq > 0: # 그 사이 스냅샷을 기록하면서 바이너리도 더 새 내용으로 기록됨
+                return
+            try:
+                write_binary_snapshot(self.binary_path, document, seq, json_signature)
+            except Exception as e:
+                print(f"경고 (바이너리 스냅샷): {self.binary_path} 기록 실패: {e}")
 
-        final_icon_url_to_fetch = icon_url_from_html
-
-        # <link> 태그를 찾지 못했다면 /favicon.ico 시도
-        if not final_icon_url_to_fetch:
-            fallback_ico_url = urljoin(response.url, '/favicon.ico')
-            try: # 다운로드 전에 /favicon.ico가 존재하는지 확인
-                if requests.head(fallback_ico_url, headers=headers, timeout=2, allow_redirects=True).status_code == 200:
-                    final_icon_url_to_fetch = fallback_ico_url
-            except requests.RequestException:
-                pass # /favicon.ico가 존재하지 않거나 확인 중 오류 발생
-
-        if final_icon_url_to_fetch:
-            icon_response = requests.get(final_icon_url_to_fetch, headers=headers, timeout=5, stream=True)
-            icon_response.raise_for_status()
-
-            content_type = icon_response.headers.get('content-type', '').lower()
-            file_ext = '.ico' # 기본 확장자
-            if 'png' in content_type: file_ext = '.png'
-            elif 'jpeg' in content_type or 'jpg' in content_type: file_ext = '.jpg'
-            elif 'gif' in content_type: file_ext = '.gif'
-            elif 'svg' in content_type: file_ext = '.svg'
-            # 필요 시 다른 타입 추가
-
-            favicon_path = get_favicon_path(f"{current_safe_filename_base}{file_ext}")
-            with open(favicon_path, 'wb') as f:
-                for chunk in icon_response.iter_content(8192): # 스트림 다운로드
-                    f.write(chunk)
-            return favicon_path
-
-    except requests.exceptions.SSLError: # http 대체 실행을 위해 SSL 오류를 특정하여 처리
-        if url.startswith("https://"): # 원본이 https였다면 http로 시도
-            print(f"경고 (fetch_favicon): {url}에서 SSL 오류 발생, http로 재시도합니다.")
-            return fetch_favicon(url.replace("https://", "http://", 1))
-    except Exception as e:
-        print(f"경고 (fetch_favicon): {url}에 대한 메인/아이콘 요청 실패: {e}")
+    def _read_binary_snapshot(self):
+        """
+        바이너리 스냅샷이 JSON 스냅샷과 같은 내용일 때(JSON이 그 뒤로 바뀌지 않았을 때) 문서를 반환합니다.
+        사용할 수 없으면 None을 반환하여 JSON을 읽도록 합니다.
+        """
+        if not self.binary_path or not os.path.exists(self.binary_path):
+            return None
+        try:
+            document, seq, json_signature = read_binary_snapshot(self.binary_path)
+        except (OSError, ValueError) as e:
+            print(f"경고 (바이너리 스냅샷): {self.binary_path}을(를) 읽을 수 없어 JSON을 사용합니다: {e}")
+            return None
+        current_signature = _file_signature(self.snapshot_path)
+        if current_signature is not None and current_signature != json_signature:
+            return None # JSON이 외부에서 편집됨 (JSON이 원본)
+        document["journal_seq"] = seq
+        return document
+
+    def _rewrite_journal_after(self, seq):
+        """seq 이후의 레코드만 남기도록 저널을 다시 씁니다. 호출자가 잠금을 보유해야 합니다."""
+        if self._journal_fp is not None:
+            self._journal_fp.close()
+            self._journal_fp = None
+        remaining = [r for r in self._read_journal_records() if r.get("seq", 0) > seq]
+        if not remaining:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            return
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in remaining:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+        os.replace(tmp_path, self.journal_path)
+
+    def _read_journal_records(self):
+        """저널 파일의 레코드를 순서대로 반환합니다. 중간에 잘린 마지막 줄은 무시합니다."""
+        if not os.path.exists(self.journal_path):
+            return []
+        records = []
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line: continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError: # 비정상 종료로 잘린 줄
+                    print(f"경고 (저널): 손상된 저널 레코드를 건너뜁니다: {line[:80]}")
+        return records
 
-    return DEFAULT_FAVICON if os.path.exists(DEFAULT_FAVICON) else None
 
+class SqliteShortcutStore:
+    """
+    바로가기 데이터를 SQLite 데이터베이스에 저장합니다. ShortcutJournalStore와 같은 인터페이스를 가지며,
+    카테고리별 목록과 단축키 충돌 확인을 인덱스 조회로 제공합니다.
+    처음 열 때 기존 shortcuts.json(+ 저널)을 한 번만 가져옵니다.
+    """
+    COLUMNS = ("id", "name", "url", "hotkey", "category", "priority", "icon_path") # 나머지 키는 extra(JSON)에 보관
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS shortcuts (
+            id TEXT PRIMARY KEY,
+            name TEXT, url TEXT, hotkey TEXT, category TEXT,
+            priority TEXT, icon_path TEXT,
+            extra TEXT
+        );
+        CREATE TABLE IF NOT EXISTS categories (name TEXT PRIMARY KEY, position INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+        CREATE INDEX IF NOT EXISTS idx_shortcuts_category ON shortcuts(category, priority);
+        CREATE INDEX IF NOT EXISTS idx_shortcuts_priority ON shortcuts(priority);
+        CREATE INDEX IF NOT EXISTS idx_shortcuts_hotkey ON shortcuts(hotkey);
+        CREATE INDEX IF NOT EXISTS idx_shortcuts_url ON shortcuts(url);
+    """
 
-def load_icon_pixmap(icon_path, icon_size: QSize):
-    """경로에서 아이콘을 로드하여 icon_size로 스케일링된 QIcon을 반환합니다."""
-    if not icon_path : return QIcon() # 경로가 없으면 빈 QIcon 반환
+    def __init__(self, db_path, json_snapshot_path=None, json_journal_path=None):
+        self.db_path = db_path
+        self.json_snapshot_path = json_snapshot_path # 한 번만 가져올 기존 JSON 데이터
+        self.json_journal_path = json_journal_path
+        self._lock = threading.RLock() # GUI 스레드(조회)와 저장 작업자(쓰기)가 연결을 공유
+        self._conn = None
+
+    def has_data(self):
+        """데이터베이스 또는 가져올 JSON 파일이 존재하는지 반환합니다."""
+        return os.path.exists(self.db_path) or bool(self.json_snapshot_path and os.path.exists(self.json_snapshot_path))
+
+    def load(self):
+        """데이터베이스를 열고(필요하면 JSON을 가져온 뒤) 전체 문서를 반환합니다."""
+        return self.read_document()
+
+    def data_paths(self):
+        """이 저장소의 내용이 담긴 파일 경로 목록을 반환합니다 (변경 감지용)."""
+        return [self.db_path, self.db_path + "-wal"]
+
+    def read_document(self):
+        """데이터베이스의 전체 문서를 읽어 반환합니다."""
+        with self._lock:
+            conn = self._connect()
+            self._import_json_once(conn)
+            rows = conn.execute("SELECT * FROM shortcuts ORDER BY priority").fetchall()
+            categories = [r["name"] for r in conn.execute("SELECT name FROM categories ORDER BY position")]
+            document = {"global_show_window_hotkey": "ctrl+shift+x"}
+            for row in conn.execute("SELECT key, value FROM settings WHERE key != 'json_imported'"):
+                document[row["key"]] = json.loads(row["value"])
+            document["categories_order"] = categories
+            document["shortcuts"] = [self._row_to_dict(r) for r in rows]
+            return document
+
+    def append(self, op, **payload):
+        """변경 레코드 하나를 바로 데이터베이스에 반영합니다."""
+        self.append_many([(op, payload)])
+
+    def append_many(self, changes):
+        """(op, payload) 목록을 하나의 트랜잭션으로 반영하고 커밋 직후의 저장소 파일 서명을 반환합니다."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for op, payload in changes:
+                    self._apply(conn, op, payload)
+            return store_signature(self)
+
+    def needs_compaction(self):
+        """SQLite는 별도의 저널 압축이 필요 없습니다."""
+        return False
+
+    def save_snapshot(self, document):
+        """전체 문서로 데이터베이스 내용을 교체하고 커밋 직후의 저장소 파일 서명을 반환합니다."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._replace_all(conn, document)
+            return store_signature(self)
+
+    def compact(self):
+        """SQLite는 별도의 저널 압축이 필요 없습니다 (기록하지 않으므로 None)."""
+
+    def compact_async(self):
+        """SQLite는 별도의 저널 압축이 필요 없습니다."""
+
+    def wait_for_compaction(self, timeout=None):
+        """SQLite는 별도의 저널 압축이 필요 없습니다."""
+
+    def close(self):
+        """데이터베이스 연결을 닫습니다."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def query_shortcuts(self, category=None):
+        """카테고리(None이면 전체)의 바로가기를 우선순위 순으로 반환합니다 (인덱스 조회)."""
+        with self._lock:
+            conn = self._connect()
+            if category is None:
+                rows = conn.execute("SELECT * FROM shortcuts ORDER BY priority").fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM shortcuts WHERE category = ? ORDER BY priority", (category,)).fetchall()
+            return [self._row_to_dict(r) for r in rows]
+
+    def find_by_hotkey(self, hotkey, exclude_id=None):
+        """단축키를 사용하는 바로가기를 반환합니다 (exclude_id는 제외). 없으면 None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM shortcuts WHERE hotkey = ? AND id IS NOT ? LIMIT 1", (hotkey, exclude_id)).fetchone()
+            return self._row_to_dict(row) if row else None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False) # 접근은 self._lock으로 직렬화
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._upgrade_priority_column(conn)
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _upgrade_priority_column(self, conn):
+        """
+        이전 버전의 priority REAL 열을 TEXT로 바꿉니다. REAL 열에서는 숫자처럼 보이는 순위 키가
+        숫자로 변환되므로 테이블을 다시 만듭니다. 옮겨진 float 값은 스키마 v2 마이그레이션이 순위 키로 바꿉니다.
+        """
+        columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(shortcuts)")}
+        if columns.get("priority", "TEXT").upper() == "TEXT":
+            return
+        with conn:
+            conn.execute("DROP INDEX IF EXISTS idx_shortcuts_category") # 인덱스 이름은 테이블 이름을 바꿔도 따라가므로 먼저 제거
+            conn.execute("DROP INDEX IF EXISTS idx_shortcuts_priority")
+            conn.execute("DROP INDEX IF EXISTS idx_shortcuts_hotkey")
+            conn.execute("DROP INDEX IF EXISTS idx_shortcuts_url")
+            conn.execute("ALTER TABLE shortcuts RENAME TO shortcuts_v1")
+            conn.execute("CREATE TABLE shortcuts (id TEXT PRIMARY KEY, name TEXT, url TEXT, hotkey TEXT, category TEXT, "
+                         "priority TEXT, icon_path TEXT, extra TEXT)")
+            conn.execute("INSERT INTO shortcuts SELECT id, name, url, hotkey, category, priority, icon_path, extra FROM shortcuts_v1")
+            conn.execute("DROP TABLE shortcuts_v1")
+
+    def _import_json_once(self, conn):
+        """기존 JSON 데이터(스냅샷 + 저널)를 처음 한 번만 가져옵니다."""
+        if self._get_setting(conn, "json_imported", False):
+            return
+        if self.json_snapshot_path and os.path.exists(self.json_snapshot_path):
+            document = ShortcutJournalStore(self.json_snapshot_path, self.json_journal_path).load()
+            for sc in document["shortcuts"]:
+                if not sc.get("id"): sc["id"] = str(uuid.uuid4()) # 기본 키가 필요하므로 ID가 없으면 여기서 부여
+            with conn:
+                self._replace_all(conn, document)
+            print(f"정보: {self.json_snapshot_path}의 바로가기 {len(document['shortcuts'])}개를 SQLite로 가져왔습니다.")
+        with conn:
+            self._set_setting(conn, "json_imported", True)
+
+    def _apply(self, conn, op, payload):
+        """저널 레코드와 같은 형식의 변경을 SQL로 반영합니다 (apply_journal_record 참고)."""
+        if op in ("add", "update"):
+            self._upsert(conn, payload.get("item") or {})
+        elif op == "delete":
+            conn.execute("DELETE FROM shortcuts WHERE id = ?", (payload.get("id"),))
+        elif op == "patch":
+            row = conn.execute("SELECT * FROM shortcuts WHERE id = ?", (payload.get("id"),)).fetchone()
+            if row is not None:
+                sc = self._row_to_dict(row)
+                sc.update(payload.get("fields") or {})
+                self._upsert(conn, sc)
+        elif op == "recategorize":
+            conn.execute("UPDATE shortcuts SET category = ? WHERE category = ?", (payload.get("to"), payload.get("from")))
+        elif op == "categories":
+            conn.execute("DELETE FROM categories")
+            conn.executemany("INSERT OR REPLACE INTO categories (name, position) VALUES (?, ?)",
+                             [(name, pos) for pos, name in enumerate(payload.get("order") or [])])
+        elif op == "setting":
+            self._set_setting(conn, payload.get("key"), payload.get("value"))
+
+    def _replace_all(self, conn, document):
+        conn.execute("DELETE FROM shortcuts")
+        for sc in document.get("shortcuts", []):
+            if sc.get("id"):
+                self._upsert(conn, sc)
+        self._apply(conn, "categories", {"order": document.get("categories_order", [])})
+        self._set_setting(conn, "global_show_window_hotkey", document.get("global_show_window_hotkey", "ctrl+shift+x"))
+        for key, value in document.items(): # schema_version 등 나머지 최상위 설정
+            if key not in ("shortcuts", "categories_order", "global_show_window_hotkey", "journal_seq"):
+                self._set_setting(conn, key, value)
+
+    def _upsert(self, conn, sc):
+        if not sc.get("id"): return
+        extra = {k: v for k, v in sc.items() if k not in self.COLUMNS}
+        conn.execute("INSERT OR REPLACE INTO shortcuts (id, name, url, hotkey, category, priority, icon_path, extra) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     tuple(sc.get(c) for c in self.COLUMNS) + (json.dumps(extra, ensure_ascii=False) if extra else None,))
+
+    def _row_to_dict(self, row):
+        sc = {c: row[c] for c in self.COLUMNS if row[c] is not None}
+        if row["extra"]:
+            sc.update(json.loads(row["extra"]))
+        return sc
+
+    def _get_setting(self, conn, key, default):
+        row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def _set_setting(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, json.dumps(value, ensure_ascii=False)))
+
+class SettingsCache:
+    """
+    저장소 문서의 설정 부분을 캐시하여 설정 값을 읽을 때마다 파일 전체를 파싱하지 않도록 합니다.
+    이 앱이 기록하는 설정 변경은 update()로 캐시에 바로 반영하므로 기록을 기다리거나 다시 읽지 않습니다.
+    저장소 파일들의 (mtime, 크기) 서명은 외부 변경 감지에만 씁니다: written_signature(주어지면)가 돌려주는
+    이 앱이 마지막으로 기록한 서명과 같으면 다시 읽지 않습니다.
+    """
+    def __init__(self, store, written_signature=None):
+        self.store = store
+        self._written_signature = written_signature
+        self._lock = threading.Lock()
+        self._document = None
+        self._signature = None
+
+    def prime(self, document):
+        """방금 읽은 문서를 현재 파일 서명과 함께 캐시에 넣습니다 (다시 파싱하지 않음)."""
+        with self._lock:
+            self._document = document
+            self._signature = self._current_signature()
+
+    def invalidate(self):
+        with self._lock:
+            self._document = None
+            self._signature = None
+
+    def update(self, values):
+        """이 앱이 기록하는 설정 값({키: 값})을 캐시에 반영합니다 (저장 작업자가 기록하기 전이어도 최신 값을 돌려주도록)."""
+        with self._lock:
+            self._document_locked().update(values)
+
+    def document(self):
+        """캐시된 문서를 반환합니다. 파일이 외부에서 바뀌었으면 다시 읽습니다. 읽을 수 없으면 빈 dict."""
+        with self._lock:
+            return self._document_locked()
+
+    def _document_locked(self):
+        signature = self._current_signature()
+        if self._document is not None and signature != self._signature and self._written_signature is not None \
+                and signature == self._written_signature():
+            self._signature = signature # 이 앱이 기록한 결과: 변경은 이미 update()로 반영됨
+        if self._document is None or signature != self._signature:
+            try:
+                self._document = self.store.read_document() if self.store.has_data() else {}
+                self._document.pop("shortcuts", None) # 설정만 캐시 (바로가기 목록은 보관하지 않음)
+            except (OSError, ValueError, sqlite3.Error) as e: # 손상된 JSON(JSONDecodeError 포함) 또는 DB 오류
+                print(f"경고 (SettingsCache): 설정을 읽을 수 없습니다: {e}")
+                self._document = {}
+            self._signature = signature
+        return self._document
+
+    def get(self, key, default=None):
+        return self.document().get(key, default)
+
+    def get_str(self, key, default=""):
+        value = self.get(key, default)
+        return value if isinstance(value, str) else default
+
+    def get_list(self, key, default=None):
+        value = self.get(key)
+        if isinstance(value, list):
+            return list(value)
+        return list(default) if default is not None else []
+
+    def _current_signature(self):
+        return store_signature(self.store)
+
+def store_signature(store):
+    """저장소 파일들의 ((경로, mtime_ns, 크기), ...) 서명을 반환합니다. 없는 파일은 (경로, None, None)."""
+    signature = []
+    for path in store.data_paths():
+        try:
+            st = os.stat(path)
+            signature.append((path, st.st_mtime_ns, st.st_size))
+        except OSError: # 파일 없음
+            signature.append((path, None, None))
+    return tuple(signature)
 
-    # 경로가 절대 경로인지 FAVICON_DIR에 대한 상대 경로인지 결정
-    final_path = icon_path
-    if not os.path.isabs(icon_path):
-        final_path = get_favicon_path(os.path.basename(icon_path))
+def create_shortcut_store():
+    """STORAGE_BACKEND 설정에 따라 바로가기 저장소를 생성합니다."""
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteShortcutStore(SQLITE_FILE, SETTINGS_FILE, JOURNAL_FILE)
+    return ShortcutJournalStore(SETTINGS_FILE, JOURNAL_FILE, binary_path=SNAPSHOT_BIN_FILE)
 
-    if os.path.exists(final_path):
-        px = QPixmap(final_path)
-        if not px.isNull():
-            return QIcon(px.scaled(icon_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-    return QIcon() # 로딩 실패 또는 경로가 존재하지 않으면 빈 QIcon 반환
+
+class PersistenceWorker(threading.Thread):
+    """
+    저장소 쓰기를 전담하는 백그라운드 스레드입니다.
+    GUI 스레드는 변경 알림만 넣고 즉시 반환하며, 작업자는 디바운스 구간(PERSIST_DEBOUNCE_TIME) 동안
+    쌓인 변경을 모아 한 번에 기록합니다. 저널 압축도 이 스레드에서 수행됩니다.
+    """
+    def __init__(self, store, debounce_time=PERSIST_DEBOUNCE_TIME, on_error=None):
+        super().__init__(name="PersistenceWorker", daemon=True)
+        self.store = store
+        self.debounce_time = debounce_time
+        self.on_error = on_error # 쓰기 실패 시 오류 메시지로 호출됨 (작업자 스레드에서 호출)
+        self._cond = threading.Condition()
+        self._pending_changes = [] # 아직 기록되지 않은 (op, payload) 목록
+        self._pending_snapshot = None # 아직 기록되지 않은 전체 문서
+        self._first_dirty_time = None # 현재 디바운스 구간의 시작 시각
+        self._flush_requested = False
+        self._writing = False
+        self._stopping = False
+        self._written_signature = None # 마지막 기록 직후의 저장소 파일 서명 (자신의 쓰기 구분용)
+
+    def submit(self, op, **payload):
+        """변경 레코드 하나를 대기열에 넣습니다."""
+        # 호출자가 이후에 수정할 수 있는 dict/list는 복사하여 보관 (기록은 다른 스레드에서 일어남)
+        payload = {k: dict(v) if isinstance(v, dict) else list(v) if isinstance(v, list) else v
+                   for k, v in payload.items()}
+        with self._cond:
+            self._pending_changes.append((op, payload))
+            self._mark_dirty_locked()
+
+    def submit_snapshot(self, document):
+        """
+        전체 문서 저장을 예약합니다. 문서는 전체 상태를 담고 있으므로
+        그 이전에 대기 중이던 변경 레코드는 버립니다.
+        """
+        with self._cond:
+            self._pending_changes.clear()
+            self._pending_snapshot = document
+            self._mark_dirty_locked()
+
+    def has_pending_writes(self):
+        """기록 대기 중이거나 기록 중인 변경이 있는지 반환합니다."""
+        with self._cond:
+            return self._writing or self._pending_snapshot is not None or bool(self._pending_changes)
+
+    def written_signature(self):
+        """이 작업자가 마지막으로 기록한 직후의 저장소 파일 서명을 반환합니다 (기록한 적 없으면 None)."""
+        with self._cond:
+            return self._written_signature
+
+    def request_flush(self):
+        """디바운스 구간을 기다리지 않고 즉시 기록하도록 요청합니다 (대기하지 않음)."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """대기 중인 변경을 즉시 기록하고 끝날 때까지 기다립니다. 완료되면 True를 반환합니다."""
+        self.request_flush()
+        return self.wait_until_idle(timeout)
+
+    def wait_until_idle(self, timeout=None):
+        """대기 중인 쓰기가 모두 끝날 때까지 기다립니다. 시간 초과 시 False를 반환합니다."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._writing or self._pending_snapshot is not None or self._pending_changes:
+                if not self.is_alive(): # 작업자가 없으면 기다려도 소용없음
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self, timeout=None):
+        """대기 중인 변경을 기록한 뒤 작업자를 종료합니다. 모두 기록되었으면 True를 반환합니다."""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.join(timeout)
+        return flushed
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and self._first_dirty_time is None:
+                    self._cond.wait()
+                if self._stopping and self._first_dirty_time is None:
+                    return
+                # 디바운스 구간이 끝나거나 즉시 기록이 요청될 때까지 변경을 계속 모음
+                while not (self._flush_requested or self._stopping):
+                    remaining = self._first_dirty_time + self.debounce_time - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                changes, self._pending_changes = self._pending_changes, []
+                snapshot, self._pending_snapshot = self._pending_snapshot, None
+                self._first_dirty_time = None
+                self._flush_requested = False
+                self._writing = True
+            signature = None
+            try:
+                signature = self._write(snapshot, changes)
+            finally:
+                with self._cond:
+                    if signature is not None: # 저장소가 쓰기 직후에 잰 서명 (나중에 다시 재면 그 사이의 외부 변경이 섞임)
+                        self._written_signature = signature
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _mark_dirty_locked(self):
+        if self._first_dirty_time is None:
+            self._first_dirty_time = time.monotonic()
+        self._cond.notify_all()
+
+    def _write(self, snapshot, changes):
+        """대기 중인 변경을 기록하고 마지막 쓰기 직후의 저장소 파일 서명을 반환합니다 (실패하면 None)."""
+        try:
+            signature = None
+            if snapshot is not None:
+                signature = self.store.save_snapshot(snapshot)
+            if changes:
+                signature = self.store.append_many(changes)
+                if self.store.needs_compaction():
+                    signature = self.store.compact() or signature # 이미 백그라운드 스레드이므로 바로 압축
+            return signature
+        except Exception as e:
+            print(f"경고 (PersistenceWorker): 데이터 저장 실패: {e}")
+            if self.on_error:
+                self.on_error(str(e))
+            return None
+
+
+def _rank_integer_length(head):
+    """순위 키 정수부의 길이(머리 문자 포함)를 반환합니다. 'a'~'z'는 0 이상(2~27자), 'Z'~'A'는 음수입니다."""
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"잘못된 순위 키 머리 문자: {head!r}")
+
+def _rank_split(key):
+    """순위 키를 (정수부, 소수부)로 나눕니다."""
+    length = _rank_integer_length(key[0])
+    if length > len(key):
+        raise ValueError(f"잘못된 순위 키: {key!r}")
+    return key[:length], key[length:]
+
+def _rank_increment_integer(integer):
+    """정수부에 1을 더합니다. 자리가 넘치면 머리 문자를 바꿔 한 자리 늘립니다. 더 늘릴 수 없으면 None."""
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        value = RANK_DIGITS.index(digits[i]) + 1
+        if value < len(RANK_DIGITS):
+            digits[i] = RANK_DIGITS[value]
+            return head + "".join(digits)
+        digits[i] = RANK_DIGITS[0]
+    if head == "Z": return "a" + RANK_DIGITS[0] # -1 -> 0
+    if head == "z": return None
+    head = chr(ord(head) + 1)
+    if head > "a": digits.append(RANK_DIGITS[0])
+    else: digits.pop()
+    return head + "".join(digits)
+
+def _rank_decrement_integer(integer):
+    """정수부에서 1을 뺍니다. 더 줄일 수 없으면 None."""
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        value = RANK_DIGITS.index(digits[i]) - 1
+        if value >= 0:
+            digits[i] = RANK_DIGITS[value]
+            return head + "".join(digits)
+        digits[i] = RANK_DIGITS[-1]
+    if head == "a": return "Z" + RANK_DIGITS[-1] # 0 -> -1
+    if head == "A": return None
+    head = chr(ord(head) - 1)
+    if head < "Z": digits.append(RANK_DIGITS[-1])
+    else: digits.pop()
+    return head + "".join(digits)
+
+def _rank_midpoint(a, b):
+    """소수부 a < b(b가 None이면 무한대) 사이의 소수부를 반환합니다. 둘 다 '0'으로 끝나지 않아야 합니다."""
+    if b is not None:
+        n = 0 # 공통 접두사 (a는 '0'으로 채워 비교)
+        while n < len(b) and (a[n] if n < len(a) else RANK_DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _rank_midpoint(a[n:], b[n:])
+    digit_a = RANK_DIGITS.index(a[0]) if a else 0
+    digit_b = RANK_DIGITS.index(b[0]) if b is not None else len(RANK_DIGITS)
+    if digit_b - digit_a > 1: # 첫 자리 사이에 빈 숫자가 있으면 한 글자로 충분
+        return RANK_DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return RANK_DIGITS[digit_a] + _rank_midpoint(a[1:], None)
+
+def is_rank_key(value):
+    """유효한 순위 키(머리 문자에 맞는 정수부 + '0'으로 끝나지 않는 소수부)인지 반환합니다."""
+    if not isinstance(value, str) or not value:
+        return False
+    try:
+        integer, fraction = _rank_split(value)
+    except ValueError:
+        return False
+    return all(c in RANK_DIGITS for c in value[1:]) and not fraction.endswith(RANK_DIGITS[0])
+
+def rank_between(before, after):
+    """
+    두 순위 키 사이에 들어갈 새 키를 반환합니다. before가 None이면 맨 앞, after가 None이면 맨 뒤입니다.
+    이웃 키는 바뀌지 않으므로 순서 변경은 항상 항목 하나만 기록합니다.
+    맨 앞/맨 뒤는 정수부를 1씩 줄이거나 늘리므로 키 길이가 로그 수준으로만 늘어납니다.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"순위 키 순서가 잘못되었습니다: {before!r} >= {after!r}")
+    if before is None:
+        if after is None:
+            return RANK_FIRST
+        integer, fraction = _rank_split(after)
+        if integer == RANK_SMALLEST_INTEGER:
+            return integer + _rank_midpoint("", fraction)
+        if integer < after:
+            return integer # after에 소수부가 있으면 정수부만으로 앞에 둘 수 있음
+        decremented = _rank_decrement_integer(integer)
+        if decremented is None:
+            raise ValueError("순위 키 공간을 모두 사용했습니다.")
+        return decremented
+    integer, fraction = _rank_split(before)
+    if after is None:
+        incremented = _rank_increment_integer(integer)
+        return integer + _rank_midpoint(fraction, None) if incremented is None else incremented
+    after_integer, after_fraction = _rank_split(after)
+    if integer == after_integer:
+        return integer + _rank_midpoint(fraction, after_fraction)
+    incremented = _rank_increment_integer(integer)
+    if incremented is not None and incremented < after:
+        return incremented
+    return integer + _rank_midpoint(fraction, None)
+
+def sequential_ranks(count):
+    """RANK_FIRST부터 연속된 정수부 키 count개를 만듭니다 (재배치용: a0..az, b00.. 처럼 가장 짧은 키)."""
+    ranks = []
+    key = RANK_FIRST
+    for _ in range(count):
+        ranks.append(key)
+        key = _rank_increment_integer(key)
+    return ranks
+
+def rank_from_float(value):
+    """
+    float 우선순위를 같은 대소 순서의 순위 키로 바꿉니다.
+    IEEE 754 비트 패턴을 순서 보존 정수로 바꾼 뒤 11자리 정수부('k' 머리 문자)로 씁니다.
+    """
+    bits = struct.unpack(">Q", struct.pack(">d", float(value)))[0]
+    bits = bits ^ 0xFFFFFFFFFFFFFFFF if bits >> 63 else bits | (1 << 63) # 음수는 뒤집고 양수는 부호 비트 설정
+    digits = []
+    for _ in range(11): # 62^11 > 2^64
+        bits, digit = divmod(bits, len(RANK_DIGITS))
+        digits.append(RANK_DIGITS[digit])
+    return "k" + "".join(reversed(digits))
+
+def coerce_rank(value):
+    """순위 키, float/정수, 숫자 문자열을 순위 키로 바꿉니다. 바꿀 수 없으면 None."""
+    if is_rank_key(value):
+        return value
+    if isinstance(value, bool): return None
+    try:
+        return rank_from_float(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def _migrate_v1_item_integrity(sc, idx, document):
+    """v1: ID, 카테고리, float 우선순위를 보장합니다 (이전의 시작 시 무결성 검사)."""
+    if not sc.get("id"): # 고유 ID 보장
+        sc["id"] = str(uuid.uuid4())
+    if "category" not in sc: # 카테고리 보장
+        categories = document.get("categories_order") or []
+        sc["category"] = categories[0] if categories else "일반"
+    if "priority" not in sc: # 순서 지정을 위한 우선순위 보장
+        sc["priority"] = float(idx + 1.0) # 간단한 증분 우선순위 할당
+    elif not isinstance(sc["priority"], float): # 우선순위가 float인지 보장
+        try: sc["priority"] = float(sc["priority"])
+        except (TypeError, ValueError): sc["priority"] = float(idx + 1.0)
+
+def _migrate_v2_rank_keys(sc, idx, document):
+    """v2: float 우선순위를 같은 순서의 문자열 순위 키로 바꿉니다 (12자 키는 이후 재배치에서 짧아짐)."""
+    priority = sc.get("priority")
+    if not is_rank_key(priority):
+        sc["priority"] = coerce_rank(priority) or rank_from_float(float(idx + 1))
+
+# (버전, 항목별 마이그레이션 함수) 목록. 버전 순서대로 추가하며, 각 단계는 파일마다 한 번만 실행됩니다.
+# 함수 시그니처: step(바로가기 dict, 목록 내 위치, 문서 dict)
+SCHEMA_MIGRATIONS = [
+    (1, _migrate_v1_item_integrity),
+    (2, _migrate_v2_rank_keys),
+]
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+def migrate_document(document):
+    """
+    문서의 schema_version 이후의 마이그레이션 단계들을 한 번의 순회로 적용하고 버전을 기록합니다.
+    이미 최신 버전이면 항목을 전혀 검사하지 않습니다. 변경이 있었으면 True를 반환합니다.
+    """
+    version = document.get("schema_version", 0)
+    pending_steps = [step for step_version, step in SCHEMA_MIGRATIONS if step_version > version]
+    if not pending_steps:
+        return False
+    for idx, sc in enumerate(document.get("shortcuts", [])): # 항목마다 남은 단계를 순서대로 적용
+        for step in pending_steps:
+            step(sc, idx, document)
+    document["schema_version"] = SCHEMA_VERSION
+    return True
+
+def priority_sort_key(sc):
+    """
+    바로가기 정렬 키를 반환합니다. 우선순위가 같으면 ID로 순서를 고정합니다.
+    마이그레이션 전의 float 우선순위도 같은 순서의 순위 키로 비교하고, 없으면 맨 뒤로 보냅니다.
+    """
+    priority = sc.get('priority')
+    if not isinstance(priority, str):
+        priority = coerce_rank(priority) if priority is not None else None
+    return (priority or RANK_MISSING, sc.get('id', ''))
+
+def url_domain(url):
+    """URL의 도메인(소문자 netloc)을 반환합니다. 없으면 빈 문자열."""
+    return urlparse(url or "").netloc.lower()
+
+class ShortcutIndex:
+    """
+    메모리 내 바로가기 인덱스입니다. 모든 변경을 이 클래스의 메서드로 수행하면
+    ID, 카테고리, 단축키, 도메인별 조회가 O(1) 또는 O(log n)으로 유지됩니다.
+    - by_id: {id: 바로가기 dict} (삽입 순서 유지)
+    - 카테고리별(및 전체) (정렬 키, id) 정렬 목록
+    - by_hotkey: {hotkey: {id, ...}}, by_domain: {domain: {id, ...}}
+    - icon_refs: {아이콘 경로: 참조하는 바로가기 수} (참조가 없는 아이콘 파일 정리용)
+    - max_priority: 지금까지의 최대 순위 키 (삭제 시 줄어들지 않는 상한값, 없으면 "")
+    """
+    def __init__(self, records=None):
+        self.rebuild(records or [])
+
+    def rebuild(self, records):
+        """전체 목록으로 인덱스를 다시 만듭니다 (로드 시 한 번 사용)."""
+        self.by_id = {}
+        self.by_hotkey = {}
+        self.by_domain = {}
+        self.icon_refs = Counter()
+        self._sorted_all = [] # [(정렬 키, id)]
+        self._sorted_by_category = {} # {카테고리: [(정렬 키, id)]}
+        self.max_priority = ""
+        for sc in records:
+            self.by_id[sc["id"]] = sc
+            self._index_fields(sc)
+        self._sorted_all = sorted((priority_sort_key(sc), sc["id"]) for sc in records)
+        for entry in self._sorted_all:
+            category = self.by_id[entry[1]].get("category")
+            self._sorted_by_category.setdefault(category, []).append(entry)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def records(self):
+        """모든 바로가기 dict 목록을 (삽입 순서로) 반환합니다."""
+        return list(self.by_id.values())
+
+    def get(self, shortcut_id):
+        return self.by_id.get(shortcut_id)
+
+    def all_sorted(self):
+        """전체 바로가기를 우선순위 순으로 반환합니다."""
+        return [self.by_id[sid] for _, sid in self._sorted_all]
+
+    def in_category(self, category):
+        """카테고리의 바로가기를 우선순위 순으로 반환합니다."""
+        return [self.by_id[sid] for _, sid in self._sorted_by_category.get(category, [])]
+
+    def has_category(self, category):
+        return bool(self._sorted_by_category.get(category))
+
+    def find_by_hotkey(self, hotkey, exclude_id=None):
+        """단축키를 사용하는 바로가기를 반환합니다 (exclude_id 제외). 없으면 None."""
+        for sid in self.by_hotkey.get(hotkey, ()):
+            if sid != exclude_id:
+                return self.by_id[sid]
+        return None
+
+    def ids_for_domain(self, domain):
+        return set(self.by_domain.get(domain.lower(), ()))
+
+    def next_priority(self):
+        """새 항목을 맨 뒤에 두기 위한 순위 키를 반환합니다."""
+        return rank_between(self.max_priority or None, None)
+
+    def diff(self, records):
+        """
+        새 전체 목록과 현재 인덱스를 ID 기준으로 비교합니다.
+        반환 값: (추가된 항목 목록, 삭제된 항목 목록, 바뀐 (이전, 새) 쌍 목록)
+        """
+        added, changed = [], []
+        seen = set()
+        for sc in records:
+            seen.add(sc["id"])
+            old = self.by_id.get(sc["id"])
+            if old is None:
+                added.append(sc)
+            elif old != sc:
+                changed.append((old, sc))
+        removed = [sc for sid, sc in self.by_id.items() if sid not in seen]
+        return added, removed, changed
+
+    def add(self, sc):
+        self.by_id[sc["id"]] = sc
+        self._index_fields(sc)
+        self._insert_sorted(sc)
+
+    def remove(self, shortcut_id):
+        """항목을 제거하고 반환합니다. 없으면 None."""
+        sc = self.by_id.pop(shortcut_id, None)
+        if sc is not None:
+            self._unindex_fields(sc)
+            self._remove_sorted(sc)
+        return sc
+
+    def replace(self, sc):
+        """같은 ID의 항목을 새 dict로 교체합니다 (삽입 순서 유지)."""
+        old = self.by_id.get(sc["id"])
+        if old is None:
+            self.add(sc)
+            return
+        self._unindex_fields(old)
+        self._remove_sorted(old)
+        self.by_id[sc["id"]] = sc
+        self._index_fields(sc)
+        self._insert_sorted(sc)
+
+    def set_priority(self, shortcut_id, priority):
+        sc = self.by_id.get(shortcut_id)
+        if sc is None: return None
+        self._remove_sorted(sc)
+        sc["priority"] = priority
+        self._insert_sorted(sc)
+        self._raise_max_priority(sc)
+        return sc
+
+    def set_icon_path(self, shortcut_id, icon_path):
+        """항목의 아이콘 경로를 바꾸고 이전 경로를 반환합니다 (참조 수 갱신)."""
+        sc = self.by_id.get(shortcut_id)
+        if sc is None: return None
+        old_path = sc.get("icon_path")
+        self._release_icon(old_path)
+        sc["icon_path"] = icon_path
+        if icon_path: self.icon_refs[resolve_icon_path(icon_path)] += 1
+        return old_path
+
+    def referenced_icons(self):
+        """바로가기가 참조하는 아이콘 경로 집합을 반환합니다."""
+        return set(self.icon_refs)
+
+    def set_category(self, shortcut_id, category):
+        sc = self.by_id.get(shortcut_id)
+        if sc is None: return None
+        self._remove_sorted(sc)
+        sc["category"] = category
+        self._insert_sorted(sc)
+        return sc
+
+    def recategorize(self, from_category, to_category):
+        """from_category의 모든 항목을 to_category로 옮깁니다. 옮겨진 항목 수를 반환합니다."""
+        moved = self._sorted_by_category.pop(from_category, [])
+        if not moved or from_category == to_category:
+            if moved: self._sorted_by_category[from_category] = moved
+            return 0
+        for _, sid in moved:
+            self.by_id[sid]["category"] = to_category
+        target = self._sorted_by_category.get(to_category, [])
+        self._sorted_by_category[to_category] = list(heapq.merge(target, moved)) # 정렬된 두 목록 병합
+        return len(moved)
+
+    def _index_fields(self, sc):
+        hotkey = sc.get("hotkey")
+        if hotkey:
+            self.by_hotkey.setdefault(hotkey, set()).add(sc["id"])
+        domain = url_domain(sc.get("url"))
+        if domain:
+            self.by_domain.setdefault(domain, set()).add(sc["id"])
+        if sc.get("icon_path"):
+            self.icon_refs[resolve_icon_path(sc["icon_path"])] += 1
+        self._raise_max_priority(sc)
+
+    def _raise_max_priority(self, sc):
+        priority = priority_sort_key(sc)[0]
+        if priority != RANK_MISSING and priority > self.max_priority:
+            self.max_priority = priority
+
+    def _unindex_fields(self, sc):
+        for mapping, key in ((self.by_hotkey, sc.get("hotkey")), (self.by_domain, url_domain(sc.get("url")))):
+            ids = mapping.get(key)
+            if ids is not None:
+                ids.discard(sc["id"])
+                if not ids: del mapping[key]
+        self._release_icon(sc.get("icon_path"))
+
+    def _release_icon(self, icon_path):
+        if not icon_path: return
+        path = resolve_icon_path(icon_path)
+        self.icon_refs[path] -= 1
+        if self.icon_refs[path] <= 0: del self.icon_refs[path]
+
+    def _insert_sorted(self, sc):
+        entry = (priority_sort_key(sc), sc["id"])
+        bisect.insort(self._sorted_all, entry)
+        bisect.insort(self._sorted_by_category.setdefault(sc.get("category"), []), entry)
+
+    def _remove_sorted(self, sc):
+        entry = (priority_sort_key(sc), sc["id"])
+        for entries in (self._sorted_all, self._sorted_by_category.get(sc.get("category"))):
+            if not entries: continue
+            pos = bisect.bisect_left(entries, entry)
+            if pos < len(entries) and entries[pos] == entry:
+                del entries[pos]
+        if not self._sorted_by_category.get(sc.get("category"), True):
+            del self._sorted_by_category[sc.get("category")]
+
+
+def normalize_url_for_dedupe(url):
+    """
+    중복 판별용 URL 키를 반환합니다. 스킴(http/https), 대소문자, 'www.', 기본 포트,
+    프래그먼트, 경로 끝의 '/' 차이는 같은 주소로 봅니다.
+    """
+    parsed = urlparse((url or "").strip())
+    if not parsed.netloc: # 스킴 없는 주소 또는 file: 경로
+        if parsed.scheme == "file":
+            return "file:" + parsed.path.replace("\\", "/").lower()
+        parsed = urlparse("http://" + (url or "").strip())
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    port = parsed.port if parsed.port not in (None, 80, 443) else None
+    path = parsed.path.rstrip("/")
+    key = f"{host}:{port}{path}" if port else f"{host}{path}"
+    return f"{key}?{parsed.query}" if parsed.query else key
+
+class _NetscapeBookmarkParser(HTMLParser):
+    """Netscape 북마크 HTML의 폴더(H3)와 링크(A)를 읽습니다. 파싱된 항목은 self.records에 쌓입니다."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records = [] # [(이름, URL, [폴더 경로])]
+        self._folders = [] # 열린 <DL>마다 폴더 이름 (이름 없는 목록은 None)
+        self._pending_folder = None # 다음 <DL>에 붙을 폴더 이름
+        self._text = None # 현재 <H3>/<A> 안의 텍스트
+        self._href = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "dl":
+            self._folders.append(self._pending_folder)
+            self._pending_folder = None
+        elif tag == "h3":
+            self._text = []
+        elif tag == "a":
+            self._href = dict(attrs).get("href")
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag == "dl":
+            if self._folders: self._folders.pop()
+        elif tag == "h3" and self._text is not None:
+            self._pending_folder = "".join(self._text).strip()
+            self._text = None
+        elif tag == "a" and self._text is not None:
+            if self._href:
+                self.records.append(("".join(self._text).strip(), self._href, [f for f in self._folders if f]))
+            self._text = None
+            self._href = None
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+def iter_netscape_bookmarks(path, chunk_size=64 * 1024):
+    """Netscape 북마크 HTML(브라우저 내보내기 형식)을 조각 단위로 읽으며 (이름, URL, 폴더 경로)를 생성합니다."""
+    parser = _NetscapeBookmarkParser()
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk: break
+            parser.feed(chunk)
+            yield from parser.records
+            parser.records.clear()
+    parser.close()
+    yield from parser.records
+
+def iter_browser_json_bookmarks(path):
+    """
+    Chrome(Bookmarks 파일) 또는 Firefox(백업 .json) 북마크 JSON에서 (이름, URL, 폴더 경로)를 생성합니다.
+    JSON은 한 번에 읽지만 트리는 스택으로 순회하며 항목을 하나씩 내보냅니다.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and isinstance(data.get("roots"), dict): # Chrome/Edge
+        stack = [(node, []) for node in reversed(list(data["roots"].values())) if isinstance(node, dict)]
+    else: # Firefox 백업: 루트가 폴더 노드
+        stack = [(data, [])]
+    while stack:
+        node, folders = stack.pop()
+        url = node.get("url") or node.get("uri") # Chrome: url, Firefox: uri
+        if url:
+            yield (node.get("name") or node.get("title") or "", url, folders)
+            continue
+        children = node.get("children")
+        if isinstance(children, list):
+            name = node.get("name") or node.get("title") or ""
+            child_folders = folders + [name] if name else folders
+            stack.extend((child, child_folders) for child in reversed(children) if isinstance(child, dict))
+
+def iter_csv_bookmarks(path):
+    """
+    CSV에서 (이름, URL, 폴더 경로, 단축키)를 생성합니다. 헤더(name/title, url, category/folder, hotkey)가
+    있으면 그 열을 쓰고, 없으면 '이름, URL, 카테고리' 순서로 봅니다.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None: return
+        columns = {name.strip().lower(): idx for idx, name in enumerate(header)}
+        def col(*names):
+            return next((columns[n] for n in names if n in columns), None)
+        url_col = col("url", "href", "link", "주소")
+        if url_col is None: # 헤더 없음: 첫 줄도 데이터
+            name_col, url_col, category_col, hotkey_col = 0, 1, 2, None
+            rows = itertools.chain([header], reader)
+        else:
+            name_col, category_col, hotkey_col = col("name", "title", "이름"), col("category", "folder", "카테고리"), col("hotkey", "단축키")
+            rows = reader
+        for row in rows:
+            def cell(idx):
+                return row[idx].strip() if idx is not None and idx < len(row) else ""
+            url = cell(url_col)
+            if url:
+                category = cell(category_col)
+                yield (cell(name_col), url, [category] if category else [], cell(hotkey_col))
+
+def iter_bookmark_file(path):
+    """파일 형식(확장자, 내용)에 맞는 파서를 골라 (이름, URL, 폴더 경로, 단축키)를 생성합니다."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from iter_csv_bookmarks(path)
+        return
+    if ext not in (".html", ".htm", ".json"): # 확장자가 없으면 첫 글자로 판단 (Chrome Bookmarks 파일 등)
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            head = f.read(512).lstrip()
+        ext = ".json" if head.startswith(("{", "[")) else ".html"
+    records = iter_browser_json_bookmarks(path) if ext == ".json" else iter_netscape_bookmarks(path)
+    for name, url, folders in records:
+        yield (name, url, folders, "")
+
+def bookmark_category(folders, default_category):
+    """폴더 경로에서 카테고리 이름을 정합니다. 브라우저 최상위 폴더를 제외한 가장 안쪽 폴더를 씁니다."""
+    for folder in reversed(folders):
+        if folder.strip().lower() in BOOKMARK_ROOT_FOLDERS: continue
+        if folder in (ALL_CATEGORY_NAME, ADD_CATEGORY_TAB_TEXT): break # 예약된 탭 이름
+        return folder.strip()
+    return default_category
+
+def favicon_cache_domain(url):
+    """fetch_favicon이 아이콘 파일 이름에 쓰는 도메인(netloc)을 반환합니다. 스킴 없는 주소도 처리합니다."""
+    parsed = urlparse(url or "")
+    if not parsed.netloc and parsed.scheme != "file":
+        parsed = urlparse("http://" + (url or ""))
+    return parsed.netloc
+
+def favicon_site_key(url):
+    """호스트별 동시 요청 제한에 쓰는 사이트 키(호스트 이름의 마지막 두 단계)를 반환합니다."""
+    host = urlparse(url if "://" in (url or "") else "http://" + (url or "")).hostname or ""
+    return ".".join(host.split(".")[-2:])
+
+class FaviconRefreshEngine:
+    """
+    여러 도메인의 파비콘을 스레드 풀에서 동시에 다시 가져옵니다.
+    - 같은 도메인의 바로가기는 한 번만 가져와 결과를 모든 항목에 적용합니다.
+    - 전체 동시 실행 수(concurrency)와 사이트별 동시 실행 수(per_host_limit)를 제한합니다.
+      한도에 걸린 사이트의 작업은 뒤로 미루고 다른 사이트의 작업을 먼저 실행합니다.
+    - 도메인마다 FAVICON_FETCH_BUDGET_SECONDS초의 시간 예산 안에서 가져옵니다.
+    - cancel() 이후에는 새 작업을 시작하지 않고, 진행 중인 요청도 다음 확인 시점에 멈춥니다 (결과는 반영하지 않음).
+    - 캐시된 아이콘은 지우지 않고 조건부 요청으로 재검증하므로 바뀌지 않은 사이트는 거의 전송하지 않습니다.
+    콜백은 모두 작업자 스레드에서 호출되므로 시그널로 연결해야 합니다:
+      on_result(바로가기 ID 목록, 아이콘 경로), on_progress(완료 수, 전체 수), on_finished(취소 여부, 변경 없는 도메인 수)
+    on_finished 호출 전에 이번 실행 동안의 HTTP 요청/연결 재사용 통계를 http_stats에 기록합니다.
+    """
+    def __init__(self, jobs, on_result, on_progress, on_finished,
+                 concurrency=FAVICON_REFRESH_CONCURRENCY, per_host_limit=FAVICON_PER_HOST_CONCURRENCY):
+        self.jobs = list(jobs) # [(대표 URL, [바로가기 ID, ...])]
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self._cond = threading.Condition()
+        self._cancelled = False
+        self._cancel_token = FaviconBudget(seconds=float('inf')) # 진행 중인 요청에 취소를 알림
+        self._running = 0
+        self._done = 0
+        self._not_modified = 0
+        self._active_per_site = Counter()
+        self._thread = None
+        self.http_stats = None
+
+    @classmethod
+    def for_shortcuts(cls, shortcuts, **kwargs):
+        """바로가기 목록을 도메인별 작업으로 묶어 엔진을 만듭니다 (URL이 없거나 로컬 파일인 항목 제외)."""
+        groups = {}
+        for sc in shortcuts:
+            url = sc.get("url")
+            domain = favicon_cache_domain(url)
+            if not url or not domain: continue
+            groups.setdefault(domain, (url, []))[1].append(sc["id"])
+        return cls(groups.values(), **kwargs)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="FaviconRefreshEngine", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """아직 시작하지 않은 작업을 취소하고 진행 중인 요청을 중단시킵니다."""
+        self._cancel_token.cancel()
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """엔진이 끝날 때까지 기다립니다. 끝났으면 True를 반환합니다."""
+        if self._thread is None: return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        pending = deque(self.jobs)
+        stats_before = favicon_http.stats()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="FaviconRefresh") as pool:
+            with self._cond:
+                while self._running or (pending and not self._cancelled):
+                    if not self._cancelled:
+                        # 사이트 한도에 걸린 작업은 뒤로 돌리고 실행 가능한 작업을 채움
+                        for _ in range(len(pending)):
+                            if self._running >= self.concurrency: break
+                            url, ids = pending.popleft()
+                            site = favicon_site_key(url)
+                            if self._active_per_site[site] >= self.per_host_limit:
+                                pending.append((url, ids))
+                                continue
+                            self._active_per_site[site] += 1
+                            self._running += 1
+                            pool.submit(self._fetch, url, ids, site)
+                    self._cond.wait()
+            cancelled = self._cancelled
+        stats_after = favicon_http.stats() # 대기열 작업자의 요청도 섞일 수 있으므로 근사치
+        self.http_stats = {key: stats_after[key] - stats_before[key] for key in stats_after}
+        print(f"정보 (FaviconRefreshEngine): HTTP 요청 {self.http_stats['requests']}회, "
+              f"새 연결 {self.http_stats['new_connections']}개, 연결 재사용 {self.http_stats['reused_connections']}회")
+        self.on_finished(cancelled, self._not_modified)
+
+    def _fetch(self, url, ids, site):
+        icon_path = None
+        status = FAVICON_FAILED
+        try:
+            icon_path, status = refresh_favicon(url, FaviconBudget(parent=self._cancel_token))
+        except Exception as e: # 한 도메인의 실패가 전체 새로고침을 멈추지 않도록 함
+            print(f"경고 (FaviconRefreshEngine): {url} 파비콘 가져오기 실패: {e}")
+        finally:
+            with self._cond:
+                self._active_per_site[site] -= 1
+                self._running -= 1
+                self._done += 1
+                self._not_modified += status == FAVICON_NOT_MODIFIED
+                done = self._done
+                self._cond.notify_all()
+        if status != FAVICON_CANCELLED:
+            self.on_result(ids, icon_path)
+        self.on_progress(done, len(self.jobs))
+
+class FaviconFetchQueue(threading.Thread):
+    """
+    파비콘을 백그라운드 스레드에서 하나씩 가져오는 대기열입니다.
+    결과는 on_result(바로가기 ID, 아이콘 경로)로 전달됩니다 (작업자 스레드에서 호출되므로 시그널로 연결).
+    - urgent 작업(추가/편집한 항목)은 대량 작업(가져오기)보다 먼저 실행됩니다.
+    - 같은 바로가기를 다시 넣으면 이전 작업은 대체됩니다: 아직 시작 전이면 건너뛰고,
+      이미 진행 중이면 결과를 버립니다.
+    - stop()은 진행 중인 요청도 중단시킵니다 (결과는 버림).
+    """
+    def __init__(self, on_result):
+        super().__init__(name="FaviconFetchQueue", daemon=True)
+        self.on_result = on_result
+        self._queue = queue.PriorityQueue() # (우선순위, 순번, 작업)
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._latest = {} # {바로가기 ID: 가장 최근 작업 순번}
+        self._stop_token = FaviconBudget(seconds=float('inf'))
+
+    def enqueue(self, shortcut_id, url, urgent=False):
+        """바로가기의 파비콘 가져오기를 예약합니다. 같은 ID의 이전 작업을 대체합니다."""
+        with self._lock:
+            token = next(self._counter)
+            self._latest[shortcut_id] = token
+        self._queue.put((0 if urgent else 1, token, (shortcut_id, url)))
+
+    def pending_count(self):
+        return self._queue.qsize()
+
+    def stop(self):
+        """남은 작업을 버리고 진행 중인 요청을 중단시킨 뒤 작업자를 종료합니다."""
+        self._stop_token.cancel()
+        try:
+            while True: self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._queue.put((-1, -1, None)) # 다른 어떤 작업보다 먼저 꺼내짐
+
+    def _is_current(self, shortcut_id, token):
+        with self._lock:
+            return self._latest.get(shortcut_id) == token
+
+    def _finish(self, shortcut_id, token):
+        """작업이 끝났음을 기록하고, 대체되지 않은 최신 작업이었는지 반환합니다."""
+        with self._lock:
+            if self._latest.get(shortcut_id) != token:
+                return False
+            del self._latest[shortcut_id]
+            return True
+
+    def run(self):
+        while True:
+            _, token, job = self._queue.get()
+            if job is None: return
+            shortcut_id, url = job
+            if not self._is_current(shortcut_id, token): continue # 시작 전에 더 새 작업으로 대체됨
+            try:
+                icon_path = fetch_favicon(url, budget=FaviconBudget(parent=self._stop_token))
+            except Exception as e: # 한 항목의 실패가 대기열 전체를 멈추지 않도록 함
+                print(f"경고 (FaviconFetchQueue): {url} 파비콘 가져오기 실패: {e}")
+                self._finish(shortcut_id, token)
+                continue
+            if self._finish(shortcut_id, token) and not self._stop_token.is_cancelled(): # 진행 중에 다시 편집되었거나 중단되었으면 결과를 버림
+                self.on_result(shortcut_id, icon_path)
 
 class ShortcutDialog(QDialog):
     """바로가기 추가 또는 편집을 위한 대화상자입니다."""
@@ -630,11 +3665,11 @@ class GlobalHotkeySettingsDialog(QDialog):
         else:
             self.new_hotkey = new_hotkey_str_raw
             # 메인 윈도우의 기존 항목 바로가기와 충돌 확인
-            for sc_data in self.main_window.shortcuts: # main_window의 바로가기 접근
-                if sc_data.get("hotkey") == self.new_hotkey:
-                    QMessageBox.warning(self, "단축키 충돌",
-                                        f"단축키 '{self.new_hotkey}'은(는) '{sc_data.get('name')}' 바로가기에서 이미 사용 중입니다.\n다른 단축키를 지정해주세요.")
-                    return
+            sc_data = self.main_window.find_shortcut_by_hotkey(self.new_hotkey)
+            if sc_data:
+                QMessageBox.warning(self, "단축키 충돌",
+                                    f"단축키 '{self.new_hotkey}'은(는) '{sc_data.get('name')}' 바로가기에서 이미 사용 중입니다.\n다른 단축키를 지정해주세요.")
+                return
             self.accept() # 충돌 없거나 사용자가 지우기 확인
 
     def get_new_hotkey(self):
@@ -647,6 +3682,14 @@ class ShortcutManagerWindow(QMainWindow):
     # 'keyboard' 라이브러리 스레드로부터 스레드 안전한 GUI 업데이트를 위한 시그널
     request_toggle_window_visibility_signal = Signal()
     request_always_show_window_signal = Signal()
+    persistence_error_signal = Signal(str) # 저장 작업자 스레드의 오류를 GUI 스레드로 전달
+    favicon_fetched_signal = Signal(str, object) # 바로가기 ID, 아이콘 경로 (파비콘 대기열 스레드 -> GUI 스레드)
+    favicon_refresh_result_signal = Signal(object, object) # 바로가기 ID 목록, 아이콘 경로 (새로고침 엔진 -> GUI 스레드)
+    favicon_refresh_progress_signal = Signal(int, int) # 완료한 도메인 수, 전체 도메인 수
+    favicon_refresh_finished_signal = Signal(bool, int) # 취소 여부, 아이콘이 바뀌지 않은 도메인 수
+    favicon_normalized_signal = Signal(str) # 미리 크기를 맞춘 PNG를 만든 원본 아이콘 경로 (변환 작업자 -> GUI 스레드)
+    favicon_atlas_built_signal = Signal(bool) # 아이콘 아틀라스 재구성 완료 (새 세대를 썼는지)
+    favicon_gc_done_signal = Signal(int) # 참조가 없는 아이콘 정리 완료 (지운 파일 수)
 
 
     def __init__(self):
@@ -654,9 +3697,36 @@ class ShortcutManagerWindow(QMainWindow):
         self.setWindowTitle(APP_NAME)
         self.setGeometry(200, 200, 800, 600) # 기본 크기 및 위치
 
-        self.shortcuts: list[dict] = [] # 바로가기 데이터 딕셔너리 목록
+        self.index = ShortcutIndex() # 바로가기 데이터와 조회용 인덱스 (self.shortcuts로도 접근)
         self.categories_order: list[str] = [] # 탭을 위한 카테고리 순서
         self.hotkey_actions: dict = {} # 등록된 항목 단축키 저장 {hotkey_str: callback}
+        self.store = create_shortcut_store() # 스냅샷 + 저널 또는 SQLite 저장소
+        self.persistence = PersistenceWorker(self.store, on_error=self.persistence_error_signal.emit)
+        self.settings = SettingsCache(self.store, written_signature=self.persistence.written_signature) # 설정 값 읽기용 캐시
+        self.favicon_queue = FaviconFetchQueue(on_result=self.favicon_fetched_signal.emit) # 백그라운드 파비콘 가져오기
+        self.favicon_normalizer = FaviconNormalizer(on_done=self.favicon_normalized_signal.emit) # 아이콘 PNG 변환 작업자 풀
+        self.favicon_normalized_signal.connect(self._on_favicon_normalized) # 첫 목록 표시 중에 끝난 변환도 받도록 먼저 연결
+        favicon_atlas.open() # 첫 목록 표시 전에 아이콘 아틀라스 매핑
+        self._favicon_atlas_thread = None
+        self._favicon_atlas_timer = QTimer(self) # 아이콘 변경이 잠잠해지면 아틀라스 재구성
+        self._favicon_atlas_timer.setSingleShot(True)
+        self._favicon_atlas_timer.setInterval(FAVICON_ATLAS_REBUILD_DELAY_MS)
+        self._favicon_atlas_timer.timeout.connect(self._rebuild_favicon_atlas)
+        self.favicon_atlas_built_signal.connect(self._on_favicon_atlas_built)
+        self._favicon_gc_thread = None
+        self._favicon_gc_timer = QTimer(self) # 아이콘 참조가 없어지면 잠시 뒤 저장소 정리 (연속된 삭제는 한 번으로 모음)
+        self._favicon_gc_timer.setSingleShot(True)
+        self._favicon_gc_timer.setInterval(FAVICON_GC_DELAY_MS)
+        self._favicon_gc_timer.timeout.connect(self._collect_favicon_garbage)
+        self.favicon_gc_done_signal.connect(self._on_favicon_gc_done)
+        QTimer.singleShot(FAVICON_GC_STARTUP_DELAY_MS, self._collect_favicon_garbage) # 이전 실행에서 남은 아이콘 정리
+        self._favicon_maintenance_timer = QTimer(self) # 주기적으로 아이콘 폴더 용량 상한 적용
+        self._favicon_maintenance_timer.setInterval(FAVICON_MAINTENANCE_INTERVAL_MS)
+        self._favicon_maintenance_timer.timeout.connect(self._collect_favicon_garbage)
+        self._favicon_maintenance_timer.start()
+        self.favicon_refresh_engine = None # 진행 중인 아이콘 전체 새로고침
+        self._favicon_refresh_progress = None # 새로고침 진행률 대화상자
+        self._favicon_refresh_updated = 0 # 이번 새로고침에서 아이콘 경로가 바뀐 항목 수
 
         self._highlighted_tab_index = -1 # 드래그 오버 탭 하이라이트를 위함
         self._default_tab_stylesheet = "" # 기본 스타일시트 저장
@@ -671,6 +3741,19 @@ class ShortcutManagerWindow(QMainWindow):
         self.init_ui_layout()
         self.create_menus()
         self.load_data_and_register_hotkeys() # 이 과정에서 전역 단축키도 등록됩니다.
+        self.persistence.start() # 로드가 끝난 뒤 저장 작업자 시작
+        self._init_data_file_watcher() # 외부 프로그램의 데이터 파일 변경 감지
+        self._rebalance_timer = QTimer(self) # 순위 키가 길어지면 유휴 시 재배치
+        self._rebalance_timer.setSingleShot(True)
+        self._rebalance_timer.setInterval(RANK_REBALANCE_DELAY_MS)
+        self._rebalance_timer.timeout.connect(self._rebalance_if_needed)
+        self._schedule_priority_rebalance() # 마이그레이션된 긴 키 등 시작 시 한 번 확인
+        self.favicon_queue.start()
+        self._favicon_revalidate_timer = QTimer(self) # TTL이 지난 아이콘을 주기적으로 백그라운드 재검증
+        self._favicon_revalidate_timer.setInterval(FAVICON_REVALIDATE_INTERVAL_MS)
+        self._favicon_revalidate_timer.timeout.connect(self.revalidate_stale_favicons)
+        self._favicon_revalidate_timer.start()
+        QTimer.singleShot(FAVICON_REVALIDATE_DELAY_MS, self.revalidate_stale_favicons) # 시작 직후의 로드와 겹치지 않게 지연
         self.init_tray_icon()
         self.setWindowIcon(self.create_app_icon())
         self.setAcceptDrops(True) # 카테고리 간 바로가기 드래그를 위함
@@ -678,14 +3761,28 @@ class ShortcutManagerWindow(QMainWindow):
         # 스레드 간 통신을 위한 시그널 연결
         self.request_toggle_window_visibility_signal.connect(self._execute_toggle_window_visibility_gui_thread)
         self.request_always_show_window_signal.connect(self._execute_always_show_window_gui_thread)
+        self.persistence_error_signal.connect(self._on_persistence_error)
+        self.favicon_fetched_signal.connect(self._on_favicon_fetched)
+        self.favicon_refresh_result_signal.connect(self._on_favicon_refresh_result)
+        self.favicon_refresh_progress_signal.connect(self._on_favicon_refresh_progress)
+        self.favicon_refresh_finished_signal.connect(self._on_favicon_refresh_finished)
+
+
+    @property
+    def shortcuts(self) -> list[dict]:
+        """바로가기 데이터 딕셔너리 목록입니다. 변경은 self.index의 메서드로 수행해야 합니다."""
+        return self.index.records()
 
+    @shortcuts.setter
+    def shortcuts(self, records: list[dict]):
+        self.index.rebuild(records)
 
     def _init_default_icon(self):
         """
         기본 애플리케이션/바로가기 아이콘이 없는 경우 초기화하거나 생성합니다.
         Pillow (PIL)을 사용하여 간단한 아이콘을 만듭니다.
         """
-        self.default_icon_available = os.path.exists(DEFAULT_FAVICON)
+        self.default_icon_available = favicon_index.exists(DEFAULT_FAVICON)
         if not self.default_icon_available:
             if not os.path.exists(FAVICON_DIR): # 저장 시도 전에 favicons 디렉토리 존재 확인
                 # 시작 시 생성되었어야 하지만, 재확인
@@ -709,6 +3806,7 @@ class ShortcutManagerWindow(QMainWindow):
                     x,y=(s-w)/2,(s-h)/2
                 d.text((x,y),txt,fill="white",font=font)
                 img.save(DEFAULT_FAVICON)
+                favicon_index.note_written(DEFAULT_FAVICON)
                 self.default_icon_available=True
             except ImportError:
                 print("정보: Pillow 라이브러리를 찾을 수 없습니다. 기본 아이콘을 생성할 수 없습니다. 'pip install Pillow'로 설치해주세요.")
@@ -717,7 +3815,7 @@ class ShortcutManagerWindow(QMainWindow):
 
     def create_app_icon(self):
         """메인 애플리케이션 아이콘을 생성하며, 가능한 경우 기본 아이콘을 사용합니다."""
-        if self.default_icon_available and os.path.exists(DEFAULT_FAVICON):
+        if self.default_icon_available and favicon_index.exists(DEFAULT_FAVICON):
             ico = QIcon(DEFAULT_FAVICON)
             if not ico.isNull(): return ico
         # 표준 시스템 아이콘 또는 일반 픽스맵으로 대체
@@ -730,7 +3828,7 @@ class ShortcutManagerWindow(QMainWindow):
         """
         target_size로 스케일링된 대체 QIcon(기본 앱 아이콘 또는 플레이스홀더)을 반환합니다.
         """
-        if self.default_icon_available and os.path.exists(DEFAULT_FAVICON):
+        if self.default_icon_available and favicon_index.exists(DEFAULT_FAVICON):
             px_def = QPixmap(DEFAULT_FAVICON)
             if not px_def.isNull():
                 return QIcon(px_def.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
@@ -829,6 +3927,9 @@ class ShortcutManagerWindow(QMainWindow):
         open_folder_action = QAction("작업 폴더 열기(&O)", self)
         open_folder_action.triggered.connect(self.open_data_folder)
         file_menu.addAction(open_folder_action)
+        import_action = QAction("북마크 가져오기(&I)...", self)
+        import_action.triggered.connect(self.import_bookmarks_action)
+        file_menu.addAction(import_action)
         file_menu.addSeparator()
         # --- 수정 종료 ---
 
@@ -876,7 +3977,7 @@ class ShortcutManagerWindow(QMainWindow):
                     self.unregister_current_global_show_window_hotkey()
                     self.global_show_window_hotkey_str = new_hotkey
                     if self.register_new_global_show_window_hotkey(): # 새 단축키 등록 시도
-                        self.save_data() # 성공적으로 등록된 경우에만 저장
+                        self.journal_change("setting", key="global_show_window_hotkey", value=new_hotkey) # 성공적으로 등록된 경우에만 저장
                         QMessageBox.information(self, "단축키 변경 완료",
                                                 f"창 보이기/숨기기 단축키가 '{new_hotkey}'(으)로 설정되었습니다." if new_hotkey else "창 보이기/숨기기 단축키가 해제되었습니다.")
                     else: # 등록 실패 (예: 'keyboard' 라이브러리에 대한 잘못된 단축키 문자열)
@@ -1003,47 +4104,268 @@ class ShortcutManagerWindow(QMainWindow):
 
 
     def refresh_all_icons_action(self):
-        """모든 바로가기의 모든 파비콘을 다시 가져오는 액션입니다."""
+        """모든 바로가기의 모든 파비콘을 백그라운드에서 동시에 다시 가져오는 액션입니다."""
+        if self.favicon_refresh_engine is not None: # 이미 진행 중이면 진행률 창만 다시 표시
+            if self._favicon_refresh_progress: self._favicon_refresh_progress.show()
+            return
         reply = QMessageBox.question(self, "아이콘 새로고침 확인",
-                                     "모든 바로 가기의 아이콘을 새로고침 하시겠습니까?\n이 작업은 시간이 다소 걸릴 수 있으며, 기존 아이콘 파일이 삭제되고 다시 다운로드됩니다.",
+                                     "모든 바로 가기의 아이콘을 새로고침 하시겠습니까?\n바뀐 아이콘만 다시 다운로드됩니다.",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                                      QMessageBox.StandardButton.No)
-        if reply == QMessageBox.StandardButton.Yes:
-            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-            updated_count = 0
-            failed_to_delete_count = 0
-            for sc_data in self.shortcuts:
-                url = sc_data.get("url")
-                if not url: continue
-
-                # 새 아이콘을 가져오기 전에 이전 아이콘 파일 삭제 시도
-                parsed_url = urlparse(url)
-                domain = parsed_url.netloc
-                if domain: # 도메인이 있는 경우 이전 아이콘 삭제 시도
-                    safe_domain_name = "".join(c if c.isalnum() or c in ['.', '-'] else '_' for c in domain)
-                    for ext in ['.png', '.ico', '.jpg', '.jpeg', '.gif', '.svg']: # 모든 가능한 확장자 확인
-                        cached_path = get_favicon_path(f"{safe_domain_name}{ext}")
-                        if os.path.exists(cached_path) and os.path.basename(cached_path) != DEFAULT_FAVICON_FILENAME: # 기본 아이콘은 삭제하지 않음
-                            try:
-                                os.remove(cached_path)
-                            except OSError as e:
-                                failed_to_delete_count +=1
-                                print(f"경고 (새로고침): {cached_path} 제거 실패: {e}")
-
-                # 새 아이콘 가져오기
-                new_icon_path = fetch_favicon(url) # 새 아이콘을 가져오려고 시도
-                if sc_data.get("icon_path") != new_icon_path: # 다른 경우 (또는 이전이 None인 경우) 업데이트
-                    sc_data["icon_path"] = new_icon_path
-                    updated_count += 1
-                QApplication.processEvents() # 긴 작업 동안 UI 반응 유지
-
-            self.save_data() # 아이콘 경로 변경 사항 저장
-            self.populate_list_for_current_tab() # 뷰 새로고침
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        engine = FaviconRefreshEngine.for_shortcuts(
+            self.shortcuts,
+            on_result=self.favicon_refresh_result_signal.emit,
+            on_progress=self.favicon_refresh_progress_signal.emit,
+            on_finished=self.favicon_refresh_finished_signal.emit)
+        if not len(engine):
+            QMessageBox.information(self, "새로고침 완료", "새로고침할 웹 바로 가기가 없습니다.")
+            return
+        self.favicon_refresh_engine = engine
+        self._favicon_refresh_updated = 0
+
+        progress = QProgressDialog("아이콘을 새로고침하는 중...", "취소", 0, len(engine), self)
+        progress.setWindowTitle("아이콘 새로고침")
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.canceled.connect(engine.cancel) # 남은 도메인은 시작하지 않음
+        progress.show()
+        self._favicon_refresh_progress = progress
+        engine.start()
+
+    @Slot(object, object)
+    def _on_favicon_refresh_result(self, shortcut_ids, icon_path):
+        """새로고침한 도메인의 아이콘을 해당 항목들과 보이는 행에 반영합니다. 저장은 끝날 때 한 번만 합니다."""
+        for shortcut_id in shortcut_ids:
+            sc_data = self.index.get(shortcut_id)
+            if sc_data is None or sc_data.get("icon_path") == icon_path: continue # 삭제되었거나 변경 없음
+            if self.index.set_icon_path(shortcut_id, icon_path): self._favicon_gc_timer.start() # 이전 아이콘은 참조가 없어졌을 수 있음
+            self._favicon_refresh_updated += 1
+            self._update_list_row(shortcut_id)
+        if icon_path: self.favicon_normalizer.submit(icon_path) # 보이지 않는 항목의 아이콘도 미리 변환
+
+    @Slot(int, int)
+    def _on_favicon_refresh_progress(self, done, total):
+        if self._favicon_refresh_progress and not self._favicon_refresh_progress.wasCanceled():
+            self._favicon_refresh_progress.setValue(max(done, self._favicon_refresh_progress.value()))
+            self._favicon_refresh_progress.setLabelText(f"아이콘을 새로고침하는 중... ({done}/{total} 도메인)")
+
+    @Slot(bool, int)
+    def _on_favicon_refresh_finished(self, cancelled, not_modified_count):
+        """새로고침이 끝나면 바뀐 아이콘 경로를 한 번에 저장하고 결과를 알립니다."""
+        engine, self.favicon_refresh_engine = self.favicon_refresh_engine, None
+        if self._favicon_refresh_progress:
+            self._favicon_refresh_progress.close()
+            self._favicon_refresh_progress.deleteLater()
+            self._favicon_refresh_progress = None
+        if self._favicon_refresh_updated:
+            self.save_data() # 아이콘 경로 변경 사항을 한 번만 저장
+        msg = f"{len(self.index)}개 바로 가기 중 {self._favicon_refresh_updated}개의 아이콘 정보가 업데이트되었습니다."
+        if cancelled:
+            msg = "새로고침이 취소되었습니다.\n" + msg
+        if not_modified_count > 0:
+            msg += f"\n{not_modified_count}개 도메인은 아이콘이 바뀌지 않아 다시 받지 않았습니다."
+        if engine is not None and engine.http_stats:
+            msg += (f"\nHTTP 요청 {engine.http_stats['requests']}회 "
+                    f"(새 연결 {engine.http_stats['new_connections']}개, 연결 재사용 {engine.http_stats['reused_connections']}회)")
+        QMessageBox.information(self, "새로고침 완료", msg)
+
+    def import_bookmarks_action(self):
+        """브라우저 북마크 내보내기(HTML/JSON) 또는 CSV 파일을 골라 바로가기로 가져오는 액션입니다."""
+        path, _ = QFileDialog.getOpenFileName(self, "북마크 가져오기", "",
+                                              "북마크 파일 (*.html *.htm *.json *.csv);;모든 파일 (*)")
+        if not path: return
+        try:
+            added_count, duplicate_count = self.import_bookmarks(path)
+        except (OSError, ValueError, csv.Error) as e: # 읽기 실패, 손상된 JSON(JSONDecodeError 포함)/CSV
+            QMessageBox.warning(self, "가져오기 오류", f"'{path}' 가져오기 실패: {e}")
+            return
+        msg = f"{added_count}개의 바로가기를 가져왔습니다."
+        if duplicate_count:
+            msg += f"\n이미 있는 주소 {duplicate_count}개는 건너뛰었습니다."
+        if added_count:
+            msg += "\n아이콘은 백그라운드에서 가져옵니다."
+        QMessageBox.information(self, "가져오기 완료", msg)
+
+    def import_bookmarks(self, path):
+        """
+        북마크 파일을 스트리밍으로 읽어 IMPORT_BATCH_SIZE개씩 인덱스에 추가합니다.
+        폴더는 카테고리가 되고, 정규화된 URL이 이미 있으면 건너뜁니다.
+        저장과 UI 갱신은 끝에 한 번만 하고, 파비콘은 백그라운드 대기열에 넣습니다.
+        반환 값: (추가된 수, 중복으로 건너뛴 수). 파일 오류 시 추가한 항목을 되돌리고 예외를 전달합니다.
+        """
+        current_tab_name = self.get_current_category_name()
+        default_category = current_tab_name if current_tab_name not in [ALL_CATEGORY_NAME, ADD_CATEGORY_TAB_TEXT] else IMPORT_DEFAULT_CATEGORY
+        seen_urls = {normalize_url_for_dedupe(sc.get("url")) for sc in self.index.records()}
+        known_categories = set(self.categories_order)
+        new_categories = []
+        added = []
+        duplicate_count = 0
+        priority = self.index.next_priority()
+
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            records = iter_bookmark_file(path)
+            while True:
+                batch = list(itertools.islice(records, IMPORT_BATCH_SIZE))
+                if not batch: break
+                for name, url, folders, hotkey in batch:
+                    if url.lower().startswith(("javascript:", "place:", "data:")): continue # 북마클릿, Firefox 쿼리 항목
+                    if "://" not in url and not url.lower().startswith(("file:", "mailto:")):
+                        url = "http://" + url.lstrip("/") # 대화상자와 같이 스킴 없는 주소는 http로 간주
+                    url_key = normalize_url_for_dedupe(url)
+                    if url_key in seen_urls:
+                        duplicate_count += 1
+                        continue
+                    seen_urls.add(url_key)
+
+                    category = bookmark_category(folders, default_category)
+                    if category not in known_categories:
+                        known_categories.add(category)
+                        new_categories.append(category)
+                    # 이미 쓰이는 단축키(가져온 항목끼리 포함)나 전역 단축키와 겹치면 단축키 없이 가져옴
+                    if hotkey and (self.index.find_by_hotkey(hotkey) or hotkey == self.global_show_window_hotkey_str):
+                        hotkey = ""
+                    sc_data = {"id": str(uuid.uuid4()), "name": name or url_domain(url) or url, "url": url,
+                               "hotkey": hotkey, "category": category, "priority": priority, "icon_path": None}
+                    priority = rank_between(priority, None)
+                    self.index.add(sc_data)
+                    added.append(sc_data)
+                QApplication.processEvents() # 배치 사이에 UI 반응 유지
+        except Exception:
+            for sc_data in added: # 일부만 가져온 상태로 남지 않도록 되돌림
+                self.index.remove(sc_data["id"])
+            raise
+        finally:
             QApplication.restoreOverrideCursor()
-            msg = f"{len(self.shortcuts)}개 바로 가기 중 {updated_count}개의 아이콘 정보가 업데이트되었습니다."
-            if failed_to_delete_count > 0:
-                msg += f"\n{failed_to_delete_count}개의 기존 아이콘 파일 삭제에 실패했습니다."
-            QMessageBox.information(self, "새로고침 완료", msg)
+
+        if not added:
+            return 0, duplicate_count
+
+        self.categories_order.extend(new_categories)
+        self.save_data() # 전체를 한 번에 저장 (항목별 저널 레코드 대신)
+        self._resync_item_hotkeys({sc["hotkey"] for sc in added if sc["hotkey"]})
+        if new_categories:
+            self.update_category_tabs() # 새 카테고리 탭 추가 (현재 탭 선택 유지)
+        else:
+            self.populate_list_for_current_tab()
+
+        for sc_data in added:
+            if urlparse(sc_data["url"]).scheme in ("http", "https"):
+                self.favicon_queue.enqueue(sc_data["id"], sc_data["url"])
+        return len(added), duplicate_count
+
+    def revalidate_stale_favicons(self):
+        """
+        캐시된 아이콘의 TTL이 지난 도메인의 바로가기를 대기열에 낮은 우선순위로 넣습니다.
+        도메인의 첫 항목이 조건부 요청으로 재검증하고, 나머지 항목은 갱신된 캐시를 그대로 씁니다.
+        반환 값: 대기열에 넣은 바로가기 수.
+        """
+        if self.favicon_refresh_engine is not None: return 0 # 전체 새로고침 중이면 건너뜀
+        stale_domains = {} # {도메인: 재검증 필요 여부}
+        queued = 0
+        for sc_data in self.index.records():
+            url = sc_data.get("url")
+            if not url or urlparse(url).scheme not in ("http", "https"): continue
+            domain = favicon_cache_domain(url)
+            if domain not in stale_domains:
+                stale_domains[domain] = favicon_needs_revalidation(url)
+            if stale_domains[domain]:
+                self.favicon_queue.enqueue(sc_data["id"], url)
+                queued += 1
+        if queued:
+            print(f"정보: 오래된 아이콘 재검증 예약 ({sum(stale_domains.values())}개 도메인, {queued}개 바로가기)")
+        return queued
+
+    @Slot(str, object)
+    def _on_favicon_fetched(self, shortcut_id, icon_path):
+        """백그라운드에서 가져온 아이콘을 해당 항목과 현재 리스트의 행에만 반영합니다. 메인 GUI 스레드에서 실행됩니다."""
+        sc_data = self.index.get(shortcut_id)
+        if sc_data is None or sc_data.get("icon_path") == icon_path: return # 그 사이 삭제되었거나 변경 없음
+        if self.index.set_icon_path(shortcut_id, icon_path): self._favicon_gc_timer.start()
+        self.journal_change("patch", id=shortcut_id, fields={"icon_path": icon_path})
+        if icon_path: self.favicon_normalizer.submit(icon_path)
+        self._update_list_row(shortcut_id)
+
+    @Slot(str)
+    def _on_favicon_normalized(self, icon_path):
+        """변환이 끝난 아이콘을 쓰는 현재 리스트의 행을 미리 만든 PNG로 다시 그립니다."""
+        self._favicon_atlas_timer.start() # 새 PNG를 아틀라스에 반영 (연속된 변환은 한 번으로 모음)
+        list_widget = self.category_tabs.currentWidget()
+        if not isinstance(list_widget, DraggableListWidget): return
+        icon_size = list_widget.iconSize()
+        fallback_qicon = None
+        for row in range(list_widget.count()):
+            item = list_widget.item(row)
+            data = item.data(Qt.ItemDataRole.UserRole)
+            if isinstance(data, dict) and data.get("id") and resolve_icon_path(data.get("icon_path")) == icon_path:
+                sc_data = self.index.get(data["id"])
+                if sc_data is None: continue
+                if fallback_qicon is None: fallback_qicon = self.get_fallback_qicon(icon_size)
+                self._fill_shortcut_list_item(item, sc_data, icon_size, fallback_qicon)
+
+    def _rebuild_favicon_atlas(self):
+        """바로가기들이 쓰는 아이콘으로 아틀라스를 백그라운드에서 다시 만듭니다 (바뀐 아이콘만 디코딩)."""
+        if self._favicon_atlas_thread is not None and self._favicon_atlas_thread.is_alive():
+            self._favicon_atlas_timer.start() # 진행 중인 재구성이 끝난 뒤 다시 시도
+            return
+        favicon_atlas.dirty = False
+        icon_paths = {resolve_icon_path(sc.get("icon_path")) for sc in self.index.records() if sc.get("icon_path")}
+
+        def build():
+            try:
+                built = favicon_atlas.build(icon_paths)
+            except Exception as e: # 디스크 오류 등: 아틀라스 없이도 PNG로 표시됨
+                print(f"경고 (FaviconAtlas): 아틀라스 재구성 실패: {e}")
+                built = False
+            self.favicon_atlas_built_signal.emit(built)
+
+        self._favicon_atlas_thread = threading.Thread(target=build, name="FaviconAtlasBuilder", daemon=True)
+        self._favicon_atlas_thread.start()
+
+    @Slot(bool)
+    def _on_favicon_atlas_built(self, built):
+        if built: favicon_atlas.open() # 새 세대 매핑 (표시된 아이콘은 같으므로 다시 그리지 않음)
+
+    def _collect_favicon_garbage(self):
+        """아이콘 폴더의 용량 상한을 넘으면 바로가기가 참조하지 않는 아이콘을 백그라운드에서 지웁니다 (참조 목록은 지금 시점의 사본)."""
+        if self._favicon_gc_thread is not None and self._favicon_gc_thread.is_alive():
+            self._favicon_gc_timer.start() # 진행 중인 정리가 끝난 뒤 다시 시도
+            return
+        referenced = self.index.referenced_icons()
+
+        def collect():
+            try:
+                removed, freed = favicon_store.collect_garbage(referenced)
+            except Exception as e: # 디스크 오류 등: 다음 정리 때 다시 시도
+                print(f"경고 (FaviconContentStore): 아이콘 정리 실패: {e}")
+                removed, freed = 0, 0
+            if removed:
+                print(f"정보 (FaviconContentStore): 아이콘 폴더 정리, 파일 {removed}개 삭제 ({freed / 1024:.0f}KiB)")
+            self.favicon_gc_done_signal.emit(removed)
+
+        self._favicon_gc_thread = threading.Thread(target=collect, name="FaviconGarbageCollector", daemon=True)
+        self._favicon_gc_thread.start()
+
+    @Slot(int)
+    def _on_favicon_gc_done(self, removed):
+        if removed: self._favicon_atlas_timer.start() # 지운 아이콘의 칸을 아틀라스에서 뺌
+
+    def _update_list_row(self, shortcut_id):
+        """현재 탭의 리스트에서 한 항목의 행만 다시 그립니다 (보이지 않으면 아무것도 하지 않음)."""
+        list_widget = self.category_tabs.currentWidget()
+        sc_data = self.index.get(shortcut_id)
+        if not isinstance(list_widget, DraggableListWidget) or sc_data is None: return
+        for row in range(list_widget.count()):
+            item = list_widget.item(row)
+            data = item.data(Qt.ItemDataRole.UserRole)
+            if isinstance(data, dict) and data.get("id") == shortcut_id:
+                icon_size = list_widget.iconSize()
+                self._fill_shortcut_list_item(item, sc_data, icon_size, self.get_fallback_qicon(icon_size))
+                return
 
     def _clear_tab_highlight(self):
         """탭 스타일시트를 기본값으로 재설정하여 드래그-오버 하이라이트를 지웁니다."""
@@ -1145,7 +4467,7 @@ class ShortcutManagerWindow(QMainWindow):
         new_order = [self.category_tabs.tabText(i) for i in range(1, self.category_tabs.count() - 1)]
         if self.categories_order != new_order:
             self.categories_order = new_order
-            self.save_data()
+            self.journal_change("categories", order=new_order)
 
 
     def init_tray_icon(self):
@@ -1181,6 +4503,7 @@ class ShortcutManagerWindow(QMainWindow):
         """창 닫기 이벤트를 오버라이드하여 종료 대신 트레이로 숨깁니다."""
         event.ignore()  # 창이 실제로 닫히는 것을 방지
         self.hide()     # 창 숨기기
+        self.persistence.request_flush() # 대기 중인 변경을 바로 기록 (기다리지 않음)
 
         # 트레이 아이콘이 사용 가능하고 보이는 경우 메시지 표시
         if hasattr(self, 'tray_icon') and self.tray_icon and self.tray_icon.isVisible() and QSystemTrayIcon.isSystemTrayAvailable():
@@ -1201,49 +4524,37 @@ class ShortcutManagerWindow(QMainWindow):
         if hasattr(self, 'tray_icon') and self.tray_icon:
             self.tray_icon.hide() # 종료 전에 트레이 아이콘 숨기기
 
+        self.favicon_queue.stop() # 남은 파비콘 작업은 버림 (아이콘 없이 저장된 항목은 대체 아이콘으로 표시)
+        self.favicon_normalizer.shutdown() # 남은 변환은 다음 실행 때 목록을 표시하면서 다시 예약됨
+        favicon_source_stats.flush() # 아직 쓰지 않은 출처 성적 기록
+        if self.favicon_refresh_engine is not None: # 진행 중인 새로고침의 남은 도메인 취소
+            self.favicon_refresh_engine.cancel()
+            if self._favicon_refresh_updated:
+                self.save_data() # 지금까지 반영된 아이콘 경로 저장
+        if not self.persistence.stop(timeout=5.0): # 대기 중인 변경을 기록하고 작업자 종료
+            print("경고: 종료 전에 모든 변경 사항을 저장하지 못했습니다.")
+        self.store.wait_for_compaction(5.0) # 진행 중인 스냅샷 기록이 끝나도록 대기
+        self.store.close()
         QApplication.instance().quit()
 
     def load_specific_setting(self, key_name, default_value):
-        """설정 JSON 파일에서 특정 키를 로드합니다."""
-        if os.path.exists(SETTINGS_FILE):
-            try:
-                with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                return data.get(key_name, default_value)
-            except json.JSONDecodeError: # 손상된 JSON 처리
-                return default_value
-        return default_value # 파일을 찾을 수 없음
+        """저장된 설정에서 특정 키를 로드합니다. 파일이 외부에서 바뀌지 않았으면 캐시된 값을 사용합니다."""
+        return self.settings.get(key_name, default_value)
 
     def load_data_and_register_hotkeys(self):
-        """JSON에서 바로가기와 설정을 로드한 다음 단축키를 등록합니다."""
-        if os.path.exists(SETTINGS_FILE):
+        """스냅샷과 저널에서 바로가기와 설정을 로드한 다음 단축키를 등록합니다."""
+        if self.store.has_data():
             try:
-                with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self.categories_order = data.get("categories_order", [])
-                self.shortcuts = data.get("shortcuts", [])
-                self.global_show_window_hotkey_str = data.get("global_show_window_hotkey", "ctrl+shift+x") # 전역 단축키 로드
-
-                # 이전 버전에 대한 데이터 무결성 검사 및 마이그레이션
-                needs_save = False
-                max_prio_val = 0.0 # 필요 시 새 우선순위 할당에 도움
-                for idx, sc in enumerate(self.shortcuts):
-                    if "id" not in sc or not sc["id"]: # 고유 ID 보장
-                        sc["id"] = str(uuid.uuid4())
-                        needs_save = True
-                    if "category" not in sc: # 카테고리 보장
-                        sc["category"] = self.categories_order[0] if self.categories_order else "일반"
-                        needs_save = True
-                    if "priority" not in sc: # 순서 지정을 위한 우선순위 보장
-                        sc["priority"] = float(idx + 1.0) # 간단한 증분 우선순위 할당
-                        needs_save = True
-                    current_prio = sc.get("priority", 0.0)
-                    if not isinstance(current_prio, float): # 우선순위가 float인지 보장
-                        try: sc['priority'] = float(current_prio); needs_save = True
-                        except ValueError: sc['priority'] = float(idx + 1.0); needs_save = True
-
-                    max_prio_val = max(max_prio_val, sc.get("priority", 0.0))
+                data = self.store.load() # 스냅샷 + 저널 재생
+
+                # 이전 버전 데이터 마이그레이션 (파일의 schema_version 이후 단계만, 한 번만 실행)
+                needs_save = migrate_document(data)
 
+                loaded_shortcuts = data.pop("shortcuts", [])
+                self.settings.prime(data) # 이후 설정 조회는 파일이 바뀌지 않는 한 다시 파싱하지 않음
+                self.categories_order = self.settings.get_list("categories_order")
+                self.global_show_window_hotkey_str = self.settings.get_str("global_show_window_hotkey", "ctrl+shift+x") # 전역 단축키 로드
+                self.shortcuts = loaded_shortcuts # ID가 보장된 뒤 인덱스 생성
 
                 if needs_save:
                     self.save_data() # 수정 사항이 있으면 저장
@@ -1283,27 +4594,213 @@ class ShortcutManagerWindow(QMainWindow):
              self.populate_list_for_current_tab() # "전체" 탭 채우기 ("새로 추가"가 표시될 것임)
 
 
+    def _init_data_file_watcher(self):
+        """데이터 파일이 외부(동기화 도구, 스크립트, 다른 인스턴스)에서 바뀌면 다시 읽도록 감시를 설정합니다."""
+        self._loaded_signature = store_signature(self.store) # 마지막으로 읽은 시점의 파일 서명
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(HOT_RELOAD_DELAY_MS)
+        self._reload_timer.timeout.connect(self.reload_if_changed_externally)
+        self.data_file_watcher = QFileSystemWatcher(self)
+        self.data_file_watcher.fileChanged.connect(self._on_data_file_changed)
+        self.data_file_watcher.directoryChanged.connect(self._on_data_file_changed)
+        self._watch_data_paths()
+        # 아이콘 폴더가 외부에서 바뀌면(사용자가 파일 삭제/복사 등) 파일 목록 색인을 다시 읽음
+        self.favicon_dir_watcher = QFileSystemWatcher(self)
+        for directory in (FAVICON_DIR, favicon_store.directory):
+            if os.path.isdir(directory):
+                self.favicon_dir_watcher.addPath(directory)
+        self.favicon_dir_watcher.directoryChanged.connect(
+            lambda _path: (favicon_index.refresh_if_changed(), favicon_store.index.refresh_if_changed()))
+
+    def _watch_data_paths(self):
+        """데이터 파일과 그 폴더를 감시 목록에 추가합니다. 파일이 교체(임시 파일 + 이름 변경)되면 감시가 풀리므로 매번 다시 확인합니다."""
+        paths = self.store.data_paths()
+        candidates = [p for p in paths if os.path.exists(p)]
+        candidates.append(os.path.dirname(os.path.abspath(paths[0]))) # 파일 생성/교체 감지용
+        watched = set(self.data_file_watcher.files()) | set(self.data_file_watcher.directories())
+        missing = [p for p in candidates if p not in watched]
+        if missing:
+            self.data_file_watcher.addPaths(missing)
+
+    @Slot(str)
+    def _on_data_file_changed(self, path):
+        self._reload_timer.start() # 타이머 재시작: 이벤트가 잠잠해진 뒤 한 번만 확인
+
+    def reload_if_changed_externally(self):
+        """
+        데이터 파일이 이 앱이 아닌 곳에서 바뀌었으면 다시 읽고, ID 기준 차이만 적용합니다.
+        바뀐 항목의 리스트 행, 카테고리 탭, 항목 단축키 등록만 갱신합니다.
+        """
+        self._watch_data_paths()
+        if self.persistence.has_pending_writes():
+            self._reload_timer.start() # 우리 쪽 기록이 끝난 뒤 다시 확인
+            return
+        signature = store_signature(self.store)
+        if signature == self._loaded_signature or signature == self.persistence.written_signature():
+            return # 바뀌지 않았거나 이 앱이 직접 기록한 결과
+
+        try:
+            data = self.store.load() # 저장소 내부 상태도 디스크 기준으로 다시 맞춤 (이후 압축이 외부 변경을 덮어쓰지 않도록)
+            needs_save = migrate_document(data)
+        except Exception as e: # 쓰는 도중의 파일 등: 다음 변경 이벤트에서 다시 시도
+            print(f"경고 (reload_if_changed_externally): {SETTINGS_FILE} 다시 읽기 실패: {e}")
+            return
+        self._loaded_signature = signature
+
+        loaded_shortcuts = data.pop("shortcuts", [])
+        self.settings.prime(data)
+        added, removed, changed = self.index.diff(loaded_shortcuts)
+        print(f"정보: 외부 변경 감지 - 추가 {len(added)}, 삭제 {len(removed)}, 변경 {len(changed)}")
+
+        # 인덱스 갱신과 함께 영향을 받는 단축키 수집 (단축키나 URL이 바뀐 항목만)
+        affected_hotkeys = set()
+        for sc in removed:
+            self.index.remove(sc["id"])
+            affected_hotkeys.add(sc.get("hotkey"))
+        for old, new in changed:
+            self.index.replace(new)
+            if old.get("hotkey") != new.get("hotkey") or old.get("url") != new.get("url"):
+                affected_hotkeys.update((old.get("hotkey"), new.get("hotkey")))
+        for sc in added:
+            self.index.add(sc)
+            affected_hotkeys.add(sc.get("hotkey"))
+        if removed or changed: self._favicon_gc_timer.start() # 더 이상 참조되지 않는 아이콘이 생겼을 수 있음
+
+        new_global_hotkey = self.settings.get_str("global_show_window_hotkey", "ctrl+shift+x")
+        if new_global_hotkey != self.global_show_window_hotkey_str:
+            # 전역 단축키와 겹쳐 등록되지 않았던(또는 새로 겹치는) 항목 단축키도 다시 확인
+            affected_hotkeys.update((self.global_show_window_hotkey_str, new_global_hotkey))
+            self.unregister_current_global_show_window_hotkey()
+            self.global_show_window_hotkey_str = new_global_hotkey
+            self.register_new_global_show_window_hotkey()
+        self._resync_item_hotkeys(affected_hotkeys)
+
+        new_categories = [c for c in self.settings.get_list("categories_order") if c not in [ALL_CATEGORY_NAME, ADD_CATEGORY_TAB_TEXT]]
+        current_tab_replaced = False
+        if new_categories != self.categories_order:
+            current_tab_replaced = self._sync_category_tabs(new_categories)
+        if not current_tab_replaced:
+            self._update_current_list_rows(added, removed, changed)
+
+        if needs_save:
+            self.save_data() # 외부에서 추가된 ID 없는 항목 등을 마이그레이션한 결과 저장
+
+    def _resync_item_hotkeys(self, hotkeys):
+        """주어진 단축키들만 등록 해제한 뒤, 현재 그 단축키를 가진 항목으로 다시 등록합니다."""
+        for hotkey_str in hotkeys:
+            if not hotkey_str: continue
+            self.unregister_hotkey(hotkey_str)
+            sc_data = self.index.find_by_hotkey(hotkey_str)
+            if sc_data is not None:
+                self.register_item_hotkey(sc_data)
+
+    def _sync_category_tabs(self, new_categories):
+        """
+        탭 전체를 다시 만들지 않고 삭제/추가/이동된 카테고리 탭만 반영합니다.
+        현재 선택된 탭이 바뀌어(삭제 등) 목록을 새로 채웠으면 True를 반환합니다.
+        """
+        current_name = self.get_current_category_name()
+        tab_bar = self.category_tabs.tabBar()
+        # 프로그램에 의한 변경이므로 탭 이동/선택 핸들러(저널 기록, 카테고리 추가 대화상자)가 실행되지 않도록 함
+        self.category_tabs.blockSignals(True)
+        tab_bar.blockSignals(True)
+        try:
+            for i in range(self.category_tabs.count() - 2, 0, -1): # "전체"(0)와 "+"(마지막) 제외
+                if self.category_tabs.tabText(i) not in new_categories:
+                    widget = self.category_tabs.widget(i)
+                    self.category_tabs.removeTab(i)
+                    widget.deleteLater()
+            for position, cat_name in enumerate(new_categories, start=1):
+                existing = next((i for i in range(1, self.category_tabs.count() - 1)
+                                 if self.category_tabs.tabText(i) == cat_name), -1)
+                if existing == -1:
+                    self.category_tabs.insertTab(position, self._create_new_list_widget(), cat_name)
+                elif existing != position:
+                    tab_bar.moveTab(existing, position)
+        finally:
+            tab_bar.blockSignals(False)
+            self.category_tabs.blockSignals(False)
+        self.categories_order = list(new_categories)
+
+        idx_to_select = 0 # 이전 탭이 사라졌으면 "전체"
+        for i in range(self.category_tabs.count() - 1):
+            if self.category_tabs.tabText(i) == current_name:
+                idx_to_select = i
+                break
+        current_tab_kept = self.category_tabs.tabText(idx_to_select) == current_name
+        self.category_tabs.blockSignals(True) # 선택 복원 시 on_category_changed가 중복으로 채우지 않도록 함
+        self.category_tabs.setCurrentIndex(idx_to_select)
+        self.category_tabs.blockSignals(False)
+        self.last_selected_valid_category_index = idx_to_select
+        if current_tab_kept:
+            return False # 같은 리스트 위젯이 그대로 남아 있음
+        self.populate_list_for_current_tab()
+        return True
+
+    def _update_current_list_rows(self, added, removed, changed):
+        """
+        현재 탭의 리스트에서 바뀐 항목의 행만 갱신합니다.
+        현재 탭에 행이 추가/삭제되거나 순서가 바뀌는 경우에만 현재 탭 목록을 다시 채웁니다.
+        다른 탭은 선택될 때 채워지므로 건드리지 않습니다.
+        """
+        list_widget = self.category_tabs.currentWidget()
+        if not isinstance(list_widget, DraggableListWidget): return
+        category = self.get_current_category_name()
+        def shown(sc):
+            return category == ALL_CATEGORY_NAME or sc.get("category") == category
+
+        layout_changed = any(shown(sc) for sc in added) or any(shown(sc) for sc in removed) or any(
+            (shown(old) or shown(new)) and (old.get("category") != new.get("category") or old.get("priority") != new.get("priority"))
+            for old, new in changed)
+        if layout_changed:
+            self.populate_list_for_current_tab()
+            return
+
+        changed_by_id = {new["id"]: new for old, new in changed if shown(new)}
+        if not changed_by_id: return
+        icon_size = list_widget.iconSize()
+        fallback_qicon = self.get_fallback_qicon(icon_size)
+        for row in range(list_widget.count()):
+            item = list_widget.item(row)
+            data = item.data(Qt.ItemDataRole.UserRole)
+            new = changed_by_id.get(data.get("id")) if isinstance(data, dict) else None
+            if new is not None:
+                self._fill_shortcut_list_item(item, new, icon_size, fallback_qicon)
+
     def save_data(self):
-        """바로가기와 설정을 JSON 파일에 저장합니다."""
+        """
+        바로가기와 설정 전체를 스냅샷으로 저장하고 저널을 비웁니다.
+        개별 변경에는 journal_change()를 사용하고, 이 메서드는 대량 변경에만 사용합니다.
+        """
         # --- 수정: 중복되는 디렉토리 생성 확인 제거 ---
         # 시작 로직이 이제 파비콘 디렉토리 생성을 처리합니다.
 
         # categories_order에는 사용자 정의 카테고리만 저장
         user_cats = [c for c in self.categories_order if c not in [ALL_CATEGORY_NAME, ADD_CATEGORY_TAB_TEXT]]
 
-        # 다음 로드 시 순서 유지를 위해 저장 전 우선순위로 바로가기 정렬
-        self.shortcuts.sort(key=lambda x: x.get('priority', float('inf')))
-
         data_to_save = {
             "categories_order": user_cats,
-            "shortcuts": self.shortcuts,
-            "global_show_window_hotkey": self.global_show_window_hotkey_str
+            # 작업자 스레드가 나중에 직렬화하므로 GUI 스레드의 변경과 분리된 복사본 전달
+            "shortcuts": [dict(sc) for sc in self.shortcuts], # 저장소가 우선순위로 정렬하여 기록
+            "global_show_window_hotkey": self.global_show_window_hotkey_str,
+            "schema_version": SCHEMA_VERSION # 메모리의 데이터는 항상 최신 스키마
         }
-        try:
-            with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            QMessageBox.critical(self, "데이터 저장 오류", f"{SETTINGS_FILE} 파일 저장 실패: {e}")
+        self.settings.update({key: value for key, value in data_to_save.items() if key != "shortcuts"})
+        self.persistence.submit_snapshot(data_to_save)
+
+    def journal_change(self, op, **payload):
+        """변경 하나를 저널 레코드로 기록하도록 저장 작업자에 넘깁니다 (전체 파일을 다시 쓰지 않음)."""
+        if op == "setting": # 설정 캐시는 기록을 기다리지 않고 바로 갱신
+            self.settings.update({payload["key"]: payload["value"]})
+        elif op == "categories":
+            self.settings.update({"categories_order": list(payload["order"])})
+        self.persistence.submit(op, **payload)
+
+    @Slot(str)
+    def _on_persistence_error(self, message):
+        """저장 작업자 스레드에서 발생한 오류를 표시합니다. 메인 GUI 스레드에서 실행됩니다."""
+        QMessageBox.critical(self, "데이터 저장 오류", f"{SETTINGS_FILE} 파일 저장 실패: {message}")
 
     def update_category_tabs(self):
         """self.categories_order에 기반하여 카테고리 탭을 업데이트합니다."""
@@ -1365,7 +4862,7 @@ class ShortcutManagerWindow(QMainWindow):
         list_widget = DraggableListWidget()
         list_widget.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         list_widget.setViewMode(QListView.ViewMode.IconMode)
-        list_widget.setIconSize(QSize(48, 48)) # 바로가기 기본 아이콘 크기
+        list_widget.setIconSize(QSize(SHORTCUT_ICON_SIZE, SHORTCUT_ICON_SIZE)) # 바로가기 기본 아이콘 크기
         list_widget.setFlow(QListView.Flow.LeftToRight) # 항목을 왼쪽에서 오른쪽으로 배열
         list_widget.setWrapping(True) # 공간이 부족하면 다음 줄로 항목 줄 바꿈
         list_widget.setResizeMode(QListView.ResizeMode.Adjust) # 리사이즈 시 레이아웃 조정
@@ -1432,30 +4929,18 @@ class ShortcutManagerWindow(QMainWindow):
         fallback_qicon = self.get_fallback_qicon(icon_size) # 미리 스케일링된 대체 아이콘 가져오기
 
         # 현재 카테고리에 대한 바로가기 필터링
-        items_to_display = []
+        # 인덱스가 우선순위 순으로 정렬된 목록을 유지하므로 별도 정렬이 필요 없음
         if current_tab_category_name == ALL_CATEGORY_NAME:
-            items_to_display = list(self.shortcuts) # 모두 표시
+            items_to_display = self.index.all_sorted() # 모두 표시
         else:
-            items_to_display = [sc for sc in self.shortcuts if sc.get("category") == current_tab_category_name]
-
-        # 일관된 표시를 위해 우선순위로 항목 정렬
-        items_to_display.sort(key=lambda x: x.get('priority', float('inf')))
+            items_to_display = self.index.in_category(current_tab_category_name)
 
         for sc_data in items_to_display:
-            name = sc_data.get("name", "N/A")
-            item = QListWidgetItem(name)
-            current_icon = fallback_qicon # 기본적으로 대체 아이콘 사용
-
-            icon_path_from_data = sc_data.get("icon_path")
-            if icon_path_from_data:
-                loaded_user_icon = load_icon_pixmap(icon_path_from_data, icon_size) # 로드 및 스케일링
-                if not loaded_user_icon.isNull():
-                    current_icon = loaded_user_icon
-
-            item.setIcon(current_icon)
-            item.setData(Qt.ItemDataRole.UserRole, sc_data) # 전체 데이터 dict 저장
-            item.setToolTip(f"{name}\nURL: {sc_data.get('url')}\n단축키: {sc_data.get('hotkey') or '없음'}")
+            item = QListWidgetItem()
+            self._fill_shortcut_list_item(item, sc_data, icon_size, fallback_qicon)
             current_list_widget.addItem(item)
+        if favicon_atlas.dirty and not self._favicon_atlas_timer.isActive():
+            self._favicon_atlas_timer.start() # 아틀라스에 없는 아이콘이 있었음
 
         # 각 리스트의 끝에 "새 바로가기 추가" 항목 추가
         add_shortcut_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogNewFolder) # "추가"에 폴더 아이콘 사용
@@ -1467,6 +4952,25 @@ class ShortcutManagerWindow(QMainWindow):
         current_list_widget.addItem(add_item)
 
 
+    def _fill_shortcut_list_item(self, item: QListWidgetItem, sc_data: dict, icon_size: QSize, fallback_qicon: QIcon):
+        """바로가기 데이터로 리스트 항목의 텍스트, 아이콘, 툴팁, 데이터를 설정합니다."""
+        name = sc_data.get("name", "N/A")
+        item.setText(name)
+        current_icon = fallback_qicon # 기본적으로 대체 아이콘 사용
+
+        icon_path_from_data = sc_data.get("icon_path")
+        if icon_path_from_data:
+            resolved_icon_path = resolve_icon_path(icon_path_from_data)
+            if icon_size.width() in FAVICON_RENDER_SIZES and not has_rendered_favicon(resolved_icon_path, icon_size.width()):
+                self.favicon_normalizer.submit(resolved_icon_path) # 이번에는 원본을 스케일링하고 다음부터 PNG 사용
+            loaded_user_icon = load_icon_pixmap(icon_path_from_data, icon_size) # 미리 만든 PNG 또는 원본 로드 및 스케일링
+            if not loaded_user_icon.isNull():
+                current_icon = loaded_user_icon
+
+        item.setIcon(current_icon)
+        item.setData(Qt.ItemDataRole.UserRole, sc_data) # 전체 데이터 dict 저장
+        item.setToolTip(f"{name}\nURL: {sc_data.get('url')}\n단축키: {sc_data.get('hotkey') or '없음'}")
+
     def register_all_item_hotkeys(self):
         """기존 모든 항목 단축키를 등록 해제하고 self.shortcuts에서 다시 등록합니다."""
         for key in list(self.hotkey_actions.keys()): # 키 복사본으로 반복
@@ -1514,54 +5018,58 @@ class ShortcutManagerWindow(QMainWindow):
             print(f"경고 (순서 변경): 드롭된 항목 ID {dropped_item_id}를 현재 뷰에서 찾을 수 없습니다.")
             return
 
-        new_priority = 0.0
-        num_items_in_view = len(current_view_items_data)
-
-        if num_items_in_view == 1: # 항목이 하나뿐
-            new_priority = 1.0
-        elif actual_new_row_in_filtered_list == 0: # 맨 앞으로 이동
-            priority_after = current_view_items_data[1].get('priority', 2.0) # 현재 인덱스 1에 있는 항목의 우선순위
-            new_priority = priority_after / 2.0
-            if new_priority <= 0: new_priority = priority_after - 0.5 # P_after가 작은 경우 0/음수 방지
-            if new_priority <=0: new_priority = 0.001 # 절대 최소 양수
-        elif actual_new_row_in_filtered_list == num_items_in_view - 1: # 맨 뒤로 이동
-            priority_before = current_view_items_data[num_items_in_view - 2].get('priority', 0.0) # 현재 그 앞에 있는 항목의 우선순위
-            new_priority = priority_before + 1.0
-        else: # 두 항목 사이로 이동
-            priority_before = current_view_items_data[actual_new_row_in_filtered_list - 1].get('priority', 0.0)
-            priority_after = current_view_items_data[actual_new_row_in_filtered_list + 1].get('priority', 0.0)
-            new_priority = (priority_before + priority_after) / 2.0
-
-        # 우선순위 충돌 확인 (예: 나누기 결과가 기존 우선순위이거나 너무 가까운 경우)
-        epsilon = 0.00001 # float 비교를 위한 작은 허용 오차
-        conflict = False
-        # 새 이웃과 비교
-        if actual_new_row_in_filtered_list > 0 and abs(new_priority - current_view_items_data[actual_new_row_in_filtered_list - 1].get('priority',0.0)) < epsilon:
-            conflict = True
-        if actual_new_row_in_filtered_list < num_items_in_view - 1 and abs(new_priority - current_view_items_data[actual_new_row_in_filtered_list + 1].get('priority',0.0)) < epsilon:
-            conflict = True
-
-        if conflict: # 새 우선순위가 인접한 것과 너무 가까우면 약간 조정하거나 우선순위를 다시 매김
-            # 이것은 간단한 충돌 해결 방법이며, 더 견고한 방법은 모든 우선순위를 다시 번호 매길 수 있음
-            # 지금은 살짝 밀어보기.
-            if actual_new_row_in_filtered_list > 0: # 앞에 항목이 있는 경우
-                new_priority = current_view_items_data[actual_new_row_in_filtered_list - 1].get('priority',0.0) + 0.5
-            elif num_items_in_view > 1 : # 첫 번째이고 뒤에 항목이 있는 경우
-                 new_priority = current_view_items_data[actual_new_row_in_filtered_list + 1].get('priority',0.0) - 0.5
-                 if new_priority <=0 : new_priority = current_view_items_data[actual_new_row_in_filtered_list + 1].get('priority',0.0) / 2.0 # 양수 보장
-            else: # 단일 항목이거나 여전히 문제
-                new_priority = 1.0 # 대체
-
-        # 메인 self.shortcuts 리스트에서 우선순위 업데이트
-        for sc_dict_global in self.shortcuts:
-            if sc_dict_global.get("id") == dropped_item_id:
-                sc_dict_global['priority'] = new_priority
-                break
+        # 새 위치의 앞/뒤 이웃 키 사이에 들어갈 순위 키를 만듦 (이웃 키는 그대로이므로 항목 하나만 기록)
+        before_key, after_key = self._neighbor_rank_keys(current_view_items_data, actual_new_row_in_filtered_list)
+        if before_key is not None and after_key is not None and before_key >= after_key:
+            # 이웃 키가 같음(중복 키가 든 외부 데이터 등): 전체 키를 다시 매긴 뒤 이웃 키를 다시 읽음
+            self.rebalance_priorities()
+            before_key, after_key = self._neighbor_rank_keys(current_view_items_data, actual_new_row_in_filtered_list)
+        new_priority = rank_between(before_key, after_key)
 
-        self.save_data()
+        # 인덱스에서 우선순위 업데이트 (정렬 목록도 함께 갱신)
+        self.index.set_priority(dropped_item_id, new_priority)
+
+        self.journal_change("patch", id=dropped_item_id, fields={"priority": new_priority})
+        if len(new_priority) > RANK_REBALANCE_LENGTH: # 같은 자리에 반복해서 끼워 넣어 키가 길어짐
+            self._schedule_priority_rebalance()
         self.populate_list_for_current_tab() # 새 우선순위에 따라 다시 정렬하고 재채우기
 
 
+    def _neighbor_rank_keys(self, view_items_data, row):
+        """리스트의 row 위치 앞/뒤 항목의 현재 순위 키를 반환합니다 (없으면 None)."""
+        def rank_at(i):
+            if not 0 <= i < len(view_items_data): return None
+            sc_data = self.index.get(view_items_data[i].get("id"))
+            key = priority_sort_key(sc_data)[0] if sc_data is not None else RANK_MISSING
+            return None if key == RANK_MISSING else key
+        return rank_at(row - 1), rank_at(row + 1)
+
+    def _schedule_priority_rebalance(self):
+        """잠시 뒤(RANK_REBALANCE_DELAY_MS) 순위 키 재배치를 예약합니다. 이미 예약되어 있으면 그대로 둡니다."""
+        if not self._rebalance_timer.isActive():
+            self._rebalance_timer.start()
+
+    def _rebalance_if_needed(self):
+        """순위 키 중 RANK_REBALANCE_LENGTH보다 긴 것이 있으면 재배치합니다 (예약된 타이머에서 실행)."""
+        if any(len(priority_sort_key(sc)[0]) > RANK_REBALANCE_LENGTH for sc in self.index.records()):
+            self.rebalance_priorities()
+
+    def rebalance_priorities(self):
+        """
+        현재 순서를 유지한 채 모든 항목에 가장 짧은 연속 순위 키(a0, a1, ...)를 다시 매깁니다.
+        한 번의 스냅샷으로 저장되며, 기록은 저장 작업자 스레드에서 이루어집니다.
+        """
+        ordered = self.index.all_sorted()
+        for sc_data, key in zip(ordered, sequential_ranks(len(ordered))):
+            sc_data["priority"] = key
+        self.shortcuts = self.index.records() # 키가 모두 바뀌었으므로 인덱스 재구성 (삽입 순서 유지)
+        self.save_data()
+        print(f"정보: 바로가기 {len(ordered)}개의 순위 키를 다시 매겼습니다.")
+
+    def find_shortcut_by_hotkey(self, hotkey_str, exclude_id=None):
+        """단축키를 사용하는 바로가기 데이터를 반환합니다 (exclude_id 항목은 제외). 없으면 None."""
+        return self.index.find_by_hotkey(hotkey_str, exclude_id)
+
     def add_shortcut(self):
         """대화상자를 통해 새 바로가기 추가를 처리합니다."""
         user_selectable_cats = [c for c in self.categories_order if c not in [ALL_CATEGORY_NAME, ADD_CATEGORY_TAB_TEXT]]
@@ -1584,16 +5092,13 @@ class ShortcutManagerWindow(QMainWindow):
             new_data = dlg.get_data()
             new_data["id"] = str(uuid.uuid4()) # 새 고유 ID 생성
 
-            # 우선순위 할당 (예: 기존 최대값 + 1, 또는 첫 항목이면 1.0)
-            max_priority = 0.0
-            if self.shortcuts: # 기존 바로가기가 있는 경우
-                max_priority = max(sc.get("priority", 0.0) for sc in self.shortcuts)
-            new_data["priority"] = max_priority + 1.0
+            # 우선순위 할당 (맨 뒤에 오는 순위 키)
+            new_data["priority"] = self.index.next_priority()
 
             # 단축키 충돌 확인
             if new_data["hotkey"]: # 단축키가 실제로 입력된 경우에만 확인
                 # 다른 항목 단축키와 비교
-                if any(s.get("hotkey") == new_data["hotkey"] for s in self.shortcuts):
+                if self.find_shortcut_by_hotkey(new_data["hotkey"]):
                     QMessageBox.warning(self, "단축키 중복", f"단축키 '{new_data['hotkey']}'은(는) 이미 다른 바로가기에서 사용 중입니다.")
                     return # 추가 중단
                 # 전역 보이기/숨기기 단축키와 비교
@@ -1601,21 +5106,21 @@ class ShortcutManagerWindow(QMainWindow):
                     QMessageBox.warning(self, "단축키 충돌", f"단축키 '{new_data['hotkey']}'은(는) 창 보이기 전역 단축키로 사용 중입니다.")
                     return # 추가 중단
 
-            # 아이콘 가져오기
-            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-            new_data["icon_path"] = fetch_favicon(new_data["url"])
-            QApplication.restoreOverrideCursor()
+            # 아이콘은 백그라운드에서 가져오고, 그동안은 대체 아이콘으로 표시 (도착하면 해당 행만 갱신)
+            new_data["icon_path"] = None
 
             # 바로가기 리스트에 추가
-            self.shortcuts.append(new_data)
+            self.index.add(new_data)
 
             # 선택된 카테고리가 "일반"이고 categories_order에 없으면 추가
             chosen_cat = new_data["category"]
             if chosen_cat == "일반" and "일반" not in self.categories_order:
                 self.categories_order.append("일반")
+                self.journal_change("categories", order=list(self.categories_order))
                 # 여기서 즉시 update_category_tabs를 호출할 필요 없음, 저장 후 처리됨
 
-            self.save_data()
+            self.journal_change("add", item=new_data)
+            self.favicon_queue.enqueue(new_data["id"], new_data["url"], urgent=True)
             self.register_all_item_hotkeys() # 새 단축키가 추가되었으므로 모든 단축키 재등록
 
             # UI 업데이트: 새로 추가된 항목의 카테고리 탭 선택
@@ -1636,7 +5141,7 @@ class ShortcutManagerWindow(QMainWindow):
                 return
 
             self.categories_order.append(name)
-            self.save_data()
+            self.journal_change("categories", order=list(self.categories_order))
             self._category_to_select_after_update = name # 탭 업데이트 후 선택을 위해 표시
             self.update_category_tabs() # 새 탭을 생성하고 선택
             self._category_to_select_after_update = None # 마커 지우기
@@ -1669,9 +5174,7 @@ class ShortcutManagerWindow(QMainWindow):
                 # "일반"이 없으면 categories_order에 추가될 것임.
 
             # 삭제된 카테고리의 항목들을 대체 카테고리로 이동
-            for sc in self.shortcuts:
-                if sc.get("category") == category_name_to_delete:
-                    sc["category"] = target_fallback_category
+            self.index.recategorize(category_name_to_delete, target_fallback_category)
 
             # 순서에서 카테고리 제거
             if category_name_to_delete in self.categories_order:
@@ -1680,10 +5183,11 @@ class ShortcutManagerWindow(QMainWindow):
             # 대체 카테고리가 "일반"이고 categories_order에 없지만 항목들이 이제 그것을 사용하면, 추가.
             if target_fallback_category == "일반" and \
                "일반" not in self.categories_order and \
-               any(sc.get("category") == "일반" for sc in self.shortcuts):
+               self.index.has_category("일반"):
                 self.categories_order.append("일반")
 
-            self.save_data()
+            self.journal_change("recategorize", **{"from": category_name_to_delete, "to": target_fallback_category})
+            self.journal_change("categories", order=list(self.categories_order))
             self.update_category_tabs() # UI 새로고침, 유효한 탭 선택
 
             # 삭제 후 유효한 탭이 선택되고 내용이 채워지도록 보장
@@ -1766,8 +5270,8 @@ class ShortcutManagerWindow(QMainWindow):
             return
 
         shortcut_id_to_edit = data_item.get("id")
-        # ID를 사용하여 self.shortcuts에서 원본 전체 바로가기 데이터 찾기
-        original_shortcut_data = next((s for s in self.shortcuts if s.get("id") == shortcut_id_to_edit), None)
+        # ID를 사용하여 인덱스에서 원본 전체 바로가기 데이터 찾기
+        original_shortcut_data = self.index.get(shortcut_id_to_edit)
 
         if not original_shortcut_data:
             QMessageBox.critical(self, "편집 오류", "편집할 바로가기 원본 데이터를 찾을 수 없습니다.")
@@ -1785,7 +5289,7 @@ class ShortcutManagerWindow(QMainWindow):
             # 단축키 충돌 확인 (단축키가 변경된 경우에만)
             if new_data["hotkey"] and new_data["hotkey"] != original_shortcut_data.get("hotkey"):
                 # 다른 항목과 비교
-                if any(s.get("hotkey") == new_data["hotkey"] and s.get("id") != shortcut_id_to_edit for s in self.shortcuts):
+                if self.find_shortcut_by_hotkey(new_data["hotkey"], exclude_id=shortcut_id_to_edit):
                     QMessageBox.warning(self, "단축키 중복", f"단축키 '{new_data['hotkey']}'은(는) 이미 다른 바로가기에서 사용 중입니다.")
                     return
                 # 전역 단축키와 비교
@@ -1797,27 +5301,23 @@ class ShortcutManagerWindow(QMainWindow):
             # "일반"이 선택되었고 categories_order에 없으면 추가.
             if chosen_cat == "일반" and "일반" not in self.categories_order:
                 self.categories_order.append("일반")
+                self.journal_change("categories", order=list(self.categories_order))
 
             # URL이 변경된 경우에만 아이콘 업데이트
-            if new_data["url"] != original_shortcut_data.get("url"):
-                QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-                # 이전 아이콘 파일이 존재하고 기본 아이콘이 아니면 삭제 시도
-                old_icon_path = original_shortcut_data.get("icon_path")
-                if old_icon_path and os.path.exists(old_icon_path) and os.path.basename(old_icon_path) != DEFAULT_FAVICON_FILENAME :
-                    try: os.remove(old_icon_path)
-                    except OSError as e: print(f"경고 (편집): 이전 아이콘 {old_icon_path} 제거 실패: {e}")
-                new_data["icon_path"] = fetch_favicon(new_data["url"])
-                QApplication.restoreOverrideCursor()
+            url_changed = new_data["url"] != original_shortcut_data.get("url")
+            if url_changed:
+                # 이전 아이콘 파일은 같은 도메인의 다른 바로가기가 쓸 수 있으므로 지우지 않음 (참조가 없으면 용량 상한을 넘을 때 정리 작업이 지움)
+                if original_shortcut_data.get("icon_path"): self._favicon_gc_timer.start()
+                new_data["icon_path"] = None # 새 아이콘이 도착할 때까지 대체 아이콘 표시
             else: # URL이 변경되지 않았으면 이전 아이콘 경로 유지
                 new_data["icon_path"] = original_shortcut_data.get("icon_path")
 
-            # 메인 리스트의 바로가기 업데이트
-            for i, s_loop_var in enumerate(self.shortcuts):
-                if s_loop_var.get("id") == shortcut_id_to_edit:
-                    self.shortcuts[i] = new_data
-                    break
+            # 인덱스의 바로가기 업데이트
+            self.index.replace(new_data)
 
-            self.save_data()
+            self.journal_change("update", item=new_data)
+            if url_changed: # 진행 중인 이전 URL의 가져오기는 이 작업으로 대체됨
+                self.favicon_queue.enqueue(shortcut_id_to_edit, new_data["url"], urgent=True)
             self.register_all_item_hotkeys() # 하나가 변경되었을 수 있으므로 모든 단축키 재등록
 
             # UI 업데이트하고 (잠재적으로 새로운) 카테고리 탭 선택
@@ -1842,17 +5342,10 @@ class ShortcutManagerWindow(QMainWindow):
                                      QMessageBox.StandardButton.No)
 
         if reply == QMessageBox.StandardButton.Yes:
-            # 연관된 아이콘 파일 삭제 시도 (기본이 아닌 경우)
-            icon_to_delete = data.get("icon_path")
-            if icon_to_delete and os.path.exists(icon_to_delete) and os.path.basename(icon_to_delete) != DEFAULT_FAVICON_FILENAME :
-                try:
-                    os.remove(icon_to_delete)
-                except OSError as e:
-                    print(f"경고 (삭제): 아이콘 파일 {icon_to_delete}을(를) 제거할 수 없습니다: {e}")
-
-            # 메인 바로가기 리스트에서 제거
-            self.shortcuts = [s for s in self.shortcuts if s.get("id") != shortcut_id_to_delete]
-            self.save_data()
+            # 메인 바로가기 리스트에서 제거. 아이콘 파일은 다른 바로가기가 참조하지 않으면 용량 상한을 넘을 때 정리 작업이 지움
+            removed = self.index.remove(shortcut_id_to_delete)
+            if removed and removed.get("icon_path"): self._favicon_gc_timer.start()
+            self.journal_change("delete", id=shortcut_id_to_delete)
             self.register_all_item_hotkeys() # 등록된 단축키 업데이트
             self.populate_list_for_current_tab() # UI 새로고침
 
@@ -1907,14 +5400,8 @@ class ShortcutManagerWindow(QMainWindow):
 
     def move_shortcut_to_category(self, shortcut_id: str, new_category_name: str):
         """탭 위로 드래그된 후 바로가기를 새 카테고리로 이동합니다."""
-        found = False
-        for sc_data in self.shortcuts:
-            if sc_data.get("id") == shortcut_id:
-                sc_data["category"] = new_category_name
-                found = True
-                break
-        if found:
-            self.save_data()
+        if self.index.set_category(shortcut_id, new_category_name) is not None:
+            self.journal_change("patch", id=shortcut_id, fields={"category": new_category_name})
             # 현재 표시된 리스트를 새로고침합니다. "전체"였다면 업데이트됩니다.
             # 소스 또는 대상 카테고리였다면 역시 업데이트됩니다.
             self.populate_list_for_current_tab()
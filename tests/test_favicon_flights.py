@@ -0,0 +1,65 @@
+"""
+같은 도메인 파비콘 가져오기 합치기(SingleFlight)와 취소 테스트입니다.
+
+사용법 (저장소 루트에서):
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import main # noqa: E402
+
+URL = "http://flight.test/"
+
+
+class FaviconFlightCancelTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._favicon_dir = main.FAVICON_DIR
+        main.FAVICON_DIR = self._tmp.name
+        main.favicon_failures.clear()
+
+    def tearDown(self):
+        main.favicon_failures.clear()
+        main.FAVICON_DIR = self._favicon_dir
+        self._tmp.cleanup()
+
+    def test_follower_refetches_when_leader_is_cancelled(self):
+        """앞선 호출이 자기 예산의 취소로 멈추면, 기다리던 호출은 그 결과 대신 직접 다시 가져와야 합니다."""
+        leader_started = threading.Event()
+        calls = []
+
+        def fake_fetch(url, revalidate, budget):
+            calls.append(budget)
+            if len(calls) == 1: # 앞선 호출: 취소될 때까지 진행 중
+                leader_started.set()
+                while not budget.is_cancelled(): time.sleep(0.01)
+                return None, main.FAVICON_CANCELLED
+            return "/icons/flight.png", main.FAVICON_UPDATED
+
+        leader_budget, follower_budget = main.FaviconBudget(10), main.FaviconBudget(10)
+        results = {}
+        with mock.patch.object(main, "_fetch_favicon", fake_fetch):
+            leader = threading.Thread(target=lambda: results.setdefault("leader", main.refresh_favicon(URL, leader_budget)))
+            leader.start()
+            leader_started.wait(5)
+            follower = threading.Thread(target=lambda: results.setdefault("follower", main.refresh_favicon(URL, follower_budget)))
+            follower.start()
+            time.sleep(0.1) # 따라온 호출이 기다리기 시작할 시간
+            leader_budget.cancel()
+            leader.join(5)
+            follower.join(5)
+
+        self.assertEqual(results["leader"], (None, main.FAVICON_CANCELLED))
+        self.assertEqual(results["follower"], ("/icons/flight.png", main.FAVICON_UPDATED))
+        self.assertIs(calls[1], follower_budget)
+
+
+if __name__ == '__main__':
+    unittest.main()
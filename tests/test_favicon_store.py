@@ -0,0 +1,98 @@
+"""
+파비콘 저장소 다운로드/커밋 테스트입니다.
+
+사용법 (저장소 루트에서):
+    python -m unittest discover tests
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import main # noqa: E402
+
+
+class _Response:
+    """_download_favicon이 쓰는 iter_content만 가진 응답입니다."""
+    def __init__(self, body):
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+def png(tag):
+    return b"\x89PNG\r\n\x1a\n" + tag * 200
+
+
+class FaviconDownloadTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._favicon_dir = main.FAVICON_DIR
+        main.FAVICON_DIR = self._tmp.name
+
+    def tearDown(self):
+        main.FAVICON_DIR = self._favicon_dir
+        self._tmp.cleanup()
+
+    def test_downloads_on_same_worker_commit_independently(self):
+        """같은 작업자 스레드가 커밋 전에 다음 다운로드를 받아도 앞의 임시 파일을 덮어쓰지 않아야 합니다."""
+        bodies = {"a.test": png(b"a"), "b.test": png(b"b")}
+        with ThreadPoolExecutor(max_workers=1) as pool: # 출처 경주처럼 다운로드는 작업자, 커밋은 호출 스레드
+            downloads = {domain: pool.submit(main._download_favicon, _Response(body)).result()
+                         for domain, body in bodies.items()}
+        self.assertNotEqual(downloads["a.test"][0], downloads["b.test"][0])
+
+        for domain, body in bodies.items():
+            path, status = main._commit_favicon(main.favicon_filename_base(domain), downloads[domain], ".png", {},
+                                                f"http://{domain}/", f"http://{domain}/favicon.png", "page")
+            self.assertEqual(status, main.FAVICON_UPDATED)
+            with open(path, 'rb') as f:
+                stored = f.read()
+            self.assertEqual(stored, body)
+            self.assertEqual(os.path.basename(path), hashlib.sha256(body).hexdigest() + ".png")
+
+
+class FaviconGarbageCollectionTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._favicon_dir = main.FAVICON_DIR
+        main.FAVICON_DIR = self._tmp.name
+        main.favicon_index.invalidate()
+        main.favicon_render_index.invalidate()
+
+    def tearDown(self):
+        main.FAVICON_DIR = self._favicon_dir
+        main.favicon_index.invalidate()
+        main.favicon_render_index.invalidate()
+        self._tmp.cleanup()
+
+    def test_default_icon_renders_are_not_orphans(self):
+        """실패한 바로가기가 쓰는 DEFAULT_FAVICON의 미리 만든 PNG는 원본이 없는 PNG로 지우지 않아야 합니다."""
+        default_icon = main.get_favicon_path(main.DEFAULT_FAVICON_FILENAME)
+        with open(default_icon, 'wb') as f:
+            f.write(png(b"d"))
+        renders = [main.rendered_favicon_path(default_icon, size, scale)
+                   for size in main.FAVICON_RENDER_SIZES for scale in main.FAVICON_RENDER_SCALES]
+        orphan = main.rendered_favicon_path(os.path.join(self._tmp.name, "gone.test.png"), main.FAVICON_RENDER_SIZES[0])
+        os.makedirs(main.get_rendered_favicon_dir())
+        for path in renders + [orphan]:
+            with open(path, 'wb') as f:
+                f.write(png(b"r"))
+
+        with mock.patch.object(main, "DEFAULT_FAVICON", default_icon):
+            main.favicon_store.collect_garbage({default_icon}, grace=0, now=time.time() + 3600)
+
+        for path in renders:
+            self.assertTrue(os.path.exists(path), path)
+        self.assertFalse(os.path.exists(orphan))
+
+
+if __name__ == '__main__':
+    unittest.main()
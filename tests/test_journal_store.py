@@ -0,0 +1,92 @@
+"""
+스냅샷 + 저널 저장소(ShortcutJournalStore) 테스트입니다.
+
+사용법 (저장소 루트에서):
+    python -m unittest discover tests
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import main # noqa: E402
+
+
+def document(names):
+    return {"categories_order": ["기본"], "global_show_window_hotkey": "ctrl+shift+x",
+            "shortcuts": [{"id": name, "name": name, "url": f"https://{name}.test/", "category": "기본",
+                           "priority": rank} for name, rank in zip(names, main.sequential_ranks(len(names)))]}
+
+
+class JournalStoreSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        paths = [os.path.join(self._tmp.name, name) for name in ("shortcuts.json", "shortcuts.journal", "shortcuts.bin")]
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            json.dump(document(["a", "b"]), f) # 바이너리 스냅샷이 없는 JSON
+        self.store = main.ShortcutJournalStore(paths[0], paths[1], binary_path=paths[2])
+
+    def tearDown(self):
+        self.store.wait_for_compaction(5)
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_startup_binary_write_does_not_block_compaction(self):
+        """시작할 때의 바이너리 스냅샷 기록이 진행 중이어도 저널 압축은 건너뛰지 않아야 합니다."""
+        self.store.load()
+        self.store.append("add", item={"id": "c", "name": "c", "url": "https://c.test/", "category": "기본", "priority": "a2"})
+        self.store.compact_async()
+        self.assertIsNotNone(self.store._compact_thread)
+        self.store.wait_for_compaction(5)
+        self.assertFalse(os.path.exists(self.store.journal_path))
+        reloaded = main.ShortcutJournalStore(self.store.snapshot_path, self.store.journal_path, binary_path=self.store.binary_path)
+        self.assertEqual(sorted(sc["id"] for sc in reloaded.load()["shortcuts"]), ["a", "b", "c"])
+        reloaded.wait_for_compaction(5)
+
+    def test_older_snapshot_does_not_replace_newer(self):
+        """늦게 끝난 이전 압축은 더 새로운 스냅샷과 바이너리 스냅샷을 덮어쓰지 않아야 합니다."""
+        self.store.load()
+        self.store.save_snapshot(document(["a", "b", "c"]))
+        self.store._compact(document(["a"]), 1)
+        self.store._write_binary_only(document(["a"]), 1, None)
+        reloaded = main.ShortcutJournalStore(self.store.snapshot_path, self.store.journal_path, binary_path=self.store.binary_path)
+        self.assertEqual(sorted(sc["id"] for sc in reloaded.load()["shortcuts"]), ["a", "b", "c"])
+        self.assertEqual(len(main.read_binary_snapshot(self.store.binary_path)[0]["shortcuts"]), 3)
+        reloaded.wait_for_compaction(5)
+
+
+class PersistenceWorkerSignatureTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        paths = [os.path.join(self._tmp.name, name) for name in ("shortcuts.json", "shortcuts.journal", "shortcuts.bin")]
+        self.store = main.ShortcutJournalStore(*paths[:2], binary_path=paths[2])
+        self.store.load()
+
+    def tearDown(self):
+        self.store.wait_for_compaction(5)
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_written_signature_is_taken_inside_write_path(self):
+        """기록이 끝난 뒤 생긴 외부 변경은 작업자 자신의 쓰기 서명에 섞이지 않아야 합니다."""
+        worker = main.PersistenceWorker(self.store, debounce_time=0)
+        external = lambda: open(self.store.journal_path, 'a', encoding='utf-8').write("{}\n") # 다른 프로세스의 기록
+        append_many = self.store.append_many
+        def append_then_external_edit(changes):
+            signature = append_many(changes)
+            external()
+            return signature
+        worker.start()
+        with mock.patch.object(self.store, "append_many", append_then_external_edit):
+            worker.submit("add", item={"id": "a", "name": "a", "url": "https://a.test/", "category": "기본", "priority": "a0"})
+            worker.flush(5)
+        worker.stop()
+        self.assertIsNotNone(worker.written_signature())
+        self.assertNotEqual(worker.written_signature(), main.store_signature(self.store))
+
+
+if __name__ == '__main__':
+    unittest.main()